@@ -69,6 +69,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'schoolApp.middleware.SessionMiddleware',
     'schoolApp.middleware.AutoLogoutMiddleware',
+    'schoolApp.middleware.EduUserMiddleware',
+    'schoolApp.middleware.ReplicaPinMiddleware',
 ]
 # STATIC_URL = '/static/' 
 # STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -114,6 +116,26 @@ else:
         }
     }
 
+# Small deployments serving from SQLite can opt in to a tuned profile
+# (schoolApp.sqlite): PRAGMAs on every connection, persistent connections,
+# and write transactions that take the lock when they begin, so a busy
+# database makes them wait instead of failing with "database is locked"
+SQLITE_TUNING = config('SQLITE_TUNING', default=False, cast=bool)
+if SQLITE_TUNING and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+
+# Optional read replica (schoolApp.replica): the heavy read-only views read
+# from it, everything else and all writes use the primary. Two SQLite files
+# work for local testing, e.g. DATABASE_REPLICA_URL=sqlite:///replica.sqlite3
+# with a copy of db.sqlite3. Leave it unset when running the test suite
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600)
+DATABASE_ROUTERS = ['schoolApp.replica.ReplicaRouter']
+REPLICA_PIN_COOKIE = 'pin_primary'
+REPLICA_PIN_SECONDS = 10  # how long a user reads from the primary after writing
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -133,6 +155,12 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing runs in a small process pool (schoolApp.hashing) so login bursts
+# don't stall the worker. Requests beyond workers + queue depth get a 503.
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)  # 0 hashes inline
+PASSWORD_HASHING_QUEUE_DEPTH = config('PASSWORD_HASHING_QUEUE_DEPTH', default=8, cast=int)
+PASSWORD_HASHING_RETRY_AFTER = 5  # seconds, sent as Retry-After when the queue is full
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -164,15 +192,73 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 
 # Session Configuration
-# Sessions are saved to database by default (django.contrib.sessions.backends.db)
+# Sessions are saved to database (schoolApp.session_store wraps django.contrib.sessions.backends.db)
 # This persists user data automatically
 
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # Save sessions to database
+SESSION_ENGINE = 'schoolApp.session_store'  # Database sessions with coalesced last_activity writes
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False  # Keep session even after browser closes
 SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
 SESSION_COOKIE_HTTPONLY = True  # Prevent JavaScript from accessing session cookie
 SESSION_SAVE_EVERY_REQUEST = True  # Save session on every request
+# Only write last_activity to django_session once it has moved this many seconds;
+# in between it lives in the session cache. 0 writes on every request again.
+SESSION_ACTIVITY_FLUSH_WINDOW = config('SESSION_ACTIVITY_FLUSH_WINDOW', default=60, cast=int)
+
+# Two-tier cache (schoolApp.tiered_cache): a per-process LRU in front of a
+# cache every worker shares. CACHE_L2 picks the shared tier: 'file' (the
+# default; schoolApp.file_cache, sharded so writes don't list 20k files),
+# 'db' (run manage.py createcachetable first) or a redis:// URL.
+CACHE_L2 = config('CACHE_L2', default='file')
+if CACHE_L2 == 'db':
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'schoolapp_cache'}
+elif CACHE_L2.startswith(('redis://', 'rediss://')):
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_L2}
+else:
+    SHARED_CACHE = {'BACKEND': 'schoolApp.file_cache.ShardedFileCache', 'LOCATION': BASE_DIR / '.cache'}
+CACHES = {
+    'default': {
+        'BACKEND': 'schoolApp.tiered_cache.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'MAX_ENTRIES': 5000,  # per process
+            'L1_TIMEOUT': 5,  # seconds another process's change may go unseen
+        },
+    },
+    'shared': {**SHARED_CACHE, 'TIMEOUT': 600, 'OPTIONS': {'MAX_ENTRIES': 20000}},
+}
+# api/cache-stats/ answers mentors and these client addresses (a metrics
+# scraper). Django sees the proxy's address behind a reverse proxy, so
+# list only addresses that reach it directly.
+CACHE_STATS_ALLOWED_IPS = [ip.strip() for ip in config('CACHE_STATS_ALLOWED_IPS', default='').split(',') if ip.strip()]
+# Course/Instructor/Mentor querysets cached by schoolApp.querycache
+QUERYSET_CACHE_TIMEOUT = 600  # seconds; saving one of those models invalidates sooner
+
+# Logged-in Student/Mentor rows cached per process by schoolApp.middleware.EduUserMiddleware
+EDU_USER_CACHE_SIZE = 1024  # entries
+EDU_USER_CACHE_TTL = 300  # seconds; saves in this process invalidate immediately
+
+# Course catalog (schoolApp.catalog) used by the classes and learning center pages
+COURSE_CATALOG_PAGE_SIZE = 24
+COURSE_CATALOG_CACHE_TIMEOUT = 600  # seconds; saving a Course invalidates sooner
+
+# Full-page cache for the static marketing pages (schoolApp.page_cache)
+PAGE_CACHE_TIMEOUT = 600  # seconds
+PAGE_CACHE_DIR = BASE_DIR / 'prerendered'  # written by manage.py prerender_pages at deploy time
+
+# course_update notifications are written in batches by manage.py process_fanouts
+FANOUT_BATCH_SIZE = 1000
+
+# Cached unread message/notification counts (schoolApp.inbox)
+INBOX_COUNTS_TIMEOUT = 300  # seconds; new or read items invalidate sooner
+
+# Messages per page of an enrollment's conversation (schoolApp.threads)
+MESSAGE_THREAD_PAGE_SIZE = 20
+
+# Server-Sent Events stream of new messages/notifications (schoolApp.events)
+EVENT_STREAM_KEEPALIVE = 15  # seconds between keepalive comments
+EVENT_STREAM_MAX_AGE = 300  # seconds before the stream closes and the browser reconnects
+EVENT_STREAM_POLL_INTERVAL = 30  # seconds; reconnect delay when served without ASGI
 
 # CSRF & Security Configuration
 CSRF_TRUSTED_ORIGINS = config(
@@ -208,3 +294,43 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For developm
 # EMAIL_HOST_PASSWORD = 'your-app-password'
 
 DEFAULT_FROM_EMAIL = 'noreply@eduforall.com'
+
+# Background task outbox (schoolApp.tasks, manage.py run_tasks)
+TASK_WORKER_THREADS = 4
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF = 30  # seconds before the first retry, doubled after each failure
+TASK_LEASE_TIMEOUT = 300  # seconds before a running task whose worker died is retried
+
+# Students per transaction in bulk enrollment (schoolApp.enrollment)
+BULK_ENROLL_BATCH_SIZE = 1000
+
+# Bulk CSV/JSONL imports (manage.py import_users / import_courses)
+IMPORT_BATCH_SIZE = 1000  # rows per bulk_create
+
+# Largest batch of lesson events accepted by api/progress/ (schoolApp.progress)
+PROGRESS_MAX_EVENTS = 500
+
+# PRAGMAs applied to each new SQLite connection when SQLITE_TUNING is on
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers don't block the writer
+    'synchronous': 'NORMAL',  # fsync at checkpoints only; safe in WAL mode
+    'busy_timeout': 5000,  # ms to wait for a lock before giving up
+    'mmap_size': 268435456,  # 256 MiB
+    'cache_size': -65536,  # negative means KiB: 64 MiB
+    'temp_store': 'MEMORY',
+}
+SQLITE_OPTIMIZE_INTERVAL = 3600  # seconds between PRAGMA optimize runs per process
+
+# Mentor suggestions on the enroll form (schoolApp.matching)
+MENTOR_MATCH_COUNT = 5  # mentors offered per course
+MENTOR_MAX_ACTIVE_STUDENTS = 30  # mentors at this load are only suggested after everyone else
+
+# Course recommendations on the student dashboard (manage.py rebuild_recommendations)
+RECOMMENDATION_SIMILAR_COURSES = 20  # similar courses stored per course
+RECOMMENDATION_MIN_COMMON_STUDENTS = 2  # rarer pairs are treated as noise
+RECOMMENDATION_COUNT = 6  # courses shown per student
+RECOMMENDATION_CACHE_TIMEOUT = 3600  # seconds a student's list is cached
+
+# Newsletter campaigns (manage.py send_newsletter)
+NEWSLETTER_BATCH_SIZE = 500  # messages per SMTP connection
+NEWSLETTER_SEND_RATE = 50  # messages per second; 0 disables throttling
@@ -11,6 +11,10 @@ admin.site.register(models.Student)
 admin.site.register(models.Mentor)
 admin.site.register(models.StudentCourse)
 admin.site.register(models.LearningPath)
+admin.site.register(models.CourseStats)
+admin.site.register(models.CourseDailyStats)
 admin.site.register(models.Message)
 admin.site.register(models.Notification)
-admin.site.register(models.Newsletter)
\ No newline at end of file
+admin.site.register(models.Newsletter)
+admin.site.register(models.NewsletterCampaign)
+admin.site.register(models.Task)
@@ -0,0 +1,171 @@
+"""
+Course analytics rollups.
+
+CourseStats holds one row per course with its enrollment funnel (counts
+per status, mentored vs free, summed progress) and CourseDailyStats one
+row per course and day with new enrollments and completions. Reports read
+only these tables. MentorLoad counts each mentor's active (enrolled or in
+progress) mentored students, for mentor matching.
+
+They are kept current incrementally: every StudentCourse change is turned
+into the difference between its old and new contribution, which is added
+to the affected rows with F() updates. Model saves and deletes are caught
+by the signals in signals.py. Bulk writers that skip signals (bulk_enroll,
+progress.apply) call record_many() themselves. ``manage.py
+rebuild_course_stats`` recomputes everything from StudentCourse.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import models
+
+
+STATUSES = [status for status, _ in models.StudentCourse.STATUS_CHOICES]
+
+ACTIVE_STATUSES = ['enrolled', 'in_progress']
+
+REQUIRED_FIELDS = ('course_id', 'status', 'enrollment_type', 'progress', 'enrollment_date')
+
+NULLABLE_FIELDS = ('completed_date', 'mentor_id')
+
+
+def state(enrollment):
+    """
+    The fields of a StudentCourse that feed the rollups, or None if any of
+    them were deferred. Reads __dict__ so deferred fields aren't fetched.
+    """
+    values = enrollment.__dict__
+    if (any(values.get(field) is None for field in REQUIRED_FIELDS)
+            or any(field not in values for field in NULLABLE_FIELDS)):
+        return None
+    return {field: values[field] for field in REQUIRED_FIELDS + NULLABLE_FIELDS}
+
+
+def saved_state(enrollment_id):
+    """Like state(), for the row as stored; None if there is none"""
+    return models.StudentCourse.objects.filter(pk=enrollment_id).values(
+        *REQUIRED_FIELDS, *NULLABLE_FIELDS,
+    ).first()
+
+
+def _contribution(snapshot, sign, course_deltas, daily_deltas, mentor_deltas):
+    course = course_deltas[snapshot['course_id']]
+    course[snapshot['status']] += sign
+    course['mentored' if snapshot['enrollment_type'] == 'mentored' else 'free'] += sign
+    course['progress_sum'] += sign * snapshot['progress']
+    day = timezone.localdate(snapshot['enrollment_date'])
+    daily_deltas[snapshot['course_id'], day]['enrollments'] += sign
+    if snapshot['status'] == 'completed' and snapshot['completed_date']:
+        day = timezone.localdate(snapshot['completed_date'])
+        daily_deltas[snapshot['course_id'], day]['completions'] += sign
+    if snapshot['mentor_id'] and snapshot['status'] in ACTIVE_STATUSES:
+        mentor_deltas[snapshot['mentor_id']] += sign
+
+
+def increment(model, lookup, delta):
+    """Add delta to the row matching lookup, creating it if needed"""
+    changes = {field: F(field) + value for field, value in delta.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **delta)
+    except IntegrityError:
+        # Created concurrently since the UPDATE
+        model.objects.filter(**lookup).update(**changes)
+
+
+def record_many(changes):
+    """
+    Apply a list of (old_state, new_state) pairs, either of which may be
+    None for a created or deleted enrollment. The deltas are summed first,
+    so a batch costs one UPDATE per course and day touched.
+    """
+    course_deltas = defaultdict(Counter)
+    daily_deltas = defaultdict(Counter)
+    mentor_deltas = Counter()
+    for old, new in changes:
+        if old is not None:
+            _contribution(old, -1, course_deltas, daily_deltas, mentor_deltas)
+        if new is not None:
+            _contribution(new, 1, course_deltas, daily_deltas, mentor_deltas)
+    with transaction.atomic():
+        for course_id, delta in course_deltas.items():
+            delta = {field: value for field, value in delta.items() if value}
+            if delta:
+                increment(models.CourseStats, {'course_id': course_id}, delta)
+        for (course_id, day), delta in daily_deltas.items():
+            delta = {field: value for field, value in delta.items() if value}
+            if delta:
+                increment(models.CourseDailyStats, {'course_id': course_id, 'date': day}, delta)
+        for mentor_id, delta in mentor_deltas.items():
+            if delta:
+                increment(models.MentorLoad, {'mentor_id': mentor_id}, {'active_students': delta})
+
+
+def record(old, new):
+    record_many([(old, new)])
+
+
+def rebuild(course_ids=None):
+    """Recompute the rollups from StudentCourse, for some courses or all; return rows written"""
+    enrollments = models.StudentCourse.objects.all()
+    course_stats = models.CourseStats.objects.all()
+    daily_stats = models.CourseDailyStats.objects.all()
+    if course_ids is not None:
+        enrollments = enrollments.filter(course_id__in=course_ids)
+        course_stats = course_stats.filter(course_id__in=course_ids)
+        daily_stats = daily_stats.filter(course_id__in=course_ids)
+
+    counts = {status: Count('id', filter=Q(status=status)) for status in STATUSES}
+    totals = enrollments.values('course_id').order_by().annotate(
+        mentored=Count('id', filter=Q(enrollment_type='mentored')),
+        free=Count('id', filter=~Q(enrollment_type='mentored')),
+        progress_sum=Sum('progress'),
+        **counts,
+    )
+    enrolled_by_day = (
+        enrollments.annotate(day=TruncDate('enrollment_date'))
+        .values('course_id', 'day').order_by().annotate(n=Count('id'))
+    )
+    completed_by_day = (
+        enrollments.filter(status='completed', completed_date__isnull=False)
+        .annotate(day=TruncDate('completed_date'))
+        .values('course_id', 'day').order_by().annotate(n=Count('id'))
+    )
+    # A mentor's load spans courses, so recount every course of the
+    # mentors involved
+    active = models.StudentCourse.objects.filter(mentor__isnull=False, status__in=ACTIVE_STATUSES)
+    mentor_loads = models.MentorLoad.objects.all()
+    if course_ids is not None:
+        mentor_ids = enrollments.filter(mentor__isnull=False).values('mentor_id')
+        active = active.filter(mentor_id__in=mentor_ids)
+        mentor_loads = mentor_loads.filter(mentor_id__in=mentor_ids)
+    loads = active.values('mentor_id').order_by().annotate(active_students=Count('id'))
+
+    daily = defaultdict(Counter)
+    for row in enrolled_by_day:
+        daily[row['course_id'], row['day']]['enrollments'] += row['n']
+    for row in completed_by_day:
+        daily[row['course_id'], row['day']]['completions'] += row['n']
+
+    with transaction.atomic():
+        course_stats.delete()
+        daily_stats.delete()
+        mentor_loads.delete()
+        mentors = models.MentorLoad.objects.bulk_create([
+            models.MentorLoad(**row) for row in loads
+        ], batch_size=1000)
+        rows = models.CourseStats.objects.bulk_create([
+            models.CourseStats(**row) for row in totals
+        ], batch_size=1000)
+        days = models.CourseDailyStats.objects.bulk_create([
+            models.CourseDailyStats(course_id=course_id, date=day, **delta)
+            for (course_id, day), delta in daily.items()
+        ], batch_size=1000)
+    return len(rows) + len(days) + len(mentors)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class SchoolappConfig(AppConfig):
     name = 'schoolApp'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,376 @@
+"""
+Synthetic data and per-view budgets for benchmarking.
+
+seed() fills a scratch database with a realistic dataset using
+bulk_create (manage.py seed_benchmark). run() then requests every named
+URL in schoolApp/urls.py through the test client, logged in as the
+declared role, and measures query count, DB time, template render time
+and p50/p99 latency (manage.py bench_views). Each URL must have an entry
+in BUDGETS; a view that goes over its budget, answers with an unexpected
+status or has no budget is reported as a violation.
+
+Render time is the time spent in top-level Template.render calls, so it
+includes queries run lazily from templates.
+"""
+
+import itertools
+import math
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import F
+from django.template.base import Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import analytics, catalog, models, querycache, recommendations, search, urls
+
+
+SEED_DOMAIN = 'bench.example.com'
+
+TOPICS = [
+    'Python', 'Django', 'Data Science', 'Machine Learning', 'Web Design', 'SQL', 'Statistics', 'Photography',
+    'Creative Writing', 'Marketing', 'Music Theory', 'Algebra', 'Biology', 'Spanish', 'Drawing', 'Accounting',
+]
+LEVELS = ['Basics', 'Fundamentals', 'in Practice', 'Workshop', 'Masterclass', 'for Professionals']
+
+
+def _log(message):
+    pass
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def seed(courses=10000, students=100000, mentors=1000, enrollments=1000000, messages=100000,
+         notifications=100000, batch_size=5000, random_seed=0, log=_log):
+    """
+    Create the dataset with bulk_create and refresh everything derived from
+    it (rollups, recommendations, search index, catalog cache). Meant for
+    an empty database; return the number of rows created per model.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    created = {}
+
+    def bulk(model, objects):
+        rows = []
+        for batch in _batches(objects, batch_size):
+            rows.extend(model.objects.bulk_create(batch))
+        created[model.__name__] = len(rows)
+        log(f'{len(rows)} {model.__name__}')
+        return rows
+
+    mentor_rows = bulk(models.Mentor, (
+        models.Mentor(
+            first_name='Mentor', last_name=str(i), email=f'mentor{i}@{SEED_DOMAIN}', phone_number='555-0000',
+            password='!', expertise=', '.join(rng.sample(TOPICS, 2)),
+        )
+        for i in range(mentors)
+    ))
+    # Mentors teach as the Instructor with their email, as in mentor_create_course_view
+    instructor_rows = bulk(models.Instructor, (
+        models.Instructor(first_name=m.first_name, last_name=m.last_name, email=m.email, phone_number=m.phone_number)
+        for m in mentor_rows
+    ))
+    course_rows = bulk(models.Course, (
+        models.Course(
+            title=f'{rng.choice(TOPICS)} {rng.choice(LEVELS)} {i}',
+            description='A synthetic course for benchmarking. ' * 5,
+            instructor=rng.choice(instructor_rows),
+            start_date=now.date(),
+            end_date=now.date(),
+            course_type=rng.choice(['free', 'paid', 'both']),
+            price=rng.choice([0, 49, 99]),
+            duration_weeks=rng.randint(2, 12),
+        )
+        for i in range(courses)
+    ))
+    student_rows = bulk(models.Student, (
+        models.Student(
+            first_name='Student', last_name=str(i), email=f'student{i}@{SEED_DOMAIN}',
+            phone_number='555-0001', password='!',
+        )
+        for i in range(students)
+    ))
+
+    # A few popular courses and a long tail
+    course_ids = [course.id for course in course_rows]
+    student_ids = [student.id for student in student_rows]
+    mentor_ids = [mentor.id for mentor in mentor_rows]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(course_ids))))
+    enrollments = min(enrollments, len(course_ids) * len(student_ids))
+    seen = set()
+    mentored = []
+    while len(seen) < enrollments:
+        want = min(batch_size, enrollments - len(seen))
+        pairs = zip(rng.choices(student_ids, k=want), rng.choices(course_ids, cum_weights=cum_weights, k=want))
+        batch = []
+        for pair in pairs:
+            if pair in seen:
+                continue
+            seen.add(pair)
+            status = rng.choices(['enrolled', 'in_progress', 'completed', 'dropped'], [40, 35, 20, 5])[0]
+            progress = {'enrolled': 0, 'completed': 100}.get(status, rng.randint(10, 90))
+            mentor_id = rng.choice(mentor_ids) if rng.random() < 0.2 else None
+            batch.append(models.StudentCourse(
+                student_id=pair[0], course_id=pair[1], status=status, progress=progress,
+                enrollment_type='mentored' if mentor_id else 'free', mentor_id=mentor_id,
+                completed_date=now if status == 'completed' else None,
+            ))
+        rows = models.StudentCourse.objects.bulk_create(batch)
+        models.LearningPath.objects.bulk_create([
+            models.LearningPath(
+                student_course_id=row.id, total_lessons=10, completed_lessons=row.progress // 10,
+                average_score=rng.uniform(50, 100) if row.progress else 0,
+                scored_lessons=row.progress // 10,
+            )
+            for row in rows
+        ])
+        mentored.extend((row.id, row.student_id, row.mentor_id) for row in rows if row.mentor_id)
+    created['StudentCourse'] = created['LearningPath'] = len(seen)
+    log(f'{len(seen)} StudentCourse and LearningPath')
+
+    if mentored:
+        def message(i):
+            enrollment_id, student_id, mentor_id = rng.choice(mentored)
+            from_student = rng.random() < 0.5
+            return models.Message(
+                sender_student_id=student_id if from_student else None,
+                sender_mentor_id=None if from_student else mentor_id,
+                receiver_student_id=None if from_student else student_id,
+                receiver_mentor_id=mentor_id if from_student else None,
+                student_course_id=enrollment_id,
+                subject=f'Question {i}', body='A synthetic message. ' * 3, is_read=rng.random() < 0.7,
+            )
+        bulk(models.Message, (message(i) for i in range(messages)))
+
+    def notification(i):
+        for_student = rng.random() < 0.8
+        return models.Notification(
+            student_id=rng.choice(student_ids) if for_student else None,
+            mentor_id=None if for_student else rng.choice(mentor_ids),
+            notification_type=rng.choice(['course_update', 'progress_alert', 'course_added', 'enrollment']),
+            title=f'Notification {i}', message='A synthetic notification.',
+            related_course_id=rng.choice(course_ids), is_read=rng.random() < 0.7,
+        )
+    bulk(models.Notification, (notification(i) for i in range(notifications)))
+
+    log('Rebuilding course rollups, recommendations and search index')
+    analytics.rebuild()
+    recommendations.rebuild()
+    search.rebuild()
+    catalog.invalidate()
+    for model in querycache.MODELS:
+        querycache.invalidate(model)
+    return created
+
+
+# Per-view budgets, by URL name. role logs the client in as the seeded
+# student or mentor; method and data describe the request; status is the
+# expected response status. queries is the most a warm request may run,
+# so an N+1 shows up as soon as the seeded data has more than one row;
+# the timing limits are for the full seed_benchmark dataset. Missing keys
+# come from DEFAULT_BUDGET.
+DEFAULT_BUDGET = {
+    'role': None,
+    'method': 'get',
+    'data': None,
+    'status': 200,
+    'db_ms': 50,
+    'p99_ms': 250,
+}
+
+BUDGETS = {
+    # Cached pages (page_cache, catalog)
+    'home': {'queries': 0},
+    'school': {'queries': 0},
+    'about': {'queries': 0},
+    'readmore': {'queries': 0},
+    'login': {'queries': 0},
+    'register': {'queries': 0},
+    'logout': {'status': 302, 'queries': 0},
+    'instructor': {'queries': 0},
+    'classes': {'queries': 0},
+    'certificate': {'queries': 0},
+    'books': {'queries': 0},
+    # Student pages
+    'dashboard': {'role': 'student', 'queries': 1},
+    'learning_center': {'role': 'student', 'queries': 1},
+    'course_detail': {'role': 'student', 'queries': 4},
+    'enroll_course': {'role': 'student', 'queries': 4},
+    'student_dashboard': {'role': 'student', 'queries': 4},
+    'send_message': {'role': 'student', 'queries': 3},
+    # Mentor pages
+    'mentor_dashboard': {'role': 'mentor', 'queries': 5},
+    'mentor_create_course': {'role': 'mentor', 'queries': 2},
+    'mentor_course_list': {'role': 'mentor', 'queries': 2},
+    'mentor_course_analytics': {'role': 'mentor', 'queries': 3},
+    'mentor_progress_export': {'role': 'mentor', 'queries': 2, 'p99_ms': 500},
+    'mentor_student_progress': {'role': 'mentor', 'queries': 2},
+    # Newsletter
+    'newsletter_signup': {'method': 'post', 'data': lambda: {'email': f'{uuid.uuid4().hex}@{SEED_DOMAIN}'},
+                          'queries': 6},
+    'newsletter_unsubscribe': {'status': 302, 'queries': 1},
+    # API
+    'api_session': {'role': 'student', 'method': 'post', 'queries': 1},
+    'api_login': {'method': 'post', 'data': {'email': f'nobody@{SEED_DOMAIN}', 'password': 'x', 'role': 'student'},
+                  'status': 401, 'queries': 1},
+    'course_search': {'data': {'q': 'python'}, 'queries': 2},
+    'api_bulk_enroll': {'role': 'mentor', 'method': 'post', 'data': {'student_ids': []}, 'queries': 2},
+    'api_message_thread': {'role': 'student', 'queries': 3},
+    'event_stream': {'role': 'student', 'queries': 1},
+    'api_lesson_progress': {'role': 'student', 'method': 'post', 'data': {'events': []}, 'queries': 1},
+    'api_unread_counts': {'role': 'student', 'queries': 1},
+    'api_mark_messages_read': {'role': 'student', 'method': 'post', 'data': {'ids': []}, 'queries': 1},
+    'api_mark_notifications_read': {'role': 'student', 'method': 'post', 'data': {'ids': []}, 'queries': 1},
+    'api_cache_stats': {'role': 'mentor', 'queries': 1},
+}
+
+
+def fixtures():
+    """
+    Users and ids to request the URLs with: the mentor with the most active
+    students, one of their students and that student's enrollment with
+    them, and the mentor's most popular course.
+    """
+    load = models.MentorLoad.objects.order_by('-active_students').select_related('mentor').first()
+    mentor = load.mentor if load else models.Mentor.objects.order_by('id').first()
+    enrollment = (
+        models.StudentCourse.objects.filter(mentor=mentor).select_related('student').order_by('id').first()
+        or models.StudentCourse.objects.select_related('student').order_by('id').first()
+    )
+    course = (
+        models.Course.objects.filter(instructor__email=mentor.email)
+        .order_by((F('stats__enrolled') + F('stats__in_progress')).desc(nulls_last=True))
+        .first()
+    )
+    return {
+        'student': enrollment.student,
+        'mentor': mentor,
+        'course_id': (course or enrollment.course).id,
+        'enrollment_id': enrollment.id,
+        'email': enrollment.student.email,
+    }
+
+
+def _client(role, fixtures):
+    client = Client()
+    if role:
+        user = fixtures[role]
+        session = client.session
+        session.update({
+            'user_id': user.id,
+            'user_role': role,
+            'user_name': f'{user.first_name} {user.last_name}',
+            'logged_in': True,
+        })
+        session.save()
+    return client
+
+
+@contextmanager
+def _timing_renders(durations):
+    """Append the duration of each top-level template render to durations"""
+    original = Template.render
+    depth = 0
+
+    def render(self, context):
+        nonlocal depth
+        depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            depth -= 1
+            if not depth:
+                durations.append(time.perf_counter() - start)
+
+    Template.render = render
+    try:
+        yield
+    finally:
+        Template.render = original
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(client, method, path, data, repeat):
+    """Request path repeat times after one warm-up request; return the measurements"""
+    def request():
+        payload = data() if callable(data) else data
+        if method == 'get':
+            response = client.get(path, payload, secure=True)
+        else:
+            response = client.post(path, payload or {}, content_type='application/json', secure=True)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    request()
+    results = []
+    for _ in range(repeat):
+        renders = []
+        with CaptureQueriesContext(connection) as queries, _timing_renders(renders):
+            start = time.perf_counter()
+            response = request()
+            elapsed = time.perf_counter() - start
+        results.append({
+            'status': response.status_code,
+            'queries': len(queries),
+            'db': sum(float(query['time']) for query in queries.captured_queries),
+            'render': sum(renders),
+            'total': elapsed,
+        })
+    totals = [result['total'] for result in results]
+    return {
+        'status': results[-1]['status'],
+        'queries': max(result['queries'] for result in results),
+        'db_ms': statistics.median(result['db'] for result in results) * 1000,
+        'render_ms': statistics.median(result['render'] for result in results) * 1000,
+        'p50_ms': statistics.median(totals) * 1000,
+        'p99_ms': _percentile(totals, 0.99) * 1000,
+    }
+
+
+def run(repeat=20, names=None, timings=True):
+    """
+    Measure every named URL of schoolApp (or only names) and return one
+    result dict per URL, with a list of budget violations in each.
+    timings=False checks only status and query counts.
+    """
+    data = fixtures()
+    results = []
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        if names and pattern.name not in names:
+            continue
+        result = {'name': pattern.name, 'violations': []}
+        results.append(result)
+        if pattern.name not in BUDGETS:
+            result['violations'].append('no budget declared')
+            continue
+        budget = {**DEFAULT_BUDGET, **BUDGETS[pattern.name]}
+        path = reverse(pattern.name, kwargs={key: data[key] for key in pattern.pattern.converters})
+        result.update(measure(_client(budget['role'], data), budget['method'], path, budget['data'], repeat))
+
+        if result['status'] != budget['status']:
+            result['violations'].append(f"status {result['status']}, expected {budget['status']}")
+        checks = ['queries', 'db_ms', 'p99_ms'] if timings else ['queries']
+        for check in checks:
+            if result[check] > budget[check]:
+                result['violations'].append(f'{check} {result[check]:.0f} > {budget[check]}')
+    return results
@@ -0,0 +1,148 @@
+"""
+Bulk newsletter sending.
+
+A NewsletterCampaign is mailed to every active subscriber in id order. The
+subscribers are streamed with iterator() rather than loaded at once, and
+each batch of NEWSLETTER_BATCH_SIZE messages goes out over one SMTP
+connection. After each batch the campaign's resume cursor is saved, so a
+crashed run continues with the next batch; at worst the batch in flight at
+the time of the crash is sent twice. NEWSLETTER_SEND_RATE caps messages
+per second to stay under the mail provider's limits.
+
+Messages go over the connection one at a time so each outcome is known: a
+refused address counts as failed and the batch carries on. If the
+connection is lost, the rest of the batch is retried once over a new one;
+if that fails too, the cursor stops after the last subscriber dealt with
+and the error is raised, so the next run starts with the first one that
+was never attempted.
+"""
+
+import smtplib
+import time
+
+from django.conf import settings
+from django.core import mail
+from django.utils import timezone
+
+from . import models
+
+
+def create(subject, body):
+    return models.NewsletterCampaign.objects.create(subject=subject, body=body)
+
+
+# The server refused this one message; the connection is still usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)
+
+CONNECT_ATTEMPTS = 2
+
+
+def _deliver(connection, batch):
+    """
+    Send (subscriber_id, message) pairs over an open connection, one at a
+    time. Return (sent, failed, handled, error): handled pairs were sent or
+    refused, and error is what stopped the rest, if anything.
+    """
+    sent = failed = 0
+    for handled, (subscriber_id, message) in enumerate(batch):
+        try:
+            connection.send_messages([message])
+        except MESSAGE_ERRORS:
+            failed += 1
+        except OSError as error:
+            # Lost the connection (SMTPException is an OSError too)
+            return sent, failed, handled, error
+        else:
+            sent += 1
+    return sent, failed, len(batch), None
+
+
+def _send_batch(campaign, batch, connection_kwargs):
+    sent = failed = handled = 0
+    error = None
+    for attempt in range(CONNECT_ATTEMPTS):
+        connection = mail.get_connection(**connection_kwargs)
+        try:
+            connection.open()
+        except OSError as e:
+            error = e
+            continue
+        try:
+            batch_sent, batch_failed, batch_handled, error = _deliver(connection, batch[handled:])
+        finally:
+            try:
+                connection.close()
+            except OSError:
+                pass
+        sent += batch_sent
+        failed += batch_failed
+        handled += batch_handled
+        if error is None:
+            break
+    # Never move past a subscriber whose message wasn't attempted
+    if handled:
+        campaign.last_subscriber_id = batch[handled - 1][0]
+    campaign.sent += sent
+    campaign.failed += failed
+    campaign.status = 'running'
+    campaign.save(update_fields=['last_subscriber_id', 'sent', 'failed', 'status'])
+    if handled < len(batch):
+        raise error
+    return sent
+
+
+def send(campaign_id, batch_size=None, rate=None, **connection_kwargs):
+    """
+    Send a campaign to completion, resuming after its last saved batch.
+    Return the number of messages sent by this call. Extra keyword
+    arguments are passed to get_connection() (e.g. host and port). Raise
+    the connection error if the mail server can't be reached.
+    """
+    batch_size = batch_size or settings.NEWSLETTER_BATCH_SIZE
+    rate = settings.NEWSLETTER_SEND_RATE if rate is None else rate
+    campaign = models.NewsletterCampaign.objects.get(id=campaign_id)
+    if campaign.status == 'done':
+        return 0
+
+    subscribers = (
+        models.Newsletter.objects
+        .filter(is_active=True, id__gt=campaign.last_subscriber_id)
+        .order_by('id')
+        .values_list('id', 'email')
+        .iterator(chunk_size=batch_size)
+    )
+    total = attempted = 0
+    batch = []
+    started = time.monotonic()
+    for subscriber_id, email in subscribers:
+        batch.append((subscriber_id, mail.EmailMessage(
+            subject=campaign.subject,
+            body=campaign.body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+        )))
+        if len(batch) < batch_size:
+            continue
+        total += _send_batch(campaign, batch, connection_kwargs)
+        attempted += len(batch)
+        batch = []
+        if rate:
+            # Sleep off whatever the batch finished ahead of schedule
+            delay = started + attempted / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    if batch:
+        total += _send_batch(campaign, batch, connection_kwargs)
+
+    campaign.status = 'done'
+    campaign.finished_at = timezone.now()
+    campaign.save(update_fields=['status', 'finished_at'])
+    return total
+
+
+def send_pending(batch_size=None, rate=None, **connection_kwargs):
+    """Run every unfinished campaign, oldest first"""
+    total = 0
+    for campaign_id in models.NewsletterCampaign.objects.exclude(status='done').values_list('id', flat=True):
+        total += send(campaign_id, batch_size, rate, **connection_kwargs)
+    return total
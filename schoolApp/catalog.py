@@ -0,0 +1,107 @@
+"""
+Course catalog shared by the classes and learning center pages.
+
+Pages are fetched with keyset pagination on (-created_at, -id), which
+matches Course.Meta.ordering and stays as cheap on page 100 as on page 1,
+and carry their instructor via select_related. Each page is cached under a
+catalog version number; saving or deleting a Course or Instructor bumps the
+version (see signals.py) so stale pages are never served again.
+"""
+
+import base64
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+
+from . import models, replica
+
+
+VERSION_KEY = 'catalog:version'
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed with the clock so an evicted counter never reuses an old version
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """Make every cached catalog page stale"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def encode_cursor(course):
+    raw = f'{course.created_at.isoformat()}|{course.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor, or None if it is missing or invalid"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, course_id = raw.split('|')
+        return datetime.datetime.fromisoformat(created_at), int(course_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def get_page(cursor=None, page_size=None):
+    """
+    Return {'courses': [...], 'next_cursor': str or None, 'total': int}
+    for the page starting after cursor.
+    """
+    page_size = page_size or settings.COURSE_CATALOG_PAGE_SIZE
+    position = decode_cursor(cursor)
+    # Cache under the canonical cursor, never the raw query string
+    start = f'{position[0].isoformat()}|{position[1]}' if position else 'first'
+    version = _version()
+    key = f'catalog:{version}:{page_size}:{start}'
+
+    page = cache.get(key)
+    if page is None:
+        courses = models.Course.objects.select_related('instructor').order_by('-created_at', '-id')
+        if position:
+            created_at, course_id = position
+            courses = courses.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=course_id)
+            )
+        with replica.primary():
+            rows = list(courses[:page_size + 1])
+        page = {
+            'courses': rows[:page_size],
+            'next_cursor': encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None,
+            'total': count(version),
+        }
+        cache.set(key, page, settings.COURSE_CATALOG_CACHE_TIMEOUT)
+    return page
+
+
+def stamp(version=None):
+    """
+    Return {'total': int, 'last_modified': datetime or None} for the whole
+    catalog, cached alongside the pages. Both come from the database, so
+    every worker computes the same values.
+    """
+    key = f'catalog:{version or _version()}:stamp'
+    value = cache.get(key)
+    if value is None:
+        with replica.primary():
+            value = models.Course.objects.aggregate(total=Count('id'), last_modified=Max('updated_at'))
+        cache.set(key, value, settings.COURSE_CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+def count(version=None):
+    """Number of courses in the catalog"""
+    return stamp(version)['total']
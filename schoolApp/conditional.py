@@ -0,0 +1,92 @@
+"""
+ETag validators for the catalog and course pages.
+
+Used with django.views.decorators.http.condition so a repeat visit gets a
+304 without rendering the template. Each ETag covers the data the page
+shows plus the session state that changes the navbar. Pages with pending
+flash messages never validate, since the 304 would swallow the message.
+
+There is no Last-Modified: logging in or out, or enrolling, changes the
+page without touching Course.updated_at, so an If-Modified-Since check
+would answer with a stale 304.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import OuterRef, Subquery
+
+from . import catalog, models
+
+
+def _make_etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _viewer_state(request):
+    """Session values rendered by navbar.html and the page headers"""
+    session = request.session
+    return (
+        session.get('logged_in', ''),
+        session.get('user_id', ''),
+        session.get('user_role', ''),
+        session.get('user_name', ''),
+    )
+
+
+def _has_messages(request):
+    return len(messages.get_messages(request)) > 0
+
+
+def catalog_etag(request):
+    if _has_messages(request):
+        return None
+    stamp = catalog.stamp()
+    return _make_etag(
+        'catalog', stamp['total'], stamp['last_modified'],
+        request.GET.get('cursor', ''), *_viewer_state(request),
+    )
+
+
+def learning_center_etag(request):
+    # Logged-out visitors get redirected; never answer them with a 304
+    if 'user_id' not in request.session:
+        return None
+    return catalog_etag(request)
+
+
+def _course_state(request, course_id):
+    """
+    One query for everything course_detail.html shows: the course, its
+    instructor and the student's enrollment.
+    """
+    courses = models.Course.objects.filter(id=course_id).values(
+        'updated_at',
+        'instructor__first_name', 'instructor__last_name',
+        'instructor__email', 'instructor__phone_number',
+    )
+    if request.session.get('user_role') == 'student' and 'user_id' in request.session:
+        enrollment = models.StudentCourse.objects.filter(
+            course=OuterRef('pk'), student_id=request.session.get('user_id')
+        )
+        courses = courses.annotate(
+            enrollment_id=Subquery(enrollment.values('id')[:1]),
+            enrollment_status=Subquery(enrollment.values('status')[:1]),
+            enrollment_type=Subquery(enrollment.values('enrollment_type')[:1]),
+            enrollment_mentor=Subquery(enrollment.values('mentor_id')[:1]),
+        )
+    return courses.first()
+
+
+def course_detail_etag(request, course_id):
+    if _has_messages(request):
+        return None
+    state = _course_state(request, course_id)
+    if state is None:
+        return None
+    return _make_etag(
+        'course', course_id, *sorted(state.items()), *_viewer_state(request),
+        # The enrollment form embeds a CSRF token tied to this cookie
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    )
@@ -0,0 +1,147 @@
+"""
+Enrolling students in courses.
+
+enroll() writes the StudentCourse and its LearningPath in one transaction
+and lets unique_together('student', 'course') reject duplicates, instead
+of checking first and racing a concurrent request. bulk_enroll() does the
+same for thousands of students at a time with bulk_create.
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import analytics, models, tasks
+
+
+DEFAULT_TOTAL_LESSONS = 10
+
+
+class AlreadyEnrolled(Exception):
+    pass
+
+
+class MentorNotFound(Exception):
+    pass
+
+
+def enroll(student_id, course_id, enrollment_type='free', mentor_id=None):
+    """
+    Enroll a student and notify the mentor once it commits. Raise
+    AlreadyEnrolled or MentorNotFound instead of writing anything.
+    """
+    try:
+        with transaction.atomic():
+            # Foreign keys are only checked at commit, which may be an outer
+            # transaction's, so look the mentor up rather than rely on them
+            if mentor_id and not models.Mentor.objects.filter(id=mentor_id).exists():
+                raise MentorNotFound
+            enrollment = models.StudentCourse.objects.create(
+                student_id=student_id,
+                course_id=course_id,
+                enrollment_type=enrollment_type,
+                mentor_id=mentor_id,
+                status='enrolled',
+            )
+            models.LearningPath.objects.create(student_course=enrollment, total_lessons=DEFAULT_TOTAL_LESSONS)
+            if mentor_id:
+                # In this process, so open event streams get it pushed
+                transaction.on_commit(partial(tasks.notify_enrollment, enrollment.id), robust=True)
+    except IntegrityError:
+        if models.StudentCourse.objects.filter(student_id=student_id, course_id=course_id).exists():
+            raise AlreadyEnrolled
+        raise
+    return enrollment
+
+
+def bulk_enroll(course_id, student_ids, enrollment_type='free', mentor_id=None, batch_size=None, invalid=None):
+    """
+    Enroll many students in a course, skipping those already enrolled.
+    student_ids may be any iterable; it is consumed batch_size at a time.
+    Ids with no Student are skipped and, if invalid is a list, appended
+    to it. Return the number of new enrollments.
+    """
+    batch_size = batch_size or settings.BULK_ENROLL_BATCH_SIZE
+    created = 0
+    batch = []
+    for student_id in student_ids:
+        batch.append(student_id)
+        if len(batch) >= batch_size:
+            created += _enroll_batch(course_id, batch, enrollment_type, mentor_id, invalid)
+            batch = []
+    if batch:
+        created += _enroll_batch(course_id, batch, enrollment_type, mentor_id, invalid)
+    return created
+
+
+def _enroll_batch(course_id, student_ids, enrollment_type, mentor_id, invalid):
+    student_ids = list(dict.fromkeys(student_ids))
+    with transaction.atomic():
+        # An unknown id would only fail the foreign key at commit, taking the batch with it
+        known = set(models.Student.objects.filter(id__in=student_ids).values_list('id', flat=True))
+        if invalid is not None:
+            invalid.extend(student_id for student_id in student_ids if student_id not in known)
+        enrolled = set(
+            models.StudentCourse.objects
+            .filter(course_id=course_id, student_id__in=known)
+            .values_list('student_id', flat=True)
+        )
+        new_ids = [student_id for student_id in student_ids if student_id in known and student_id not in enrolled]
+        # ignore_conflicts covers students enrolled concurrently since the SELECT
+        models.StudentCourse.objects.bulk_create([
+            models.StudentCourse(
+                student_id=student_id,
+                course_id=course_id,
+                enrollment_type=enrollment_type,
+                mentor_id=mentor_id,
+                status='enrolled',
+            )
+            for student_id in new_ids
+        ], ignore_conflicts=True)
+        # ignore_conflicts returns no primary keys, so look the new rows up
+        missing_paths = (
+            models.StudentCourse.objects
+            .filter(course_id=course_id, student_id__in=new_ids, learning_path__isnull=True)
+            .values_list('id', flat=True)
+        )
+        paths = models.LearningPath.objects.bulk_create([
+            models.LearningPath(student_course_id=enrollment_id, total_lessons=DEFAULT_TOTAL_LESSONS)
+            for enrollment_id in missing_paths
+        ], ignore_conflicts=True)
+        # bulk_create sends no signals; feed the rollups directly
+        new_state = {
+            'course_id': course_id, 'mentor_id': mentor_id, 'status': 'enrolled', 'enrollment_type': enrollment_type,
+            'progress': 0, 'enrollment_date': timezone.now(), 'completed_date': None,
+        }
+        analytics.record_many([(None, new_state)] * len(paths))
+    return len(paths)
+
+
+def resolve_students(keys, batch_size=None, invalid=None):
+    """
+    Yield student ids for an iterable of student ids and/or emails, looking
+    the emails up batch_size at a time. Unknown emails are skipped and, if
+    invalid is a list, appended to it; ids are checked by bulk_enroll.
+    """
+    batch_size = batch_size or settings.BULK_ENROLL_BATCH_SIZE
+    emails = []
+    for key in keys:
+        key = str(key).strip()
+        if key.isdigit():
+            yield int(key)
+        elif key:
+            emails.append(key.lower())
+            if len(emails) >= batch_size:
+                yield from _lookup_emails(emails, invalid)
+                emails = []
+    if emails:
+        yield from _lookup_emails(emails, invalid)
+
+
+def _lookup_emails(emails, invalid):
+    found = dict(models.Student.objects.filter(email__in=emails).values_list('email', 'id'))
+    if invalid is not None:
+        invalid.extend(email for email in dict.fromkeys(emails) if email not in found)
+    return found.values()
@@ -0,0 +1,100 @@
+"""
+In-process pub/sub for pushing new messages and notifications to browsers.
+
+Each open /events/ stream subscribes an asyncio.Queue for its student or
+mentor. Saving a Message or Notification publishes to the receiver's queues
+once the transaction commits (see signals.py). Publishers may run in a sync
+worker thread, so delivery goes through the subscriber's event loop.
+
+Only streams served by the same process are reached; run the ASGI server
+with a single worker process, or put a shared broker in front of publish()
+before scaling out. Enrollment and message notifications are written in
+the request's on_commit, so they are pushed. Course-update notifications
+are not: process_fanouts writes them with bulk_create in another process,
+and open streams see them in the unread counts sent on reconnect.
+Under WSGI there are no subscribers and publish() is a no-op.
+"""
+
+import asyncio
+import json
+import threading
+
+
+_subscribers = {}
+_lock = threading.Lock()
+
+
+class Subscription:
+    """One open stream's queue; use as a context manager to unsubscribe on exit"""
+
+    def __init__(self, role, user_id, maxsize):
+        self.key = (role, user_id)
+        self.queue = asyncio.Queue(maxsize)
+        self.loop = asyncio.get_running_loop()
+
+    def __enter__(self):
+        with _lock:
+            _subscribers.setdefault(self.key, set()).add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _lock:
+            subscribers = _subscribers.get(self.key)
+            if subscribers is not None:
+                subscribers.discard(self)
+                if not subscribers:
+                    del _subscribers[self.key]
+
+    def deliver(self, event):
+        # A client that stopped reading loses events rather than memory
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+
+def subscribe(role, user_id, maxsize=100):
+    return Subscription(role, user_id, maxsize)
+
+
+def subscriber_count():
+    with _lock:
+        return sum(len(subscribers) for subscribers in _subscribers.values())
+
+
+def publish(role, user_id, event):
+    """Send an event dict to every open stream of one student or mentor"""
+    if user_id is None:
+        return
+    with _lock:
+        subscribers = list(_subscribers.get((role, user_id), ()))
+    for subscription in subscribers:
+        try:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+        except RuntimeError:
+            # The stream's loop has shut down
+            pass
+
+
+def format_event(event):
+    """Encode an event dict as a Server-Sent Events frame"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def message_event(message):
+    return {
+        'type': 'message',
+        'id': message.id,
+        'enrollment_id': message.student_course_id,
+        'subject': message.subject,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+def notification_event(notification):
+    return {
+        'type': 'notification',
+        'id': notification.id,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'created_at': notification.created_at.isoformat(),
+    }
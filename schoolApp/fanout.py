@@ -0,0 +1,93 @@
+"""
+Batched delivery of course_update notifications to every enrollee.
+
+Saving a course only records a NotificationFanout row. The process_fanouts
+command (or any worker that calls process_pending) then walks the course's
+StudentCourse rows in id order, FANOUT_BATCH_SIZE at a time, and writes the
+notifications with bulk_create. Each batch and the fanout's resume cursor
+are committed together, so a crashed run picks up after the last committed
+batch without duplicating or skipping anyone.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import inbox, models
+
+
+def enqueue_course_update(course):
+    """Queue a course_update notification for all of the course's students"""
+    # Several saves in a row only need one announcement
+    if models.NotificationFanout.objects.filter(
+        course=course, notification_type='course_update', status='pending', last_enrollment_id=0,
+    ).exists():
+        return None
+    return models.NotificationFanout.objects.create(
+        course=course,
+        notification_type='course_update',
+        title=f'Course Updated: {course.title}',
+        message=f'{course.title} has been updated. Check the course page for the latest content.',
+    )
+
+
+def process_batch(fanout_id, batch_size=None):
+    """
+    Deliver the next batch for one fanout. Return the number of
+    notifications written, or 0 once the fanout is finished.
+    """
+    batch_size = batch_size or settings.FANOUT_BATCH_SIZE
+    with transaction.atomic():
+        # Lock the job so two workers never deliver the same batch
+        fanout = models.NotificationFanout.objects.select_for_update().get(id=fanout_id)
+        if fanout.status == 'done':
+            return 0
+
+        batch = list(
+            models.StudentCourse.objects
+            .filter(course_id=fanout.course_id, id__gt=fanout.last_enrollment_id)
+            .exclude(status='dropped')
+            .order_by('id')
+            .values_list('id', 'student_id')[:batch_size]
+        )
+        if not batch:
+            fanout.status = 'done'
+            fanout.finished_at = timezone.now()
+            fanout.save(update_fields=['status', 'finished_at'])
+            return 0
+
+        models.Notification.objects.bulk_create([
+            models.Notification(
+                student_id=student_id,
+                notification_type=fanout.notification_type,
+                title=fanout.title,
+                message=fanout.message,
+                related_course_id=fanout.course_id,
+            )
+            for _, student_id in batch
+        ])
+        # bulk_create skips post_save, so refresh the badges here
+        inbox.invalidate_many('student', [student_id for _, student_id in batch])
+        fanout.last_enrollment_id = batch[-1][0]
+        fanout.delivered += len(batch)
+        fanout.status = 'running'
+        fanout.save(update_fields=['last_enrollment_id', 'delivered', 'status'])
+        return len(batch)
+
+
+def process(fanout_id, batch_size=None):
+    """Deliver a fanout to completion; return how many notifications were written"""
+    total = 0
+    while True:
+        written = process_batch(fanout_id, batch_size)
+        if not written:
+            return total
+        total += written
+
+
+def process_pending(batch_size=None):
+    """Run every unfinished fanout, oldest first"""
+    total = 0
+    for fanout_id in models.NotificationFanout.objects.exclude(status='done').values_list('id', flat=True):
+        total += process(fanout_id, batch_size)
+    return total
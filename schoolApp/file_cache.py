@@ -0,0 +1,70 @@
+"""
+Sharded file-based cache backend.
+
+Django's FileBasedCache lists its whole directory on every write to see
+whether it holds MAX_ENTRIES files yet: ~0.5ms at 100 files, ~30ms at
+20k. ShardedFileCache spreads the keys over SHARDS FileBasedCaches in
+subdirectories of LOCATION, each capped at MAX_ENTRIES / SHARDS, so a
+write only lists its own shard. Like FileBasedCache it is shared by every
+worker on the host and keeps the session-activity writes off the database.
+
+incr() holds a lock file in the shard while it reads and rewrites the
+value, so workers bumping the same version counter (catalog.invalidate,
+querycache.invalidate) never lose a bump.
+"""
+
+import os
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+class ShardedFileCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        shards = options.get('SHARDS', 64)
+        shard_params = {**params, 'OPTIONS': {**options, 'MAX_ENTRIES': max(1, self._max_entries // shards)}}
+        self._dirs = [os.path.join(location, f'{i:02x}') for i in range(shards)]
+        self._shards = [FileBasedCache(directory, shard_params) for directory in self._dirs]
+
+    def _index(self, key):
+        return zlib.crc32(str(key).encode()) % len(self._shards)
+
+    def _shard(self, key):
+        return self._shards[self._index(key)]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._shard(key).add(key, value, timeout, version)
+
+    def get(self, key, default=None, version=None):
+        return self._shard(key).get(key, default, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._shard(key).set(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._shard(key).touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        return self._shard(key).delete(key, version)
+
+    def has_key(self, key, version=None):
+        return self._shard(key).has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        # FileBasedCache.incr is a get then a set; serialize them across processes
+        directory = self._dirs[self._index(key)]
+        os.makedirs(directory, 0o700, exist_ok=True)
+        with open(os.path.join(directory, 'incr.lock'), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                return self._shards[self._index(key)].incr(key, delta, version)
+            finally:
+                locks.unlock(lock)
+
+    def clear(self):
+        for shard in self._shards:
+            shard.clear()
@@ -0,0 +1,85 @@
+"""
+Bounded process pool for password hashing.
+
+PBKDF2 is deliberately slow, and running it inline means a burst of logins
+ties up every thread of a worker. Student/Mentor.set_password and
+check_password hand the work to a small process pool instead. At most
+PASSWORD_HASHING_WORKERS hashes run at once and PASSWORD_HASHING_QUEUE_DEPTH
+more may wait; past that HashingBusy is raised straight away so the view can
+answer 503 with a Retry-After header instead of piling up requests.
+
+Setting PASSWORD_HASHING_WORKERS to 0 hashes inline as before.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def make_pool(workers):
+    """A process pool whose workers can run Django's hashers"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        # Don't fork a threaded server process; start clean workers.
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'projectSchools.settings'),),
+    )
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.PASSWORD_HASHING_WORKERS
+            _executor = make_pool(workers)
+            _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASHING_QUEUE_DEPTH)
+    return _executor, _slots
+
+
+def _run(func, *args):
+    if not getattr(settings, 'PASSWORD_HASHING_WORKERS', 0):
+        return func(*args)
+
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = executor.submit(func, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda f: slots.release())
+    return future.result()
+
+
+def retry_after():
+    """Seconds clients should wait before retrying after HashingBusy"""
+    return getattr(settings, 'PASSWORD_HASHING_RETRY_AFTER', 5)
+
+
+def make_password(raw_password):
+    return _run(hashers.make_password, raw_password)
+
+
+def check_password(raw_password, encoded):
+    return _run(hashers.check_password, raw_password, encoded)
@@ -0,0 +1,263 @@
+"""
+Bulk loading of students, mentors and courses from CSV or JSONL files.
+
+Rows are streamed from the file and handled IMPORT_BATCH_SIZE at a time,
+so memory stays flat however large the file is. Users are checked with
+the same rules as register_view; rows whose email is already registered
+are skipped before their passwords are hashed, the rest are hashed in a
+process pool and inserted with bulk_create(ignore_conflicts=True) so a
+concurrent sign-up never fails the batch. Courses are inserted the same
+way and the catalog cache and search index are refreshed at the end,
+since bulk_create sends no post_save signals.
+
+Each importer takes an iterable of (line_number, row dict), as produced
+by read_rows(), and reports bad rows through on_error(line_number, message).
+"""
+
+import csv
+import datetime
+import decimal
+import json
+import sys
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.dateparse import parse_date
+
+from . import catalog, models, querycache, search, validation
+
+
+USER_MODELS = {'student': models.Student, 'mentor': models.Mentor}
+
+COURSE_TYPES = [choice for choice, _ in models.Course.COURSE_TYPE_CHOICES]
+
+
+def read_rows(path, fmt=None):
+    """
+    Yield (line_number, row) from a CSV file with a header row or a JSONL
+    file, guessing the format from the extension. '-' reads stdin.
+    """
+    fmt = fmt or ('jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv')
+    f = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield number, row
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _batches(rows, size):
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(row, field):
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+
+def _ignore(line, message):
+    pass
+
+
+def _user_fields(row, default_role):
+    """Return (role, fields, error) for one input row"""
+    if not isinstance(row, dict):
+        return None, None, 'Not a JSON object'
+    role = (_text(row, 'role') or default_role or '').lower()
+    password = '' if row.get('password') is None else str(row['password'])
+    confirm_password = password if row.get('confirm_password') is None else str(row['confirm_password'])
+    fields = {
+        'first_name': _text(row, 'first_name'),
+        'last_name': _text(row, 'last_name'),
+        'email': _text(row, 'email'),
+        'phone_number': _text(row, 'phone_number'),
+        'password': password,
+    }
+    error = validation.registration_error(
+        fields['first_name'], fields['last_name'], fields['email'], fields['phone_number'],
+        password, confirm_password, role,
+    )
+    if role == 'mentor':
+        fields['expertise'] = _text(row, 'expertise') or None
+    return role, fields, error
+
+
+def import_users(rows, role=None, batch_size=None, pool=None, on_error=_ignore):
+    """
+    Create students and mentors from rows; role comes from each row's
+    'role' column, falling back to the role argument. Hashes run on pool
+    (a hashing.make_pool() executor) if given. Return counts of rows read,
+    users created, rows skipped as already registered and invalid rows.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    stats = {'rows': 0, 'created': 0, 'existing': 0, 'invalid': 0}
+    for batch in _batches(rows, batch_size):
+        by_role = {'student': {}, 'mentor': {}}
+        for line, row in batch:
+            stats['rows'] += 1
+            row_role, fields, error = _user_fields(row, role)
+            if error:
+                stats['invalid'] += 1
+                on_error(line, error)
+            elif fields['email'] in by_role[row_role]:
+                stats['existing'] += 1
+            else:
+                by_role[row_role][fields['email']] = fields
+
+        for row_role, users in by_role.items():
+            if not users:
+                continue
+            model = USER_MODELS[row_role]
+            # Don't spend a hash on anyone who is already registered
+            registered = set(model.objects.filter(email__in=list(users)).values_list('email', flat=True))
+            new_users = [fields for email, fields in users.items() if email not in registered]
+            stats['existing'] += len(registered)
+
+            passwords = [fields.pop('password') for fields in new_users]
+            if pool is not None:
+                hashed = pool.map(hashers.make_password, passwords, chunksize=max(1, len(passwords) // 32))
+            else:
+                hashed = map(hashers.make_password, passwords)
+            hashed = list(hashed)
+            model.objects.bulk_create(
+                [model(password=password, **fields) for fields, password in zip(new_users, hashed)],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts drops rows registered meanwhile without saying
+            # which; only the rows we inserted carry our (salted) hashes
+            ours = {fields['email']: password for fields, password in zip(new_users, hashed)}
+            created = sum(
+                1 for email, password in model.objects.filter(email__in=list(ours)).values_list('email', 'password')
+                if ours[email] == password
+            )
+            stats['created'] += created
+            stats['existing'] += len(new_users) - created
+            if created and model is models.Mentor:
+                # bulk_create sends no signals
+                querycache.invalidate(models.Mentor)
+    return stats
+
+
+def _course_fields(row):
+    """Return (fields, instructor_email, error) for one input row"""
+    if not isinstance(row, dict):
+        return None, None, 'Not a JSON object'
+    title = _text(row, 'title')
+    description = _text(row, 'description')
+    instructor_email = _text(row, 'instructor_email')
+    start_date = _text(row, 'start_date')
+    end_date = _text(row, 'end_date')
+    # Same required fields as mentor_create_course_view
+    if not all([title, description, start_date, end_date, instructor_email]):
+        return None, None, 'Please fill in all required fields'
+    if len(title) > models.Course._meta.get_field('title').max_length:
+        return None, None, 'Title is too long'
+    try:
+        fields = {
+            'title': title,
+            'description': description,
+            'start_date': parse_date(start_date),
+            'end_date': parse_date(end_date),
+            'course_type': _text(row, 'course_type') or 'both',
+            'price': decimal.Decimal(_text(row, 'price') or 0),
+            'duration_weeks': int(_text(row, 'duration_weeks') or 4),
+            'content': _text(row, 'content') or None,
+        }
+    except (ValueError, decimal.InvalidOperation):
+        return None, None, 'Invalid date, price or duration'
+    if not isinstance(fields['start_date'], datetime.date) or not isinstance(fields['end_date'], datetime.date):
+        return None, None, 'Dates must be YYYY-MM-DD'
+    if fields['course_type'] not in COURSE_TYPES:
+        return None, None, 'Invalid course type'
+    if fields['course_type'] == 'free':
+        fields['price'] = 0
+    return fields, instructor_email, None
+
+
+def _instructors(emails):
+    """
+    Map instructor email to id, creating Instructor rows for mentors who
+    have none yet, as mentor_create_course_view does.
+    """
+    found = dict(models.Instructor.objects.filter(email__in=emails).values_list('email', 'id'))
+    missing = [email for email in emails if email not in found]
+    if missing:
+        models.Instructor.objects.bulk_create([
+            models.Instructor(
+                first_name=mentor.first_name, last_name=mentor.last_name,
+                email=mentor.email, phone_number=mentor.phone_number,
+            )
+            for mentor in models.Mentor.objects.filter(email__in=missing)
+        ], ignore_conflicts=True)
+        # bulk_create sends no signals
+        querycache.invalidate(models.Instructor)
+        found.update(models.Instructor.objects.filter(email__in=missing).values_list('email', 'id'))
+    return found
+
+
+def import_courses(rows, batch_size=None, on_error=_ignore):
+    """
+    Create courses from rows, each naming its instructor by email. A course
+    whose instructor already has one with the same title is skipped, so a
+    file can be re-imported safely. Return the same counts as import_users.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    stats = {'rows': 0, 'created': 0, 'existing': 0, 'invalid': 0}
+    for batch in _batches(rows, batch_size):
+        parsed = []
+        for line, row in batch:
+            stats['rows'] += 1
+            fields, instructor_email, error = _course_fields(row)
+            if error:
+                stats['invalid'] += 1
+                on_error(line, error)
+            else:
+                parsed.append((line, fields, instructor_email))
+        if not parsed:
+            continue
+
+        instructors = _instructors({email for _, _, email in parsed})
+        existing = set(
+            models.Course.objects
+            .filter(instructor_id__in=instructors.values(), title__in={fields['title'] for _, fields, _ in parsed})
+            .values_list('instructor_id', 'title')
+        )
+        courses = []
+        for line, fields, instructor_email in parsed:
+            instructor_id = instructors.get(instructor_email)
+            if instructor_id is None:
+                stats['invalid'] += 1
+                on_error(line, f'Unknown instructor {instructor_email}')
+            elif (instructor_id, fields['title']) in existing:
+                stats['existing'] += 1
+            else:
+                existing.add((instructor_id, fields['title']))
+                courses.append(models.Course(instructor_id=instructor_id, **fields))
+        models.Course.objects.bulk_create(courses)
+        stats['created'] += len(courses)
+
+    if stats['created']:
+        # bulk_create sends no signals
+        catalog.invalidate()
+        querycache.invalidate(models.Course)
+        search.rebuild()
+    return stats
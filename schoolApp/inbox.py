@@ -0,0 +1,69 @@
+"""
+Unread message and notification counters.
+
+Dashboards show unread badges on every load, so the counts are cached per
+user (INBOX_COUNTS_TIMEOUT seconds) and dropped whenever a Message or
+Notification for that user is saved or deleted (see signals.py), marked
+read here, or bulk-created (callers pass the ids to invalidate_many). On a
+miss the counts come from the (receiver, is_read) indexes.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import models, replica
+
+
+# role -> (Message receiver field, Notification owner field)
+RECEIVER_FIELDS = {
+    'student': ('receiver_student_id', 'student_id'),
+    'mentor': ('receiver_mentor_id', 'mentor_id'),
+}
+
+
+def _key(role, user_id):
+    return f'inbox:{role}:{user_id}'
+
+
+def unread_counts(role, user_id):
+    """Return {'messages': int, 'notifications': int} for a student or mentor"""
+    key = _key(role, user_id)
+    counts = cache.get(key)
+    if counts is None:
+        message_field, notification_field = RECEIVER_FIELDS[role]
+        with replica.primary():
+            counts = {
+                'messages': models.Message.objects.filter(
+                    **{message_field: user_id, 'is_read': False}).count(),
+                'notifications': models.Notification.objects.filter(
+                    **{notification_field: user_id, 'is_read': False}).count(),
+            }
+        cache.set(key, counts, settings.INBOX_COUNTS_TIMEOUT)
+    return counts
+
+
+def invalidate(role, user_id):
+    if user_id is not None:
+        cache.delete(_key(role, user_id))
+
+
+def invalidate_many(role, user_ids):
+    cache.delete_many([_key(role, user_id) for user_id in set(user_ids)])
+
+
+def mark_read(kind, role, user_id, ids=None):
+    """
+    Mark the user's unread messages or notifications as read with a single
+    UPDATE, optionally limited to the given ids. Return the number changed.
+    """
+    message_field, notification_field = RECEIVER_FIELDS[role]
+    if kind == 'messages':
+        rows = models.Message.objects.filter(**{message_field: user_id, 'is_read': False})
+    else:
+        rows = models.Notification.objects.filter(**{notification_field: user_id, 'is_read': False})
+    if ids is not None:
+        rows = rows.filter(id__in=ids)
+    updated = rows.update(is_read=True)
+    if updated:
+        invalidate(role, user_id)
+    return updated
@@ -0,0 +1,69 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from schoolApp import fanout, models
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure course_update fanout throughput on synthetic enrollments (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--crash-after', type=int, default=0,
+                            help='Stop after this many batches, then resume, to check nothing is lost')
+
+    def handle(self, *args, **options):
+        total = options['enrollments']
+        try:
+            with transaction.atomic():
+                course = self.seed(total)
+                job = fanout.enqueue_course_update(course)
+
+                if options['crash_after']:
+                    for _ in range(options['crash_after']):
+                        fanout.process_batch(job.id, options['batch_size'])
+                    job.refresh_from_db()
+                    self.stdout.write(f'Simulated crash after {job.delivered} rows, resuming')
+
+                start = time.perf_counter()
+                resumed = fanout.process(job.id, options['batch_size'])
+                elapsed = time.perf_counter() - start
+
+                job.refresh_from_db()
+                written = models.Notification.objects.filter(
+                    related_course=course, notification_type='course_update'
+                ).count()
+                self.stdout.write(
+                    f'{written} notifications for {total} enrollments ({job.delivered} delivered), '
+                    f'{resumed} rows in {elapsed:.2f}s, {resumed / elapsed:.0f} rows/s'
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, total):
+        instructor = models.Instructor.objects.create(
+            first_name='Bench', last_name='Fanout', email='bench-fanout@example.com', phone_number='0')
+        course = models.Course.objects.create(
+            title='Fanout Benchmark', description='Synthetic', instructor=instructor,
+            start_date=datetime.date.today(), end_date=datetime.date.today())
+        students = models.Student.objects.bulk_create([
+            models.Student(first_name='S', last_name=str(i), email=f'bench-fanout-{i}@example.com',
+                           phone_number='0', password='!')
+            for i in range(total)
+        ], batch_size=5000)
+        if students[0].id is None:
+            students = models.Student.objects.filter(email__startswith='bench-fanout-')
+        models.StudentCourse.objects.bulk_create([
+            models.StudentCourse(student_id=student.id, course=course, enrollment_type='free')
+            for student in students
+        ], batch_size=5000)
+        return course
@@ -0,0 +1,117 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand
+
+from schoolApp import models
+
+
+BENCH_EMAIL = 'bench-login-storm@example.com'
+BENCH_PASSWORD = 'bench-password'
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive a login storm against a running server and measure login throughput and '
+        'the latency of an unrelated page. Run it once against a server started with '
+        'PASSWORD_HASHING_WORKERS=0 and once with the pool enabled, e.g. '
+        '"gunicorn projectSchools.wsgi -w 1 --threads 8".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--page', default='/schoolApp/about/', help='Unrelated page to time')
+        parser.add_argument('--login-threads', type=int, default=16)
+        parser.add_argument('--page-threads', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+
+    def handle(self, *args, **options):
+        student = models.Student.objects.filter(email=BENCH_EMAIL).first()
+        if student is None:
+            student = models.Student(first_name='Bench', last_name='Storm',
+                                     email=BENCH_EMAIL, phone_number='000')
+            student.set_password(BENCH_PASSWORD)
+            student.save()
+
+        base = options['base_url'].rstrip('/')
+        page_url = base + options['page']
+        login_url = base + '/schoolApp/api/login/'
+        duration = options['duration']
+
+        quiet = self.run_phase(page_url, login_url, options['page_threads'], 0, duration)
+        storm = self.run_phase(page_url, login_url, options['page_threads'],
+                               options['login_threads'], duration)
+
+        for name, result in (('quiet', quiet), ('storm', storm)):
+            pages = result['pages']
+            self.stdout.write(
+                f"{name:6} page p50 {_percentile(pages, 50) * 1000:7.1f}ms  "
+                f"p99 {_percentile(pages, 99) * 1000:7.1f}ms  "
+                f"({len(pages) / duration:.1f} pages/s)"
+            )
+        logins = storm['logins']
+        self.stdout.write(
+            f"storm  logins {logins.get(200, 0) / duration:.1f}/s ok, "
+            f"{logins.get(503, 0) / duration:.1f}/s rejected with 503, "
+            f"other {sum(v for k, v in logins.items() if k not in (200, 503))}"
+        )
+        if storm['logins_latency']:
+            self.stdout.write(
+                f"storm  login p50 {statistics.median(storm['logins_latency']) * 1000:.1f}ms  "
+                f"p99 {_percentile(storm['logins_latency'], 99) * 1000:.1f}ms"
+            )
+
+    def run_phase(self, page_url, login_url, page_threads, login_threads, duration):
+        deadline = time.monotonic() + duration
+        lock = threading.Lock()
+        result = {'pages': [], 'logins': {}, 'logins_latency': []}
+        body = json.dumps({'email': BENCH_EMAIL, 'password': BENCH_PASSWORD,
+                           'role': 'student'}).encode()
+
+        def fetch_pages():
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    urllib.request.urlopen(page_url, timeout=30).read()
+                except urllib.error.URLError:
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    result['pages'].append(elapsed)
+
+        def storm_logins():
+            while time.monotonic() < deadline:
+                request = urllib.request.Request(
+                    login_url, data=body, headers={'Content-Type': 'application/json'})
+                start = time.perf_counter()
+                try:
+                    status = urllib.request.urlopen(request, timeout=30).status
+                except urllib.error.HTTPError as e:
+                    status = e.code
+                except urllib.error.URLError:
+                    status = None
+                elapsed = time.perf_counter() - start
+                with lock:
+                    result['logins'][status] = result['logins'].get(status, 0) + 1
+                    if status == 200:
+                        result['logins_latency'].append(elapsed)
+
+        threads = [threading.Thread(target=fetch_pages) for _ in range(page_threads)]
+        threads += [threading.Thread(target=storm_logins) for _ in range(login_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
@@ -0,0 +1,73 @@
+import datetime
+from importlib import import_module
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'schoolApp.session_store',
+]
+
+
+class Command(BaseCommand):
+    help = 'Count django_session writes per request for the plain db and the coalescing session engines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per engine')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Simulated seconds between two requests of the same user')
+        parser.add_argument('--path', default='/schoolApp/about/', help='Page to request')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        self.stdout.write(
+            f"{total} requests to {options['path']}, one every {options['interval']}s, "
+            f"flush window {getattr(settings, 'SESSION_ACTIVITY_FLUSH_WINDOW', 0)}s"
+        )
+        for engine in ENGINES:
+            writes = self.run_engine(engine, options['path'], total, options['interval'])
+            self.stdout.write(
+                f'{engine:40} {writes:6} writes  {writes / total:.3f} writes/request'
+            )
+
+    def run_engine(self, engine, path, total, interval):
+        clock = {'now': timezone.now()}
+
+        def fake_now():
+            return clock['now']
+
+        with override_settings(SESSION_ENGINE=engine, ALLOWED_HOSTS=['*']), \
+                mock.patch('django.utils.timezone.now', side_effect=fake_now):
+            store = import_module(engine).SessionStore()
+            store.update({
+                'user_id': 0,
+                'user_role': 'student',
+                'user_name': 'Bench User',
+                'logged_in': True,
+                'last_activity': fake_now().isoformat(),
+            })
+            store.create()
+
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+            writes = 0
+            try:
+                for _ in range(total):
+                    clock['now'] += datetime.timedelta(seconds=interval)
+                    with CaptureQueriesContext(connection) as ctx:
+                        client.get(path, secure=True)
+                    writes += sum(
+                        1 for q in ctx.captured_queries
+                        if 'django_session' in q['sql']
+                        and q['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT'))
+                    )
+            finally:
+                store.delete()
+        return writes
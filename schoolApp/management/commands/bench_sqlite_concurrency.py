@@ -0,0 +1,168 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from schoolApp import models
+
+
+BENCH_EMAIL = 'bench-sqlite@example.com'
+BENCH_DOMAIN = 'bench-sqlite.example.com'
+
+PROFILES = [('plain', '0'), ('tuned', '1')]
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Start gunicorn with several workers on this SQLite database, once with the plain and once with the '
+        'tuned profile (SQLITE_TUNING), and drive both with concurrent newsletter signups and logged-in page '
+        'views that each write their session. Reports throughput, latency and failed requests per profile. '
+        'The server speaks plain HTTP, so run with DEBUG=True to skip the HTTPS redirect.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+        parser.add_argument('--writers', type=int, default=8, help='Client threads posting newsletter signups')
+        parser.add_argument('--readers', type=int, default=8, help='Client threads loading the dashboard')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark is for SQLite databases')
+        student = models.Student.objects.filter(email=BENCH_EMAIL).first()
+        if student is None:
+            student = models.Student.objects.create(
+                first_name='Bench', last_name='SQLite', email=BENCH_EMAIL, phone_number='000', password='!')
+        sessions = self.create_sessions(student, options['readers'])
+        base = f"http://127.0.0.1:{options['port']}"
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        try:
+            for name, tuning in PROFILES:
+                if tuning == '0':
+                    # WAL mode is stored in the database file; start the plain run without it
+                    with connection.cursor() as cursor:
+                        cursor.execute('PRAGMA journal_mode = DELETE')
+                connection.close()
+                server = self.start_server(options['workers'], options['port'], tuning)
+                try:
+                    result = self.run_phase(base, sessions, options['writers'], options['duration'])
+                finally:
+                    server.terminate()
+                    server.wait()
+                self.report(name, result, options['duration'])
+        finally:
+            # The tuned run leaves the file in WAL mode
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+            store_class = import_module(settings.SESSION_ENGINE).SessionStore
+            for session_key in sessions:
+                store_class(session_key).delete()
+            models.Newsletter.objects.filter(email__endswith=f'@{BENCH_DOMAIN}').delete()
+            models.Task.objects.filter(name='send_welcome_email', payload__email__endswith=f'@{BENCH_DOMAIN}').delete()
+
+    def create_sessions(self, student, count):
+        keys = []
+        for _ in range(count):
+            store = import_module(settings.SESSION_ENGINE).SessionStore()
+            store.update({
+                'user_id': student.id,
+                'user_role': 'student',
+                'user_name': 'Bench SQLite',
+                'logged_in': True,
+            })
+            store.create()
+            keys.append(store.session_key)
+        return keys
+
+    def start_server(self, workers, port, tuning):
+        env = dict(
+            os.environ,
+            SQLITE_TUNING=tuning,
+            # Every logged-in request writes its session
+            SESSION_ACTIVITY_FLUSH_WINDOW='0',
+        )
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'projectSchools.wsgi', '-w', str(workers),
+             '-b', f'127.0.0.1:{port}', '--log-level', 'warning'],
+            env=env, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/schoolApp/about/', timeout=5).read()
+                return server
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('gunicorn did not start; is it installed?')
+
+    def run_phase(self, base, sessions, writers, duration):
+        deadline = time.monotonic() + duration
+        lock = threading.Lock()
+        result = {'writes': [], 'reads': [], 'errors': {}}
+
+        def request(kind, req):
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(req, timeout=60).read()
+                status = 200
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except (urllib.error.URLError, ConnectionError):
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status is not None and status < 400:
+                    result[kind].append(elapsed)
+                else:
+                    result['errors'][status] = result['errors'].get(status, 0) + 1
+
+        def write():
+            while time.monotonic() < deadline:
+                body = json.dumps({'email': f'{uuid.uuid4().hex}@{BENCH_DOMAIN}'}).encode()
+                request('writes', urllib.request.Request(
+                    f'{base}/schoolApp/newsletter/signup/', data=body, headers={'Content-Type': 'application/json'}))
+
+        def read(session_key):
+            cookie = f'{settings.SESSION_COOKIE_NAME}={session_key}'
+            while time.monotonic() < deadline:
+                request('reads', urllib.request.Request(f'{base}/schoolApp/dashboard/', headers={'Cookie': cookie}))
+
+        threads = [threading.Thread(target=write) for _ in range(writers)]
+        threads += [threading.Thread(target=read, args=(key,)) for key in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def report(self, name, result, duration):
+        for kind in ('writes', 'reads'):
+            samples = result[kind]
+            self.stdout.write(
+                f'{name:6} {kind:6} {len(samples) / duration:7.1f}/s ok  '
+                f'p50 {_percentile(samples, 50) * 1000:7.1f}ms  p99 {_percentile(samples, 99) * 1000:7.1f}ms'
+            )
+        errors = ', '.join(f'{count} x {status}' for status, count in result['errors'].items())
+        self.stdout.write(f"{name:6} failed {sum(result['errors'].values())} {f'({errors})' if errors else ''}")
@@ -0,0 +1,38 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment
+
+from schoolApp import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Request every schoolApp URL and fail if any goes over its budget in schoolApp.benchmark.BUDGETS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only these URL names (default: all)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per URL, after one warm-up')
+        parser.add_argument('--queries-only', action='store_true',
+                            help="Only check query counts and statuses, not this machine's timings")
+
+    def handle(self, *args, **options):
+        # Allows the test client's host and keeps emails in memory
+        setup_test_environment()
+        # Expected 4xx responses would otherwise be logged on every request
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        results = benchmark.run(options['repeat'], options['names'], timings=not options['queries_only'])
+
+        columns = ['queries', 'db_ms', 'render_ms', 'p50_ms', 'p99_ms']
+        self.stdout.write(f"{'view':<30} {'status':>6} " + ' '.join(f'{column:>9}' for column in columns))
+        for result in results:
+            line = f"{result['name']:<30} {result.get('status', '-'):>6} " + ' '.join(
+                f'{result[column]:>9.1f}' if column in result else f"{'-':>9}" for column in columns
+            )
+            if result['violations']:
+                line = self.style.ERROR(line + '  ' + '; '.join(result['violations']))
+            self.stdout.write(line)
+
+        over = [result['name'] for result in results if result['violations']]
+        if over:
+            raise CommandError(f"{len(over)} of {len(results)} views over budget: {', '.join(over)}")
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} views within budget'))
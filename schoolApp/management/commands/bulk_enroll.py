@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schoolApp import enrollment, models
+
+
+class Command(BaseCommand):
+    help = 'Enroll many students in a course at once, skipping those already enrolled'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('--file', help='One student id or email per line; "-" reads stdin')
+        parser.add_argument('--all', action='store_true', help='Enroll every student')
+        parser.add_argument('--enrollment-type', choices=['free', 'mentored'], default='free')
+        parser.add_argument('--mentor', type=int, default=None, help='Mentor id for mentored enrollments')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not models.Course.objects.filter(id=options['course_id']).exists():
+            raise CommandError(f"Course {options['course_id']} not found")
+        if options['mentor'] and not models.Mentor.objects.filter(id=options['mentor']).exists():
+            raise CommandError(f"Mentor {options['mentor']} not found")
+
+        invalid = []
+        if options['all']:
+            students = models.Student.objects.order_by('id').values_list('id', flat=True).iterator()
+        elif options['file']:
+            lines = sys.stdin if options['file'] == '-' else open(options['file'])
+            students = enrollment.resolve_students(lines, options['batch_size'], invalid)
+        else:
+            raise CommandError('Pass --file or --all')
+
+        start = time.perf_counter()
+        created = enrollment.bulk_enroll(
+            options['course_id'], students, options['enrollment_type'], options['mentor'], options['batch_size'],
+            invalid,
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Enrolled {created} students in {elapsed:.2f}s ({created / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
+        if invalid:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {len(invalid)} unknown students: {', '.join(str(key) for key in invalid[:20])}"
+                + (' ...' if len(invalid) > 20 else '')
+            ))
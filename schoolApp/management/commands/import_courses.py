@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from schoolApp import importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Create courses from a CSV (with header) or JSONL file. Columns: title, description, '
+        'instructor_email, start_date, end_date, and optionally course_type, price, duration_weeks, content.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import; "-" reads stdin')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def report_error(self, line, message):
+        self.stderr.write(f'line {line}: {message}')
+
+    def handle(self, *args, **options):
+        rows = importer.read_rows(options['path'], options['format'])
+        start = time.perf_counter()
+        stats = importer.import_courses(rows, options['batch_size'], self.report_error)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {stats['rows']} rows in {elapsed:.2f}s ({stats['rows'] / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{stats['created']} created, {stats['existing']} already present, {stats['invalid']} invalid"
+        ))
@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from schoolApp import hashing, importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Create students and mentors from a CSV (with header) or JSONL file. Columns: first_name, '
+        'last_name, email, phone_number, password, and optionally role, confirm_password, expertise.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import; "-" reads stdin')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None, help='Defaults to the file extension')
+        parser.add_argument('--role', choices=['student', 'mentor'], default=None, help='Role for rows without one')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Hashing processes; 0 hashes inline')
+
+    def report_error(self, line, message):
+        self.stderr.write(f'line {line}: {message}')
+
+    def handle(self, *args, **options):
+        rows = importer.read_rows(options['path'], options['format'])
+        start = time.perf_counter()
+        if options['workers']:
+            with hashing.make_pool(options['workers']) as pool:
+                stats = importer.import_users(rows, options['role'], options['batch_size'], pool, self.report_error)
+        else:
+            stats = importer.import_users(rows, options['role'], options['batch_size'], on_error=self.report_error)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {stats['rows']} rows in {elapsed:.2f}s ({stats['rows'] / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{stats['created']} created, {stats['existing']} already registered, {stats['invalid']} invalid"
+        ))
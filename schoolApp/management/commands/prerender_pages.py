@@ -0,0 +1,49 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from schoolApp import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Render the anonymous marketing pages to PAGE_CACHE_DIR and/or the page cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=None,
+                            help='Where to write the HTML (default: PAGE_CACHE_DIR)')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Also store the pages in the configured cache')
+        parser.add_argument('--no-files', action='store_true', help="Don't write HTML files")
+
+    def handle(self, *args, **options):
+        if options['output_dir']:
+            settings.PAGE_CACHE_DIR = options['output_dir']
+        factory = RequestFactory()
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+
+        for name in page_cache.PAGES:
+            path = reverse(name)
+            request = factory.get(path)
+            request.session = session_store()
+            # Render with the undecorated view so a stale cached copy isn't reused
+            view = resolve(path).func.__wrapped__
+            response = view(request)
+            if response.status_code != 200:
+                self.stderr.write(f'{path}: HTTP {response.status_code}, skipped')
+                continue
+
+            if not options['no_files']:
+                target = page_cache.prerendered_path(path)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(response.content)
+            if options['warm_cache']:
+                cache.set(
+                    page_cache.page_key(path, page_cache.navbar_state(request)),
+                    (response.content, response['Content-Type']),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+            self.stdout.write(f'{path}: {len(response.content)} bytes')
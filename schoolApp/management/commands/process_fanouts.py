@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from schoolApp import fanout
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued course_update notifications to every enrolled student'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new fanouts')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            written = fanout.process_pending(options['batch_size'])
+            if written:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'Wrote {written} notifications in {elapsed:.2f}s ({written / elapsed:.0f} rows/s)'
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['sleep'])
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from schoolApp import analytics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-course and per-day enrollment rollups from StudentCourse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Only rebuild these courses (default: all)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = analytics.rebuild(options['course_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {rows} rollup rows in {time.perf_counter() - start:.2f}s'
+        ))
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from schoolApp import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recompute the similar-courses table behind student recommendations from co-enrollment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, default=None, help='Similar courses stored per course')
+        parser.add_argument('--min-common', type=int, default=None, help='Fewest shared students for a pair to count')
+        parser.add_argument('--synthetic', type=int, default=0, metavar='ENROLLMENTS',
+                            help='Time the computation on this many random enrollments instead; nothing is written')
+        parser.add_argument('--courses', type=int, default=2000, help='Courses in the synthetic catalog')
+        parser.add_argument('--students', type=int, default=200000, help='Students in the synthetic data')
+
+    def handle(self, *args, **options):
+        if options['synthetic']:
+            return self.synthetic(options)
+        rows, timings = recommendations.rebuild(options['top_n'], options['min_common'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {rows} recommendations in {sum(timings.values()):.2f}s ('
+            + ', '.join(f'{phase} {seconds:.2f}s' for phase, seconds in timings.items()) + ')'
+        ))
+
+    def synthetic(self, options):
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        total = options['synthetic']
+        # A few popular courses and a long tail, like a real catalog
+        popularity = 1 / np.arange(1, options['courses'] + 1)
+        students = rng.integers(0, options['students'], total)
+        courses = rng.choice(options['courses'], size=total, p=popularity / popularity.sum())
+
+        start = time.perf_counter()
+        course_rows, _, _ = recommendations.similar_courses(
+            students, courses,
+            options['top_n'] or settings.RECOMMENDATION_SIMILAR_COURSES,
+            options['min_common'] or settings.RECOMMENDATION_MIN_COMMON_STUDENTS,
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(course_rows)} recommendations from {total} synthetic enrollments '
+            f'({options["students"]} students, {options["courses"]} courses) in {elapsed:.2f}s'
+        ))
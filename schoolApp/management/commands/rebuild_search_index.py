@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from schoolApp import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the course full-text search index (SQLite FTS5; Postgres maintains its own)'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        indexed = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} courses in {time.perf_counter() - start:.2f}s'
+        ))
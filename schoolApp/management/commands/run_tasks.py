@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from schoolApp import tasks
+
+
+def _run(task):
+    try:
+        return tasks.run(task)
+    finally:
+        # Each pool thread holds its own database connection
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (welcome emails, notifications) with retries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=None, help='Defaults to TASK_WORKER_THREADS')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new tasks')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or settings.TASK_WORKER_THREADS
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while True:
+                start = time.perf_counter()
+                succeeded = failed = 0
+                while True:
+                    # Claim a few per thread so a slow task doesn't hold up a large batch
+                    batch = tasks.claim(threads * 4)
+                    if not batch:
+                        break
+                    for ok in pool.map(_run, batch):
+                        if ok:
+                            succeeded += 1
+                        else:
+                            failed += 1
+                if succeeded or failed:
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f'Ran {succeeded + failed} tasks in {elapsed:.2f}s ({succeeded} ok, {failed} failed)'
+                    )
+                if not options['loop']:
+                    return
+                time.sleep(options['sleep'])
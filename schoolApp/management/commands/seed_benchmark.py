@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from schoolApp import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Fill an empty database with synthetic courses, students, enrollments and messages for bench_views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=10000)
+        parser.add_argument('--students', type=int, default=100000)
+        parser.add_argument('--mentors', type=int, default=1000)
+        parser.add_argument('--enrollments', type=int, default=1000000)
+        parser.add_argument('--messages', type=int, default=100000)
+        parser.add_argument('--notifications', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for a reproducible dataset')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = benchmark.seed(
+            courses=options['courses'],
+            students=options['students'],
+            mentors=options['mentors'],
+            enrollments=options['enrollments'],
+            messages=options['messages'],
+            notifications=options['notifications'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(created.values())} rows in {time.perf_counter() - start:.1f}s: '
+            + ', '.join(f'{count} {model}' for model, count in created.items())
+        ))
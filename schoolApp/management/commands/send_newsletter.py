@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schoolApp import campaigns
+
+
+class Command(BaseCommand):
+    help = (
+        'Send a newsletter to every active subscriber, or resume unfinished campaigns. '
+        'To test or benchmark against a local debugging server, run '
+        '"python -m aiosmtpd -n -l localhost:1025" and pass --smtp localhost:1025.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', help='Start a new campaign with this subject')
+        parser.add_argument('--body', help='Body of the new campaign')
+        parser.add_argument('--body-file', help='Read the body of the new campaign from a file')
+        parser.add_argument('--campaign', type=int, help='Resume only this campaign id')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--rate', type=float, default=None, help='Messages per second; 0 disables throttling')
+        parser.add_argument('--smtp', metavar='HOST:PORT', help='Send through this SMTP server instead of EMAIL_BACKEND')
+
+    def handle(self, *args, **options):
+        connection_kwargs = {}
+        if options['smtp']:
+            host, _, port = options['smtp'].rpartition(':')
+            connection_kwargs = {
+                'backend': 'django.core.mail.backends.smtp.EmailBackend',
+                'host': host or 'localhost',
+                'port': int(port),
+                'use_tls': False,
+            }
+
+        campaign_id = options['campaign']
+        if options['subject']:
+            body = options['body']
+            if options['body_file']:
+                with open(options['body_file']) as f:
+                    body = f.read()
+            if not body:
+                raise CommandError('A new campaign needs --body or --body-file')
+            campaign_id = campaigns.create(options['subject'], body).id
+            self.stdout.write(f'Created campaign {campaign_id}')
+
+        start = time.perf_counter()
+        try:
+            if campaign_id:
+                sent = campaigns.send(campaign_id, options['batch_size'], options['rate'], **connection_kwargs)
+            else:
+                sent = campaigns.send_pending(options['batch_size'], options['rate'], **connection_kwargs)
+        except OSError as e:
+            raise CommandError(f'Lost the mail server ({e}); run again to resume')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {sent} messages in {elapsed:.2f}s ({sent / elapsed if elapsed else 0:.0f} msg/s)'
+        ))
@@ -0,0 +1,55 @@
+"""
+Mentor suggestions for mentored enrollments.
+
+Mentors are ranked for a course by how many of the course title's
+keywords appear in their expertise, then by their current load, so that
+equally qualified mentors share new students instead of the first few in
+the list taking them all. Mentors at MENTOR_MAX_ACTIVE_STUDENTS come
+last. Loads are read from the MentorLoad rollup (see analytics.py)
+rather than counted per request, so ranking is one query over the mentor
+table however many enrollments there are.
+"""
+
+import re
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+
+from . import models
+
+
+STOPWORDS = {
+    'and', 'for', 'the', 'with', 'from', 'into', 'intro', 'introduction', 'course',
+    'basics', 'beginners', 'advanced', 'your', 'how', 'using',
+}
+
+
+def keywords(text):
+    """Distinct lowercase words of at least three letters, minus filler words"""
+    words = re.findall(r'[a-z0-9+#]{3,}', (text or '').lower())
+    return list(dict.fromkeys(word for word in words if word not in STOPWORDS))
+
+
+def rank(course):
+    """Mentors ordered best-first for course, annotated with expertise_match and active_students"""
+    expertise_match = Value(0, output_field=IntegerField())
+    for word in keywords(course.title):
+        expertise_match = expertise_match + Case(When(expertise__icontains=word, then=1), default=0)
+    return (
+        models.Mentor.objects
+        .annotate(
+            expertise_match=expertise_match,
+            active_students=Coalesce('load__active_students', 0),
+            at_capacity=Case(
+                When(load__active_students__gte=settings.MENTOR_MAX_ACTIVE_STUDENTS, then=1), default=0,
+            ),
+        )
+        .order_by('at_capacity', '-expertise_match', 'active_students', 'id')
+        .only('id', 'first_name', 'last_name', 'expertise')
+    )
+
+
+def suggest(course, limit=None):
+    """The top mentors for course; see rank()"""
+    return list(rank(course)[:limit or settings.MENTOR_MATCH_COUNT])
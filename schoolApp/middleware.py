@@ -1,6 +1,8 @@
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.conf import settings
 
 
 class SessionMiddleware(MiddlewareMixin):
@@ -42,8 +44,13 @@ class AutoLogoutMiddleware(MiddlewareMixin):
             if request.session.get('logged_in'):
                 from django.utils import timezone
                 import datetime as dt
+                from .session_store import get_flush_window
                 now = timezone.now()
                 timeout = dt.timedelta(seconds=1800)  # 30 minutes
+                # Workers that don't share the session cache may only see the
+                # last_activity flushed to the database, which can lag by up
+                # to the flush window. Allow for it so nobody is logged out early.
+                timeout += dt.timedelta(seconds=get_flush_window())
                 
                 if last_activity and (now - last_activity) > timeout:
                     # Session expired, log out
@@ -51,8 +58,51 @@ class AutoLogoutMiddleware(MiddlewareMixin):
                     messages.warning(request, 'Your session has expired. Please log in again.')
                     return redirect('/schoolApp/login/')
         
-        # Update last activity
-        from django.utils import timezone
-        request.session['last_activity'] = timezone.now().isoformat()
+        # Update last activity for logged-in users only, so anonymous visitors
+        # don't get a session row (and a database hit) for every page view.
+        # The event stream reconnects by itself, so it isn't activity: an open
+        # tab must not keep an idle user logged in forever
+        from django.urls import reverse
+        if request.session.get('logged_in') and request.path != reverse('event_stream'):
+            from django.utils import timezone
+            request.session['last_activity'] = timezone.now().isoformat()
         
         return None
+
+
+
+class EduUserMiddleware(MiddlewareMixin):
+    """
+    Attach the logged-in Student or Mentor to the request as request.edu_user
+    """
+    
+    def process_request(self, request):
+        """Resolve lazily, at most once per request, through the user cache"""
+        from .user_cache import get_edu_user
+        request.edu_user = SimpleLazyObject(lambda: get_edu_user(request))
+        return None
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """
+    Keep a user's reads on the primary database for a while after they write
+    """
+    
+    def process_request(self, request):
+        """Track this request's writes for the replica router"""
+        from . import replica
+        replica.begin(pinned=settings.REPLICA_PIN_COOKIE in request.COOKIES)
+        return None
+    
+    def process_response(self, request, response):
+        """Pin the user to the primary if this request wrote anything"""
+        from . import replica
+        if replica.end() and replica.configured():
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,51 @@
+from django.db import DatabaseError, migrations
+
+
+FTS_TABLE = 'schoolApp_course_fts'
+
+# Same expression as schoolApp.search.PG_VECTOR
+PG_VECTOR = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', description), 'B') || "
+    "setweight(to_tsvector('english', COALESCE(content, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS course_search_idx ON "schoolApp_course" USING GIN (({PG_VECTOR}))'
+        )
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                "title, description, content, tokenize='porter unicode61', prefix='2 3')"
+            )
+        except DatabaseError:
+            # SQLite built without FTS5; search falls back to substring matching
+            return
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, content) '
+            "SELECT id, title, description, COALESCE(content, '') FROM \"schoolApp_course\""
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS course_search_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolApp', '0005_course_catalog_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolApp', '0008_inbox_unread_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['student_course', '-created_at', '-id'], name='msg_thread_idx'),
+        ),
+    ]
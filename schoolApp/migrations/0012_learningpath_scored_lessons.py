@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+def count_existing_scores(apps, schema_editor):
+    # Existing averages were over the completed lessons; give them that weight
+    LearningPath = apps.get_model('schoolApp', 'LearningPath')
+    LearningPath.objects.filter(average_score__gt=0).update(scored_lessons=models.F('completed_lessons'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolApp', '0011_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningpath',
+            name='scored_lessons',
+            field=models.IntegerField(default=0, help_text='Number of scores in average_score'),
+        ),
+        migrations.RunPython(count_existing_scores, migrations.RunPython.noop),
+    ]
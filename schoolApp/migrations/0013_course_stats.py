@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolApp', '0012_learningpath_scored_lessons'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='schoolApp.course')),
+                ('enrolled', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('dropped', models.IntegerField(default=0)),
+                ('mentored', models.IntegerField(default=0)),
+                ('free', models.IntegerField(default=0)),
+                ('progress_sum', models.BigIntegerField(default=0, help_text='Sum of StudentCourse.progress')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrollments', models.IntegerField(default=0)),
+                ('completions', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='schoolApp.course')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('course', 'date')},
+            },
+        ),
+    ]
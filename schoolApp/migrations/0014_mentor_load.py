@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def count_active_students(apps, schema_editor):
+    StudentCourse = apps.get_model('schoolApp', 'StudentCourse')
+    MentorLoad = apps.get_model('schoolApp', 'MentorLoad')
+    loads = (
+        StudentCourse.objects.filter(mentor__isnull=False, status__in=['enrolled', 'in_progress'])
+        .values('mentor_id').order_by().annotate(active_students=models.Count('id'))
+    )
+    MentorLoad.objects.bulk_create([MentorLoad(**row) for row in loads], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolApp', '0013_course_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MentorLoad',
+            fields=[
+                ('mentor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='load', serialize=False, to='schoolApp.mentor')),
+                ('active_students', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_active_students, migrations.RunPython.noop),
+    ]
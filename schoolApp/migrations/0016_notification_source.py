@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolApp', '0015_course_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='source',
+            field=models.CharField(blank=True, max_length=50, null=True, unique=True),
+        ),
+    ]
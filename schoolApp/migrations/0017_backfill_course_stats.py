@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-18 16:30
+
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def recount_course_stats(apps, schema_editor):
+    """Same recount as analytics.rebuild(), for enrollments made before 0013"""
+    StudentCourse = apps.get_model('schoolApp', 'StudentCourse')
+    CourseStats = apps.get_model('schoolApp', 'CourseStats')
+    CourseDailyStats = apps.get_model('schoolApp', 'CourseDailyStats')
+    Count, Q = models.Count, models.Q
+
+    counts = {
+        status: Count('id', filter=Q(status=status))
+        for status in ['enrolled', 'in_progress', 'completed', 'dropped']
+    }
+    totals = StudentCourse.objects.values('course_id').order_by().annotate(
+        mentored=Count('id', filter=Q(enrollment_type='mentored')),
+        free=Count('id', filter=~Q(enrollment_type='mentored')),
+        progress_sum=models.Sum('progress'),
+        **counts,
+    )
+    daily = defaultdict(Counter)
+    enrolled_by_day = (
+        StudentCourse.objects.annotate(day=TruncDate('enrollment_date'))
+        .values('course_id', 'day').order_by().annotate(n=Count('id'))
+    )
+    for row in enrolled_by_day:
+        daily[row['course_id'], row['day']]['enrollments'] += row['n']
+    completed_by_day = (
+        StudentCourse.objects.filter(status='completed', completed_date__isnull=False)
+        .annotate(day=TruncDate('completed_date'))
+        .values('course_id', 'day').order_by().annotate(n=Count('id'))
+    )
+    for row in completed_by_day:
+        daily[row['course_id'], row['day']]['completions'] += row['n']
+
+    # Rows the signals created since 0013 only hold the changes made since
+    CourseStats.objects.all().delete()
+    CourseDailyStats.objects.all().delete()
+    CourseStats.objects.bulk_create([CourseStats(**row) for row in totals], batch_size=1000)
+    CourseDailyStats.objects.bulk_create([
+        CourseDailyStats(course_id=course_id, date=day, **delta)
+        for (course_id, day), delta in daily.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolApp', '0016_notification_source'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_course_stats, migrations.RunPython.noop),
+    ]
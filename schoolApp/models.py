@@ -1,6 +1,6 @@
 from django.db import models
-from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
+from . import hashing
 
 # Create your models here.
 
@@ -47,6 +47,10 @@ class Course(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the catalog (schoolApp.catalog)
+            models.Index(fields=['-created_at', '-id'], name='course_catalog_idx'),
+        ]
 
 
 class Student(models.Model):
@@ -61,10 +65,10 @@ class Student(models.Model):
         return f"{self.first_name} {self.last_name} (Student)"
 
     def set_password(self, raw_password):
-        self.password = make_password(raw_password)
+        self.password = hashing.make_password(raw_password)
 
     def check_password(self, raw_password):
-        return check_password(raw_password, self.password)
+        return hashing.check_password(raw_password, self.password)
 
 
 class Mentor(models.Model):
@@ -81,10 +85,10 @@ class Mentor(models.Model):
         return f"{self.first_name} {self.last_name} (Mentor)"
 
     def set_password(self, raw_password):
-        self.password = make_password(raw_password)
+        self.password = hashing.make_password(raw_password)
 
     def check_password(self, raw_password):
-        return check_password(raw_password, self.password)
+        return hashing.check_password(raw_password, self.password)
 
 
 class StudentCourse(models.Model):
@@ -124,6 +128,7 @@ class LearningPath(models.Model):
     total_lessons = models.IntegerField(default=0)
     completed_lessons = models.IntegerField(default=0)
     average_score = models.FloatField(default=0.0)
+    scored_lessons = models.IntegerField(default=0, help_text="Number of scores in average_score")
     last_accessed = models.DateTimeField(null=True, blank=True)
     
     def get_completion_percentage(self):
@@ -135,6 +140,70 @@ class LearningPath(models.Model):
         return f"Learning Path - {self.student_course.student.first_name}"
 
 
+class CourseStats(models.Model):
+    """Enrollment funnel for one course, kept current by schoolApp.analytics"""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    enrolled = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    dropped = models.IntegerField(default=0)
+    mentored = models.IntegerField(default=0)
+    free = models.IntegerField(default=0)
+    progress_sum = models.BigIntegerField(default=0, help_text="Sum of StudentCourse.progress")
+
+    def total(self):
+        return self.enrolled + self.in_progress + self.completed + self.dropped
+
+    def average_progress(self):
+        total = self.total()
+        return self.progress_sum / total if total else 0
+
+    def completion_rate(self):
+        total = self.total()
+        return self.completed * 100 / total if total else 0
+
+    def __str__(self):
+        return f"Stats for course {self.course_id}"
+
+
+class CourseDailyStats(models.Model):
+    """New enrollments and completions of one course on one day"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    enrollments = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Course {self.course_id} on {self.date}"
+
+    class Meta:
+        unique_together = ('course', 'date')
+        ordering = ['-date']
+
+
+class MentorLoad(models.Model):
+    """Active mentored students of one mentor, kept current by schoolApp.analytics"""
+    mentor = models.OneToOneField(Mentor, on_delete=models.CASCADE, primary_key=True, related_name='load')
+    active_students = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Load of mentor {self.mentor_id}"
+
+
+class CourseRecommendation(models.Model):
+    """A course often taken by students of another, precomputed by schoolApp.recommendations"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='similar_courses')
+    recommended = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(help_text="Cosine similarity of the two courses' students")
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.recommended_id} ({self.score:.2f})"
+
+    class Meta:
+        unique_together = ('course', 'recommended')
+        ordering = ['course', '-score']
+
+
 class Message(models.Model):
     """Store messages between mentor and student"""
     sender_student = models.ForeignKey(Student, on_delete=models.CASCADE, null=True, blank=True, related_name='sent_messages')
@@ -155,6 +224,13 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread inbox counts and lists (schoolApp.inbox)
+            models.Index(fields=['receiver_mentor', 'is_read'], name='msg_mentor_unread_idx'),
+            models.Index(fields=['receiver_student', 'is_read'], name='msg_student_unread_idx'),
+            # Keyset pages of a conversation (schoolApp.threads)
+            models.Index(fields=['student_course', '-created_at', '-id'], name='msg_thread_idx'),
+        ]
 
 
 class Notification(models.Model):
@@ -174,6 +250,8 @@ class Notification(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     related_course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True)
+    # The row a background task notified about (e.g. 'message:12'), so a rerun doesn't notify twice
+    source = models.CharField(max_length=50, null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -184,6 +262,66 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['mentor', 'is_read'], name='notif_mentor_unread_idx'),
+            models.Index(fields=['student', 'is_read'], name='notif_student_unread_idx'),
+        ]
+
+
+class NotificationFanout(models.Model):
+    """A notification being delivered to every enrollee of a course, in batches"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ]
+    
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='notification_fanouts')
+    notification_type = models.CharField(max_length=50, choices=Notification.NOTIFICATION_TYPE_CHOICES, default='course_update')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    last_enrollment_id = models.BigIntegerField(default=0, help_text="Resume point: last StudentCourse id notified")
+    delivered = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.title} ({self.delivered} delivered)"
+
+    class Meta:
+        ordering = ['created_at']
+
+
+class Task(models.Model):
+    """A queued side effect run by the run_tasks worker (see schoolApp.tasks)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+    class Meta:
+        ordering = ['run_after']
+        indexes = [
+            # Workers poll for due tasks
+            models.Index(fields=['status', 'run_after'], name='task_due_idx'),
+        ]
 
 
 class Newsletter(models.Model):
@@ -198,3 +336,27 @@ class Newsletter(models.Model):
     class Meta:
         ordering = ['-subscribed_date']
 
+
+class NewsletterCampaign(models.Model):
+    """A newsletter being sent to every active subscriber, in batches"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ]
+    
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    last_subscriber_id = models.BigIntegerField(default=0, help_text="Resume point: last Newsletter id mailed")
+    sent = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} ({self.sent} sent)"
+
+    class Meta:
+        ordering = ['created_at']
+
@@ -0,0 +1,79 @@
+"""
+Full-page cache for the static marketing pages.
+
+The home, about, read-more, instructor, certification and books pages are
+plain templates; only navbar.html changes, and only with the session's
+logged_in/user_role/user_name. @cache_page_by_navbar keys the rendered HTML
+on the request path plus those values, so every anonymous visitor shares
+one entry and is served without rendering.
+
+For anonymous visitors the page can also come from files written at deploy
+time by ``manage.py prerender_pages`` into PAGE_CACHE_DIR. Requests with a
+query string are never cached.
+"""
+
+import hashlib
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+# URL names of the pages served through the cache, used by prerender_pages
+PAGES = ['home', 'school', 'about', 'readmore', 'instructor', 'certificate', 'books']
+
+NAVBAR_SESSION_KEYS = ('logged_in', 'user_role', 'user_name')
+
+
+def navbar_state(request):
+    return tuple(request.session.get(key, '') for key in NAVBAR_SESSION_KEYS)
+
+
+def is_anonymous(request):
+    return not request.session.get('logged_in')
+
+
+def page_key(path, state):
+    digest = hashlib.md5('|'.join(str(part) for part in (path,) + state).encode()).hexdigest()
+    return f'page:{digest}'
+
+
+def prerendered_path(path):
+    """File a prerendered copy of the page at this URL path lives in"""
+    return Path(settings.PAGE_CACHE_DIR) / path.strip('/') / 'index.html'
+
+
+def _read_prerendered(path):
+    try:
+        return prerendered_path(path).read_bytes()
+    except OSError:
+        return None
+
+
+def cache_page_by_navbar(view):
+    """Serve the rendered page from cache, varying only on the navbar state"""
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or request.GET:
+            return view(request, *args, **kwargs)
+
+        key = page_key(request.path, navbar_state(request))
+        cached = cache.get(key)
+        if cached is None and is_anonymous(request):
+            content = _read_prerendered(request.path)
+            if content is not None:
+                cached = (content, 'text/html; charset=utf-8')
+                cache.set(key, cached, settings.PAGE_CACHE_TIMEOUT)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    return wrapped
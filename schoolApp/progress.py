@@ -0,0 +1,156 @@
+"""
+Lesson-progress ingestion.
+
+The course player reports lesson events in batches:
+
+    {"enrollment_id": 12, "lessons_completed": 1, "score": 87.5, "at": "2025-03-01T10:00:00Z"}
+
+lessons_completed defaults to 1; score (0-100) and at are optional. A
+batch is folded per enrollment and applied to the LearningPaths with
+UPDATEs whose values are F() expressions, incrementing each row from its
+current values, so concurrent batches never lose each other's increments.
+Enrollments with the same totals share one UPDATE ... WHERE id IN; a
+bulk_update would compile a CASE with a branch per row for every field,
+which costs far more than the queries it saves. average_score is kept as
+a running mean over scored_lessons, so no history is re-read. The derived
+StudentCourse fields (progress, status, completed_date) are then
+recomputed from the updated paths and written the same way, one UPDATE
+per distinct set of values.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import analytics, models
+
+
+class InvalidEvent(ValueError):
+    pass
+
+
+def parse_event(event, now=None):
+    """
+    Validate one event; return (enrollment_id, lessons, score or None, datetime).
+    Events without 'at' happened at now; pass one now for a whole batch so
+    they can share an UPDATE.
+    """
+    if not isinstance(event, dict):
+        raise InvalidEvent('Event must be an object')
+    try:
+        enrollment_id = int(event['enrollment_id'])
+        lessons = int(event.get('lessons_completed', 1))
+        score = event.get('score')
+        score = None if score is None else float(score)
+    except (KeyError, TypeError, ValueError):
+        raise InvalidEvent('enrollment_id, lessons_completed and score must be numbers')
+    if lessons < 0:
+        raise InvalidEvent('lessons_completed cannot be negative')
+    if score is not None and not 0 <= score <= 100:
+        raise InvalidEvent('score must be between 0 and 100')
+    now = now or timezone.now()
+    at = now
+    if event.get('at'):
+        at = parse_datetime(str(event['at']))
+        if at is None:
+            raise InvalidEvent('at must be an ISO 8601 datetime')
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+        # The player's clock can't move last_accessed into the future
+        at = min(at, now)
+    return enrollment_id, lessons, score, at
+
+
+def _fold(events):
+    """Combine parsed events into per-enrollment totals"""
+    totals = {}
+    for enrollment_id, lessons, score, at in events:
+        total = totals.setdefault(enrollment_id, {'lessons': 0, 'scores': 0, 'score_sum': 0.0, 'at': at})
+        total['lessons'] += lessons
+        if score is not None:
+            total['scores'] += 1
+            total['score_sum'] += score
+        total['at'] = max(total['at'], at)
+    return totals
+
+
+def _path_update(total):
+    """New values for one LearningPath; every F() reads the row's pre-update values"""
+    completed = F('completed_lessons') + total['lessons']
+    changes = {
+        # Never count past the end of the course
+        'completed_lessons': Case(
+            When(total_lessons__gt=0, then=Least(completed, F('total_lessons'))),
+            default=completed,
+        ),
+        'last_accessed': Greatest(Coalesce(F('last_accessed'), Value(total['at'])), Value(total['at'])),
+    }
+    if total['scores']:
+        changes['average_score'] = (
+            F('average_score') * F('scored_lessons') + total['score_sum']
+        ) / (F('scored_lessons') + total['scores'])
+        changes['scored_lessons'] = F('scored_lessons') + total['scores']
+    else:
+        changes['average_score'] = F('average_score')
+        changes['scored_lessons'] = F('scored_lessons')
+    return changes
+
+
+def apply(events):
+    """
+    Apply parsed events (see parse_event). Return a list of
+    {'enrollment_id', 'progress', 'status'} for the enrollments touched.
+    """
+    totals = _fold(events)
+    if not totals:
+        return []
+    now = timezone.now()
+    groups = defaultdict(list)
+    for enrollment_id, total in totals.items():
+        groups[tuple(total.values())].append(enrollment_id)
+    with transaction.atomic():
+        for enrollment_ids in groups.values():
+            models.LearningPath.objects.filter(student_course_id__in=enrollment_ids).update(
+                **_path_update(totals[enrollment_ids[0]])
+            )
+
+        enrollments = list(
+            models.StudentCourse.objects.filter(id__in=totals)
+            .select_related('learning_path')
+            .only('id', 'course_id', 'mentor_id', 'enrollment_type', 'enrollment_date', 'status', 'progress',
+                  'completed_date', 'learning_path__completed_lessons', 'learning_path__total_lessons')
+        )
+        changes = []
+        updates = defaultdict(list)
+        for enrollment in enrollments:
+            path = getattr(enrollment, 'learning_path', None)
+            if path is None or enrollment.status == 'dropped':
+                continue
+            progress = min(100, int(path.get_completion_percentage()))
+            if path.total_lessons and path.completed_lessons >= path.total_lessons:
+                status = 'completed'
+            else:
+                status = 'in_progress'
+            if (progress, status) == (enrollment.progress, enrollment.status):
+                continue
+            old = analytics.state(enrollment)
+            enrollment.progress = progress
+            if status == 'completed' and enrollment.status != 'completed':
+                enrollment.completed_date = now
+            enrollment.status = status
+            changes.append((old, analytics.state(enrollment)))
+            updates[progress, status, enrollment.completed_date].append(enrollment.id)
+        for (progress, status, completed_date), enrollment_ids in updates.items():
+            models.StudentCourse.objects.filter(id__in=enrollment_ids).update(
+                progress=progress, status=status, completed_date=completed_date,
+            )
+        # update() sends no signals; feed the rollups directly
+        analytics.record_many(changes)
+    return [
+        {'enrollment_id': enrollment.id, 'progress': enrollment.progress, 'status': enrollment.status}
+        for enrollment in enrollments
+    ]
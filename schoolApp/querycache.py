@@ -0,0 +1,92 @@
+"""
+Cached querysets of courses, instructors and mentors.
+
+fetch(queryset, name, *args) returns the queryset's rows as a list, cached
+under name, args and the version of each model the query reads from, so a
+Course queryset with select_related('instructor') goes stale when either
+table changes. Saving or deleting a Course, Instructor or Mentor bumps that
+model's version (see signals.py); entries under an old version are never
+read again and expire.
+
+name identifies the shape of the query and args whatever varies in it,
+e.g. fetch(Course.objects.filter(id=course_id), 'course', course_id):
+compiling SQL for the key would cost more than many of these queries, so
+each name's tables are worked out once per process. Querysets that join
+any other table are refused, since nothing would invalidate them; tables
+read only by subqueries are not checked.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import models, replica
+
+
+MODELS = (models.Course, models.Instructor, models.Mentor)
+
+# name -> models the query reads, found by compiling its first queryset
+_tables = {}
+
+
+def _version_key(model):
+    return f'querycache:{model._meta.label_lower}:version'
+
+
+def version(model):
+    key = _version_key(model)
+    value = cache.get(key)
+    if value is None:
+        # Seed with the clock so an evicted counter never reuses an old version
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def invalidate(model):
+    """Make every cached queryset that reads this model's table stale"""
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        cache.set(_version_key(model), time.time_ns(), None)
+
+
+def _models_read(queryset):
+    query = queryset.query.clone()
+    # Compiling joins in every table the query reads
+    query.sql_with_params()
+    tables = {join.table_name for join in query.alias_map.values()}
+    cached = {model._meta.db_table: model for model in MODELS}
+    if not tables or not tables <= cached.keys():
+        raise ValueError(f'Only querysets reading {", ".join(sorted(cached))} can be cached, not {sorted(tables)}')
+    return [cached[table] for table in sorted(tables)]
+
+
+def _key(queryset, name, args):
+    if name not in _tables:
+        _tables[name] = _models_read(queryset)
+    versions = ':'.join(f'{model._meta.model_name}.{version(model)}' for model in _tables[name])
+    return f"querycache:{name}:{versions}:{':'.join(str(arg) for arg in args)}"
+
+
+def fetch(queryset, name, *args, timeout=None):
+    """The queryset's rows as a list, from the cache when possible"""
+    key = _key(queryset, name, args)
+    rows = cache.get(key)
+    if rows is None:
+        with replica.primary():
+            rows = list(queryset)
+        cache.set(key, rows, timeout or settings.QUERYSET_CACHE_TIMEOUT)
+    return rows
+
+
+def first(queryset, name, *args, timeout=None):
+    """The queryset's first row, or None"""
+    rows = fetch(queryset[:1], name, *args, timeout=timeout)
+    return rows[0] if rows else None
+
+
+def course(course_id):
+    """The course with its instructor, or None"""
+    return first(models.Course.objects.select_related('instructor').filter(id=course_id), 'course', course_id)
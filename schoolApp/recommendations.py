@@ -0,0 +1,156 @@
+"""
+Course recommendations from co-enrollment.
+
+rebuild() loads every (student, course) enrollment into a sparse
+student x course matrix X and computes the course x course co-enrollment
+counts as X.T @ X. Pairs shared by fewer than
+RECOMMENDATION_MIN_COMMON_STUDENTS students are dropped as noise, the rest
+are scaled to cosine similarity, and the RECOMMENDATION_SIMILAR_COURSES
+best of each course are written to CourseRecommendation. It runs offline
+(manage.py rebuild_recommendations) and needs NumPy and SciPy.
+
+for_student() serves the dashboard: it sums the stored similarities of
+the student's courses and caches the ranked ids, topping the list up with
+the most popular courses (from CourseStats) for students with little or
+no history. A rebuild bumps the cache version.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+
+from . import models, replica
+
+
+VERSION_KEY = 'recommendations:version'
+
+
+def similar_courses(students, courses, top_n, min_common=1):
+    """
+    Given parallel integer arrays of enrollments (student index, course
+    index), return (course, recommended, score) arrays holding up to top_n
+    most similar courses per course.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    n_students = int(students.max()) + 1 if len(students) else 0
+    n_courses = int(courses.max()) + 1 if len(courses) else 0
+    enrolled = sparse.csr_matrix(
+        (np.ones(len(students), dtype=np.float32), (students, courses)), shape=(n_students, n_courses),
+    )
+    # Duplicate pairs were summed; each student counts once per course
+    enrolled.data[:] = 1
+    common = (enrolled.T @ enrolled).tocsr()
+    sizes = common.diagonal()
+    common.setdiag(0)
+    common.data[common.data < min_common] = 0
+    common.eliminate_zeros()
+
+    # Cosine similarity: common / sqrt(size_a * size_b)
+    norms = np.sqrt(sizes)
+    norms[norms == 0] = 1
+    rows = np.repeat(np.arange(n_courses), np.diff(common.indptr))
+    scores = common.data / (norms[rows] * norms[common.indices])
+
+    # Keep the top_n of each row: sort by (row, -score) and cut each row short
+    order = np.lexsort((-scores, rows))
+    rows, columns, scores = rows[order], common.indices[order], scores[order]
+    rank = np.arange(len(rows)) - np.repeat(common.indptr[:-1], np.diff(common.indptr))
+    keep = rank < top_n
+    return rows[keep], columns[keep], scores[keep]
+
+
+def load_enrollments():
+    """Return (student ids, course ids) of every enrollment that wasn't dropped, as arrays"""
+    import numpy as np
+
+    pairs = (
+        models.StudentCourse.objects.exclude(status='dropped')
+        .values_list('student_id', 'course_id')
+        .order_by()
+        .iterator(chunk_size=10000)
+    )
+    array = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+    return array[:, 0], array[:, 1]
+
+
+def rebuild(top_n=None, min_common=None):
+    """Recompute CourseRecommendation; return (rows written, timings in seconds by phase)"""
+    import numpy as np
+
+    top_n = top_n or settings.RECOMMENDATION_SIMILAR_COURSES
+    min_common = min_common or settings.RECOMMENDATION_MIN_COMMON_STUDENTS
+    timings = {}
+
+    start = time.perf_counter()
+    student_ids, course_ids = load_enrollments()
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # Renumber ids densely so the matrix has no empty rows or columns
+    course_ids, course_index = np.unique(course_ids, return_inverse=True)
+    _, student_index = np.unique(student_ids, return_inverse=True)
+    rows, columns, scores = similar_courses(student_index, course_index, top_n, min_common)
+    timings['compute'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with transaction.atomic():
+        models.CourseRecommendation.objects.all().delete()
+        models.CourseRecommendation.objects.bulk_create([
+            models.CourseRecommendation(course_id=course_id, recommended_id=recommended_id, score=score)
+            for course_id, recommended_id, score in zip(
+                course_ids[rows].tolist(), course_ids[columns].tolist(), scores.tolist(),
+            )
+        ], batch_size=1000)
+    # Cached lists were ranked from the old table
+    cache.set(VERSION_KEY, time.time(), None)
+    timings['write'] = time.perf_counter() - start
+    return len(rows), timings
+
+
+def _ranked_ids(enrolled, count):
+    """Up to count course ids for a student enrolled in enrolled, best first"""
+    ranked = list(
+        models.CourseRecommendation.objects
+        .filter(course_id__in=enrolled)
+        .exclude(recommended_id__in=enrolled)
+        .values('recommended_id')
+        .annotate(total=Sum('score'))
+        .order_by('-total', 'recommended_id')
+        .values_list('recommended_id', flat=True)[:count]
+    )
+    if len(ranked) < count:
+        popular = (
+            models.Course.objects
+            .exclude(id__in=list(enrolled) + ranked)
+            .order_by(
+                (F('stats__enrolled') + F('stats__in_progress') + F('stats__completed')).desc(nulls_last=True),
+                '-created_at',
+            )
+            .values_list('id', flat=True)[:count - len(ranked)]
+        )
+        ranked += list(popular)
+    return ranked
+
+
+def for_student(student_id, enrolled, count=None):
+    """
+    The student's top recommended courses, given the ids of the courses
+    they are enrolled in. Twice as many ids as needed are cached so that
+    courses enrolled in since can be skipped without recomputing.
+    """
+    count = count or settings.RECOMMENDATION_COUNT
+    enrolled = set(enrolled)
+    key = f'recommendations:{cache.get(VERSION_KEY, 0)}:{student_id}'
+    ranked = cache.get(key)
+    if ranked is None:
+        with replica.primary():
+            ranked = _ranked_ids(enrolled, count * 2)
+        cache.set(key, ranked, settings.RECOMMENDATION_CACHE_TIMEOUT)
+    ids = [course_id for course_id in ranked if course_id not in enrolled][:count]
+    courses = models.Course.objects.select_related('instructor').in_bulk(ids)
+    return [courses[course_id] for course_id in ids if course_id in courses]
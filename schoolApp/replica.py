@@ -0,0 +1,97 @@
+"""
+Read-replica routing (DATABASE_REPLICA_URL).
+
+With a replica configured, ReplicaRouter sends the schoolApp reads of
+views decorated with @replica.reads to the 'replica' database; everything
+else, and every write, goes to 'default'. ReplicaPinMiddleware tracks the
+request: once it writes, its remaining reads use the primary, and the
+response sets a REPLICA_PIN_COOKIE that keeps the user's reads there for
+REPLICA_PIN_SECONDS, long enough for the replica to catch up with their
+own change. Sessions are always read from the primary.
+
+Values kept in a shared cache outlive the request that computed them, so
+code filling one reads inside primary() rather than caching a replica's
+lagging rows for every worker.
+"""
+
+import contextlib
+import contextvars
+import functools
+
+from django.conf import settings
+
+
+DEFAULT = 'default'
+REPLICA = 'replica'
+
+# {'pinned': bool, 'wrote': bool, 'reads': bool} for the current request
+_request = contextvars.ContextVar('replica_request', default=None)
+
+
+def configured():
+    return bool(settings.DATABASE_REPLICA_URL)
+
+
+def begin(pinned=False):
+    """Start tracking a request; pinned requests only read from the primary"""
+    _request.set({'pinned': pinned, 'wrote': False, 'reads': False})
+
+
+def end():
+    """Stop tracking the current request; return whether it wrote"""
+    state = _request.get()
+    _request.set(None)
+    return bool(state and state['wrote'])
+
+
+def reads(view):
+    """Let this view's reads go to the replica"""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _request.get()
+        if state is None:
+            return view(request, *args, **kwargs)
+        # Only for the view: middleware and response handlers after it read the primary
+        routed, state['reads'] = state['reads'], True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state['reads'] = routed
+    return wrapper
+
+
+@contextlib.contextmanager
+def primary():
+    """Read from the primary inside this block, e.g. to fill a shared cache"""
+    state = _request.get()
+    routed = state is not None and state['reads']
+    if routed:
+        state['reads'] = False
+    try:
+        yield
+    finally:
+        if routed:
+            state['reads'] = True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request.get()
+        if (
+            state is not None and state['reads'] and not state['pinned']
+            and model._meta.app_label == 'schoolApp' and configured()
+        ):
+            return REPLICA
+        # Explicitly, or rows loaded from the replica would be re-read there
+        return DEFAULT
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            state['wrote'] = state['pinned'] = True
+        # Explicitly, or saving a row loaded from the replica would write there
+        return DEFAULT
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT, REPLICA}
@@ -0,0 +1,124 @@
+"""
+Full-text search over Course.title, description and content.
+
+SQLite uses an FTS5 table (schoolApp_course_fts) keyed by course id, kept
+up to date from Course save/delete signals. Postgres uses a GIN index on a
+weighted tsvector expression, which the database maintains itself. Both are
+created by migration 0006_course_search; run the rebuild_search_index
+command after bulk loads that skip signals.
+
+Every term is prefix-matched and all terms must match. Title hits rank
+above description hits, which rank above content hits.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from . import models
+
+
+FTS_TABLE = 'schoolApp_course_fts'
+MAX_TERMS = 8
+
+# Keep in sync with the index created in migration 0006_course_search. The
+# query must repeat the indexed expression exactly for Postgres to use it.
+PG_VECTOR = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', description), 'B') || "
+    "setweight(to_tsvector('english', COALESCE(content, '')), 'C')"
+)
+
+
+def _terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+_fts_available = {}
+
+
+def _sqlite_has_index():
+    """Whether the FTS5 table exists; SQLite builds without FTS5 skip it"""
+    name = connection.settings_dict['NAME']
+    if name not in _fts_available:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+            )
+            _fts_available[name] = cursor.fetchone() is not None
+    return _fts_available[name]
+
+
+def search_ids(query, limit=20, offset=0):
+    """Return ranked course ids matching query, best match first"""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    table = models.Course._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'SELECT id FROM "{table}" '
+                f"WHERE {PG_VECTOR} @@ to_tsquery('english', %s) "
+                f"ORDER BY ts_rank({PG_VECTOR}, to_tsquery('english', %s)) DESC, id DESC "
+                'LIMIT %s OFFSET %s',
+                [' & '.join(f'{t}:*' for t in terms)] * 2 + [limit, offset],
+            )
+        elif connection.vendor == 'sqlite' and _sqlite_has_index():
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 10.0, 3.0, 1.0), rowid DESC '
+                'LIMIT %s OFFSET %s',
+                [' '.join(f'"{t}"*' for t in terms), limit, offset],
+            )
+        else:
+            # No index on this backend: fall back to a slow substring scan
+            courses = models.Course.objects.all()
+            for term in terms:
+                courses = courses.filter(
+                    Q(title__icontains=term) | Q(description__icontains=term) | Q(content__icontains=term)
+                )
+            return list(courses.values_list('id', flat=True)[offset:offset + limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search(query, limit=20, offset=0):
+    """Return ranked Course objects (with instructor) matching query"""
+    ids = search_ids(query, limit=limit, offset=offset)
+    courses = models.Course.objects.select_related('instructor').in_bulk(ids)
+    return [courses[course_id] for course_id in ids if course_id in courses]
+
+
+def index_course(course):
+    """Add or refresh one course in the SQLite index"""
+    if connection.vendor != 'sqlite' or not _sqlite_has_index():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [course.id])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, content) VALUES (%s, %s, %s, %s)',
+            [course.id, course.title, course.description, course.content or ''],
+        )
+
+
+def remove_course(course_id):
+    if connection.vendor != 'sqlite' or not _sqlite_has_index():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [course_id])
+
+
+def rebuild():
+    """Re-index every course; only needed on SQLite"""
+    if connection.vendor != 'sqlite' or not _sqlite_has_index():
+        return 0
+    table = models.Course._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, content) '
+            f'SELECT id, title, description, COALESCE(content, \'\') FROM "{table}"'
+        )
+        return cursor.rowcount
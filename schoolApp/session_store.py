@@ -0,0 +1,110 @@
+"""
+Database session store that coalesces last_activity writes.
+
+AutoLogoutMiddleware stamps ``last_activity`` into the session on every
+request and SESSION_SAVE_EVERY_REQUEST makes each of those an UPDATE on
+django_session. This store keeps the fresh timestamp in the session cache
+and only writes the row when something else in the session changed or when
+``last_activity`` has moved more than SESSION_ACTIVITY_FLUSH_WINDOW seconds
+past the value stored in the database. A session nothing changed in is not
+written at all.
+
+The database row stays authoritative for everything else, so logins,
+logouts and role changes are visible to every worker immediately.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+
+
+ACTIVITY_KEY = 'last_activity'
+ACTIVITY_CACHE_PREFIX = 'schoolApp.session_activity.'
+
+
+def get_flush_window():
+    """Seconds last_activity may drift before the row is written again"""
+    return getattr(settings, 'SESSION_ACTIVITY_FLUSH_WINDOW', 60)
+
+
+def _parse_activity(value):
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SessionStore(DBStore):
+    """
+    Implement a database session store with write-coalesced activity tracking.
+    """
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Session data as it currently sits in django_session, or None when
+        # nothing has been loaded or written yet.
+        self._persisted = None
+
+    @property
+    def _activity_cache(self):
+        return caches[settings.SESSION_CACHE_ALIAS]
+
+    def _activity_cache_key(self, session_key=None):
+        return ACTIVITY_CACHE_PREFIX + (session_key or self.session_key)
+
+    def load(self):
+        data = super().load()
+        self._persisted = dict(data)
+        if data and self.session_key:
+            cached = self._activity_cache.get(self._activity_cache_key())
+            stored = _parse_activity(data.get(ACTIVITY_KEY))
+            fresh = _parse_activity(cached)
+            if fresh and (stored is None or fresh > stored):
+                data[ACTIVITY_KEY] = cached
+        return data
+
+    def _can_coalesce(self):
+        """Only last_activity changed, and by less than the flush window"""
+        window = get_flush_window()
+        if not window or self._persisted is None:
+            return False
+
+        current = self._session
+        ignored = {ACTIVITY_KEY}
+        if {k: v for k, v in current.items() if k not in ignored} != \
+                {k: v for k, v in self._persisted.items() if k not in ignored}:
+            return False
+
+        new = _parse_activity(current.get(ACTIVITY_KEY))
+        old = _parse_activity(self._persisted.get(ACTIVITY_KEY))
+        if new is None or old is None:
+            return False
+        return (new - old).total_seconds() < window
+
+    def save(self, must_create=False):
+        if not must_create and self.session_key is not None and self._session == self._persisted:
+            # SESSION_SAVE_EVERY_REQUEST on a request that changed nothing,
+            # e.g. an event-stream reconnect, which doesn't stamp last_activity
+            return
+        if not must_create and self.session_key is not None and self._can_coalesce():
+            self._activity_cache.set(
+                self._activity_cache_key(),
+                self._session[ACTIVITY_KEY],
+                self.get_expiry_age(),
+            )
+            return
+
+        super().save(must_create=must_create)
+        self._persisted = dict(self._session_cache)
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        if key:
+            self._activity_cache.delete(self._activity_cache_key(key))
+        if key == self.session_key:
+            self._persisted = None
+        super().delete(session_key)
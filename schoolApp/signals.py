@@ -0,0 +1,132 @@
+from functools import partial
+
+from django.core.signals import request_finished
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import analytics, catalog, events, fanout, inbox, models, querycache, search, sqlite, user_cache
+
+
+@receiver([post_save, post_delete], sender=models.Student)
+def invalidate_student(sender, instance, **kwargs):
+    """Drop the cached row so the next request reloads it"""
+    user_cache.invalidate('student', instance.id)
+
+
+@receiver([post_save, post_delete], sender=models.Mentor)
+def invalidate_mentor(sender, instance, **kwargs):
+    """Drop the cached row so the next request reloads it"""
+    user_cache.invalidate('mentor', instance.id)
+
+
+@receiver([post_save, post_delete], sender=models.Course)
+@receiver([post_save, post_delete], sender=models.Instructor)
+def invalidate_catalog(sender, instance, **kwargs):
+    """Course pages list titles and instructor names, so drop them all"""
+    catalog.invalidate()
+
+
+@receiver([post_save, post_delete], sender=models.Course)
+@receiver([post_save, post_delete], sender=models.Instructor)
+@receiver([post_save, post_delete], sender=models.Mentor)
+def invalidate_cached_querysets(sender, **kwargs):
+    """Cached querysets reading this table are now stale"""
+    querycache.invalidate(sender)
+
+
+@receiver(post_save, sender=models.Course)
+def index_course(sender, instance, **kwargs):
+    """Keep the full-text search index in step with the course"""
+    search.index_course(instance)
+
+
+@receiver(post_delete, sender=models.Course)
+def unindex_course(sender, instance, **kwargs):
+    search.remove_course(instance.id)
+
+
+@receiver(post_save, sender=models.Course)
+def announce_course_update(sender, instance, created, raw=False, **kwargs):
+    """Queue course_update notifications; delivery happens off the request"""
+    if not created and not raw:
+        fanout.enqueue_course_update(instance)
+
+
+@receiver([post_save, post_delete], sender=models.Message)
+def refresh_message_counts(sender, instance, **kwargs):
+    """Unread badges are cached; recount on the receiver's next page"""
+    inbox.invalidate('student', instance.receiver_student_id)
+    inbox.invalidate('mentor', instance.receiver_mentor_id)
+
+
+@receiver([post_save, post_delete], sender=models.Notification)
+def refresh_notification_counts(sender, instance, **kwargs):
+    inbox.invalidate('student', instance.student_id)
+    inbox.invalidate('mentor', instance.mentor_id)
+
+
+@receiver(post_save, sender=models.Message)
+def push_message(sender, instance, created, raw=False, **kwargs):
+    """Push new messages to the receiver's open event streams"""
+    if not created or raw:
+        return
+    event = events.message_event(instance)
+    transaction.on_commit(partial(events.publish, 'student', instance.receiver_student_id, event))
+    transaction.on_commit(partial(events.publish, 'mentor', instance.receiver_mentor_id, event))
+
+
+@receiver(post_save, sender=models.Notification)
+def push_notification(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    event = events.notification_event(instance)
+    transaction.on_commit(partial(events.publish, 'student', instance.student_id, event))
+    transaction.on_commit(partial(events.publish, 'mentor', instance.mentor_id, event))
+
+
+@receiver(pre_save, sender=models.StudentCourse)
+def remember_enrollment_state(sender, instance, **kwargs):
+    """Read what the analytics rollups counted for the row, to diff against after the save"""
+    instance._analytics_state = None if instance._state.adding else analytics.saved_state(instance.pk)
+
+
+@receiver(post_save, sender=models.StudentCourse)
+def update_course_stats(sender, instance, created, **kwargs):
+    old = None if created else instance._analytics_state
+    # A partially loaded instance doesn't hold the rest of what was saved
+    new = analytics.state(instance) or analytics.saved_state(instance.pk)
+    analytics.record(old, new)
+
+
+@receiver(pre_delete, sender=models.StudentCourse)
+def remember_deleted_enrollment(sender, instance, **kwargs):
+    instance._analytics_state = analytics.state(instance) or analytics.saved_state(instance.pk)
+
+
+@receiver(post_delete, sender=models.StudentCourse)
+def remove_from_course_stats(sender, instance, origin=None, **kwargs):
+    state = instance._analytics_state
+    # Deleting the course deletes its rollups too, but not its mentors' loads
+    if isinstance(origin, models.Course) or getattr(origin, 'model', None) is models.Course:
+        if state and state['mentor_id'] and state['status'] in analytics.ACTIVE_STATUSES:
+            analytics.increment(models.MentorLoad, {'mentor_id': state['mentor_id']}, {'active_students': -1})
+        return
+    analytics.record(state, None)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if sqlite.enabled(connection):
+        sqlite.apply_pragmas(connection)
+        sqlite.optimize_if_due(connection)
+
+
+@receiver(request_finished)
+def optimize_sqlite(sender, **kwargs):
+    # Persistent connections are still open here; closed ones are
+    # optimized when the next one is created
+    for connection in connections.all(initialized_only=True):
+        if sqlite.enabled(connection) and connection.connection is not None:
+            sqlite.optimize_if_due(connection)
@@ -0,0 +1,41 @@
+"""
+Opt-in SQLite tuning (SQLITE_TUNING).
+
+Every new SQLite connection gets SQLITE_PRAGMAS: WAL so reads go on
+while a write commits, synchronous=NORMAL, a busy timeout, memory-mapped
+I/O and a larger page cache. With persistent connections the query
+planner's statistics would otherwise never be refreshed, so each process
+runs PRAGMA optimize every SQLITE_OPTIMIZE_INTERVAL seconds, after a
+request or when it opens a connection. Both hooks are connected in
+signals.py.
+"""
+
+import time
+
+from django.conf import settings
+
+
+# None until this process first runs it, so that happens on its first connection
+_last_optimize = None
+
+
+def enabled(connection):
+    return settings.SQLITE_TUNING and connection.vendor == 'sqlite'
+
+
+def apply_pragmas(connection):
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def optimize_if_due(connection):
+    """Run PRAGMA optimize if this process hasn't for a while; return whether it ran"""
+    global _last_optimize
+    now = time.monotonic()
+    if _last_optimize is not None and now - _last_optimize < settings.SQLITE_OPTIMIZE_INTERVAL:
+        return False
+    _last_optimize = now
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA optimize')
+    return True
@@ -0,0 +1,158 @@
+"""
+Database-backed outbox for side effects the user doesn't wait on.
+
+Views call enqueue(name, **payload), which only inserts a Task row, and
+return right away. ``manage.py run_tasks`` claims due tasks and runs the
+registered handler for each in a thread pool. A task that raises is
+retried with exponential backoff (TASK_RETRY_BACKOFF, doubled per attempt)
+until TASK_MAX_ATTEMPTS, then left as failed with its error. Claims are
+conditional UPDATEs, so any number of workers can share the table, and a
+task whose worker died is picked up again once its TASK_LEASE_TIMEOUT
+expires. Handlers must therefore be safe to run twice.
+
+notify_enrollment and notify_message are cheap, and a Notification only
+reaches open event streams when it is saved in the web process (see
+events.py), so enroll() and send_message_view call them from on_commit
+rather than enqueueing them. They stay registered for tasks queued before
+that, and key their rows on Notification.source so a rerun adds nothing.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import models
+
+
+HANDLERS = {}
+
+
+def handler(name):
+    """Register a function as the handler for tasks called name"""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, delay=0, **payload):
+    """Queue a task; payload must be JSON serializable"""
+    if name not in HANDLERS:
+        raise ValueError(f'Unknown task: {name}')
+    return models.Task.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=settings.TASK_MAX_ATTEMPTS,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+
+
+def _due(now):
+    stale = now - datetime.timedelta(seconds=settings.TASK_LEASE_TIMEOUT)
+    return Q(status='pending', run_after__lte=now) | Q(status='running', locked_at__lt=stale)
+
+
+def claim(limit):
+    """Take up to limit due tasks for this worker and return them"""
+    now = timezone.now()
+    candidates = list(
+        models.Task.objects.filter(_due(now)).order_by('run_after', 'id').values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for task_id in candidates:
+        # Another worker may have claimed it since the SELECT. The attempt is
+        # counted here so a task that kills its worker still runs out of retries.
+        if models.Task.objects.filter(_due(now), id=task_id).update(
+            status='running', locked_at=now, attempts=F('attempts') + 1,
+        ):
+            claimed.append(task_id)
+    return list(models.Task.objects.filter(id__in=claimed).order_by('run_after', 'id'))
+
+
+def run(task):
+    """Run one claimed task and record the outcome; return True on success"""
+    try:
+        HANDLERS[task.name](**task.payload)
+    except Exception as e:
+        task.last_error = f'{type(e).__name__}: {e}'
+        if task.attempts >= task.max_attempts:
+            task.status = 'failed'
+            task.finished_at = timezone.now()
+        else:
+            task.status = 'pending'
+            backoff = settings.TASK_RETRY_BACKOFF * 2 ** (task.attempts - 1)
+            task.run_after = timezone.now() + datetime.timedelta(seconds=backoff)
+        task.save(update_fields=['status', 'last_error', 'run_after', 'finished_at'])
+        return False
+    task.status = 'done'
+    task.finished_at = timezone.now()
+    task.save(update_fields=['status', 'finished_at'])
+    return True
+
+
+def run_pending(limit=100):
+    """Run due tasks in this thread until none are left; return (succeeded, failed)"""
+    succeeded = failed = 0
+    while True:
+        batch = claim(limit)
+        if not batch:
+            return succeeded, failed
+        for task in batch:
+            if run(task):
+                succeeded += 1
+            else:
+                failed += 1
+
+
+# Handlers
+
+@handler('send_welcome_email')
+def send_welcome_email(email):
+    send_mail(
+        subject='Welcome to EduForAll Newsletter',
+        message=f'Thank you for subscribing to our newsletter! You will receive updates about our latest courses and learning opportunities.',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[email],
+    )
+
+
+@handler('notify_enrollment')
+def notify_enrollment(enrollment_id):
+    """Tell the mentor a student enrolled with them"""
+    enrollment = models.StudentCourse.objects.select_related('student', 'course').filter(id=enrollment_id).first()
+    if enrollment is None or enrollment.mentor_id is None:
+        return
+    student = enrollment.student
+    models.Notification.objects.get_or_create(source=f'enrollment:{enrollment_id}', defaults={
+        'mentor_id': enrollment.mentor_id,
+        'notification_type': 'enrollment',
+        'title': f'New Student: {student.first_name} {student.last_name}',
+        'message': f'{student.first_name} {student.last_name} enrolled in {enrollment.course.title} with mentoring',
+        'related_course': enrollment.course,
+    })
+
+
+@handler('notify_message')
+def notify_message(message_id):
+    """Tell the receiver of a message about it"""
+    message = models.Message.objects.select_related('sender_student', 'sender_mentor').filter(id=message_id).first()
+    if message is None:
+        return
+    source = f'message:{message_id}'
+    if message.sender_student_id and message.receiver_mentor_id:
+        models.Notification.objects.get_or_create(source=source, defaults={
+            'mentor_id': message.receiver_mentor_id,
+            'notification_type': 'message',
+            'title': f'Message from {message.sender_student.first_name}',
+            'message': message.subject if message.subject else 'New message',
+        })
+    elif message.sender_mentor_id and message.receiver_student_id:
+        models.Notification.objects.get_or_create(source=source, defaults={
+            'student_id': message.receiver_student_id,
+            'notification_type': 'message',
+            'title': f'Message from Mentor {message.sender_mentor.first_name}',
+            'message': message.subject if message.subject else 'New message',
+        })
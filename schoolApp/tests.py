@@ -1,3 +1,1263 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import importlib
+import json
+import os
+import shutil
+import smtplib
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache, caches
+from django.core.cache.backends import locmem as locmem_cache
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import (
+    analytics, benchmark, campaigns, catalog, enrollment, events, fanout, file_cache, hashing, importer, inbox, matching,
+    models, progress, querycache, recommendations, replica, search, session_store, sqlite, tasks, threads, tiered_cache,
+    urls, user_cache,
+)
+
+
+def make_instructor(**kwargs):
+    defaults = {
+        'first_name': 'Ada',
+        'last_name': 'Lovelace',
+        'email': 'ada@example.com',
+        'phone_number': '555-0100',
+    }
+    defaults.update(kwargs)
+    return models.Instructor.objects.create(**defaults)
+
+
+def make_course(instructor, title='Course', **kwargs):
+    defaults = {
+        'title': title,
+        'description': f'{title} description',
+        'instructor': instructor,
+        'start_date': datetime.date(2025, 1, 1),
+        'end_date': datetime.date(2025, 3, 1),
+    }
+    defaults.update(kwargs)
+    return models.Course.objects.create(**defaults)
+
+
+def make_student(email='student@example.com'):
+    # Store a precomputed hash so tests don't pay for PBKDF2
+    return models.Student.objects.create(
+        first_name='Sam', last_name='Student', email=email,
+        phone_number='555-0101', password='!',
+    )
+
+
+def make_mentor(email='mentor@example.com'):
+    return models.Mentor.objects.create(
+        first_name='Max', last_name='Mentor', email=email,
+        phone_number='555-0102', password='!', expertise='Python',
+    )
+
+
+# Both tiers in memory, so tests never read or clear the shared cache on disk
+TEST_CACHES = {
+    'default': {**settings.CACHES['default']},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared', 'TIMEOUT': 600},
+}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=TEST_CACHES)
+class SchoolAppTestCase(TestCase):
+    """Requests over plain http, as the test client sends them, against in-memory caches"""
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """Refuses some addresses and drops each connection after drop_after messages"""
+
+    def __init__(self, refused=(), drop_after=None, **kwargs):
+        super().__init__(**kwargs)
+        self.refused = set(refused)
+        self.drop_after = drop_after
+        self.delivered = 0
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.drop_after is not None and self.delivered >= self.drop_after:
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            if message.to[0] in self.refused:
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'No such user')})
+            self.delivered += 1
+        return super().send_messages(messages)
+
+
+def log_in(client, user, role):
+    session = client.session
+    session.update({
+        'user_id': user.id,
+        'user_role': role,
+        'user_name': f'{user.first_name} {user.last_name}',
+        'logged_in': True,
+    })
+    session.save()
+
+
+@override_settings(SESSION_ACTIVITY_FLUSH_WINDOW=60)
+class SessionActivityTests(SchoolAppTestCase):
+    def setUp(self):
+        cache.clear()
+        log_in(self.client, make_student(), 'student')
+        self.session_key = self.client.session.session_key
+
+    def get(self):
+        return self.client.get(reverse('api_unread_counts'))
+
+    def session_writes(self, queries):
+        return [query for query in queries if '"django_session"' in query['sql'] and not query['sql'].startswith('SELECT')]
+
+    def set_activity(self, stored, cached):
+        """Put one last_activity in django_session and another in the session cache"""
+        session = DBSessionStore(self.session_key)
+        session['last_activity'] = stored.isoformat()
+        session.save()
+        caches[settings.SESSION_CACHE_ALIAS].set(
+            session_store.ACTIVITY_CACHE_PREFIX + self.session_key, cached.isoformat())
+
+    def test_requests_inside_window_do_not_write_session(self):
+        # The first request stamps last_activity into the row
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get().status_code, 200)
+        self.assertEqual(self.session_writes(queries.captured_queries), [])
+        cached = caches[settings.SESSION_CACHE_ALIAS].get(session_store.ACTIVITY_CACHE_PREFIX + self.session_key)
+        self.assertGreater(cached, Session.objects.get().get_decoded()['last_activity'])
+
+    def test_event_stream_does_not_write_session(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('event_stream'))
+            b''.join(response.streaming_content)
+        self.assertEqual(self.session_writes(queries.captured_queries), [])
+
+    @override_settings(SESSION_ACTIVITY_FLUSH_WINDOW=0)
+    def test_no_window_writes_every_request(self):
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.get()
+        self.assertEqual(len(self.session_writes(queries.captured_queries)), 1)
+
+    def test_fresh_cached_activity_keeps_session_alive(self):
+        now = timezone.now()
+        self.set_activity(stored=now - datetime.timedelta(hours=2), cached=now - datetime.timedelta(minutes=1))
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_idle_logout_uses_cached_activity(self):
+        now = timezone.now()
+        self.set_activity(stored=now - datetime.timedelta(hours=3), cached=now - datetime.timedelta(hours=2))
+        response = self.get()
+        self.assertRedirects(response, '/schoolApp/login/', fetch_redirect_response=False)
+        self.assertFalse(Session.objects.filter(session_key=self.session_key).exists())
+
+
+@override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_RETRY_AFTER=7)
+class HashingBusyTests(SchoolAppTestCase):
+    def setUp(self):
+        make_student()
+        # Every worker and queue slot taken
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        patcher = mock.patch.object(hashing, '_get_pool', return_value=(None, slots))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_api_login_answers_503_with_retry_after(self):
+        response = self.client.post(
+            reverse('api_login'),
+            json.dumps({'email': 'student@example.com', 'password': 'secret', 'role': 'student'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+
+    def test_login_form_answers_503_with_retry_after(self):
+        response = self.client.post(
+            reverse('login'), {'email': 'student@example.com', 'password': 'secret', 'role': 'student'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+
+
+class UserCacheTests(SchoolAppTestCase):
+    def setUp(self):
+        # Rolled-back rows send no signals and their ids are reused
+        user_cache.clear()
+        self.student = make_student()
+
+    def student_queries(self, queries):
+        return [query for query in queries if 'FROM "schoolApp_student"' in query['sql']]
+
+    def test_logged_in_user_loaded_once(self):
+        log_in(self.client, self.student, 'student')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('student_dashboard'))
+        self.assertEqual(len(self.student_queries(queries.captured_queries)), 1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(self.student_queries(queries.captured_queries), [])
+        self.assertEqual(response.context['student'], self.student)
+
+    def test_save_and_delete_invalidate(self):
+        user_cache.get_user('student', self.student.id)
+        self.student.first_name = 'Sasha'
+        self.student.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(user_cache.get_user('student', self.student.id).first_name, 'Sasha')
+        mentor = make_mentor()
+        user_cache.get_user('mentor', mentor.id)
+        mentor.delete()
+        self.assertIsNone(user_cache.get_user('mentor', mentor.id))
+
+    def test_hands_out_copies(self):
+        user_cache.get_user('student', self.student.id).first_name = 'Changed'
+        with self.assertNumQueries(0):
+            self.assertEqual(user_cache.get_user('student', self.student.id).first_name, 'Sam')
+
+
+@override_settings(SESSION_ACTIVITY_FLUSH_WINDOW=60)
+class StudentDashboardQueryTests(SchoolAppTestCase):
+    """The dashboard must not issue more queries as enrollments grow"""
+
+    # session load, stats aggregate, enrollments, available courses. The
+    # student row comes from the user cache and the session save is
+    # coalesced once the first request has warmed both.
+    EXPECTED_QUERIES = 4
+
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.student = make_student()
+        self.mentor = make_mentor()
+        log_in(self.client, self.student, 'student')
+
+    def enroll(self, count):
+        for i in range(count):
+            course = make_course(self.instructor, title=f'Course {i}')
+            enrollment = models.StudentCourse.objects.create(
+                student=self.student, course=course, enrollment_type='mentored',
+                mentor=self.mentor, status='completed' if i % 2 else 'in_progress',
+                progress=10 * i,
+            )
+            models.LearningPath.objects.create(student_course=enrollment, total_lessons=10)
+        # A few courses the student could still join
+        for i in range(3):
+            make_course(self.instructor, title=f'Open {count}-{i}')
+
+    def test_query_count_is_constant(self):
+        for count in (1, 8):
+            with self.subTest(enrollments=count):
+                self.enroll(count)
+                self.client.get(reverse('student_dashboard'))
+                with self.assertNumQueries(self.EXPECTED_QUERIES):
+                    response = self.client.get(reverse('student_dashboard'))
+                self.assertEqual(response.status_code, 200)
+
+    def test_statistics(self):
+        self.enroll(4)
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.context['total_courses'], 4)
+        self.assertEqual(response.context['completed_courses'], 2)
+        self.assertEqual(response.context['in_progress'], 2)
+        self.assertEqual(response.context['average_progress'], 15.0)
+
+    def test_statistics_without_enrollments(self):
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.context['total_courses'], 0)
+        self.assertEqual(response.context['average_progress'], 0)
+
+
+@override_settings(COURSE_CATALOG_PAGE_SIZE=3)
+class CatalogTests(SchoolAppTestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.courses = [make_course(self.instructor, title=f'Course {i}') for i in range(7)]
+
+    def test_keyset_pages_cover_catalog_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = catalog.get_page(cursor)
+            seen.extend(course.id for course in page['courses'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        expected = models.Course.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_saving_a_course_invalidates_cached_pages(self):
+        catalog.get_page()
+        with self.assertNumQueries(0):
+            catalog.get_page()
+        self.courses[-1].title = 'Renamed'
+        self.courses[-1].save()
+        titles = [course.title for course in catalog.get_page()['courses']]
+        self.assertIn('Renamed', titles)
+
+    def test_invalid_cursor_returns_first_page(self):
+        self.assertEqual(catalog.get_page('not-a-cursor')['courses'], catalog.get_page()['courses'])
+
+
+class CourseSearchTests(SchoolAppTestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.web = make_course(self.instructor, title='Web Development',
+                               description='Build websites with HTML and CSS')
+        self.data = make_course(self.instructor, title='Data Science',
+                                description='Statistics for web analytics')
+
+    def test_prefix_match_ranks_title_first(self):
+        self.assertEqual(search.search_ids('web'), [self.web.id, self.data.id])
+        self.assertEqual(search.search_ids('develop'), [self.web.id])
+
+    def test_index_follows_save_and_delete(self):
+        self.data.title = 'Machine Learning'
+        self.data.save()
+        self.assertEqual(search.search_ids('machine'), [self.data.id])
+        self.data.delete()
+        self.assertEqual(search.search_ids('machine'), [])
+
+    def test_endpoint(self):
+        response = self.client.get(reverse('course_search'), {'q': 'data sci'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['id'] for r in results], [self.data.id])
+        self.assertEqual(results[0]['url'], reverse('course_detail', args=[self.data.id]))
+
+
+class ConditionalGetTests(SchoolAppTestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.course = make_course(self.instructor, title='Web Development')
+        self.student = make_student()
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    def test_classes_page_returns_304_until_a_course_changes(self):
+        url = reverse('classes')
+        self.assertEqual(self.revalidate(url).status_code, 304)
+        etag = self.client.get(url)['ETag']
+        self.course.title = 'Web Development II'
+        self.course.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_course_detail_etag_follows_enrollment(self):
+        log_in(self.client, self.student, 'student')
+        url = reverse('course_detail', args=[self.course.id])
+        # The first response sets the CSRF cookie the ETag depends on
+        self.client.get(url)
+        response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        models.StudentCourse.objects.create(
+            student=self.student, course=self.course, enrollment_type='free',
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_enrolled'])
+
+    def test_login_state_changes_etag(self):
+        url = reverse('classes')
+        etag = self.client.get(url)['ETag']
+        log_in(self.client, self.student, 'student')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since_alone_never_validates(self):
+        # Enrolling leaves Course.updated_at alone, so a date can't tell the pages apart
+        log_in(self.client, self.student, 'student')
+        url = reverse('course_detail', args=[self.course.id])
+        self.assertNotIn('Last-Modified', self.client.get(url))
+        models.StudentCourse.objects.create(
+            student=self.student, course=self.course, enrollment_type='free',
+        )
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_enrolled'])
+
+
+class PageCacheTests(SchoolAppTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_page_served_from_cache(self):
+        url = reverse('about')
+        first = self.client.get(url)
+        self.assertTemplateUsed(first, 'schoolApp/about.html')
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertTemplateNotUsed(second, 'schoolApp/about.html')
+        self.assertEqual(first.content, second.content)
+        # Anonymous visitors no longer get a session stamped with last_activity
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, second.cookies)
+
+    def test_navbar_state_varies_the_key(self):
+        url = reverse('books')
+        anonymous = self.client.get(url)
+        student = make_student()
+        log_in(self.client, student, 'student')
+        logged_in = self.client.get(url)
+        self.assertNotEqual(anonymous.content, logged_in.content)
+        self.assertContains(logged_in, 'Sam Student')
+
+
+class CourseUpdateFanoutTests(SchoolAppTestCase):
+    def setUp(self):
+        self.course = make_course(make_instructor())
+        for i in range(5):
+            student = make_student(email=f'student{i}@example.com')
+            models.StudentCourse.objects.create(
+                student=student, course=self.course, enrollment_type='free',
+                status='dropped' if i == 4 else 'enrolled',
+            )
+
+    def test_course_save_queues_one_fanout(self):
+        self.course.title = 'Updated'
+        self.course.save()
+        self.course.save()
+        self.assertEqual(models.NotificationFanout.objects.count(), 1)
+        self.assertEqual(models.Notification.objects.count(), 0)
+
+    def test_resumes_after_partial_run(self):
+        job = fanout.enqueue_course_update(self.course)
+        self.assertEqual(fanout.process_batch(job.id, batch_size=3), 3)
+        # A new worker picks up where the first one stopped
+        self.assertEqual(fanout.process_pending(batch_size=3), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.delivered, 4)
+        notified = models.Notification.objects.filter(notification_type='course_update')
+        self.assertEqual(notified.values('student').distinct().count(), 4)
+
+
+class InboxTests(SchoolAppTestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = make_student()
+        self.mentor = make_mentor()
+        for i in range(3):
+            models.Message.objects.create(
+                sender_student=self.student, receiver_mentor=self.mentor,
+                subject=f'Question {i}', body='Help',
+            )
+        models.Notification.objects.create(
+            mentor=self.mentor, notification_type='message', title='New message', message='Hi',
+        )
+
+    def test_counts_follow_new_and_read_messages(self):
+        self.assertEqual(inbox.unread_counts('mentor', self.mentor.id), {'messages': 3, 'notifications': 1})
+        with self.assertNumQueries(0):
+            inbox.unread_counts('mentor', self.mentor.id)
+        models.Message.objects.create(
+            sender_student=self.student, receiver_mentor=self.mentor, subject='More', body='Help',
+        )
+        self.assertEqual(inbox.unread_counts('mentor', self.mentor.id)['messages'], 4)
+
+    def test_mark_read_endpoints(self):
+        log_in(self.client, self.mentor, 'mentor')
+        first = models.Message.objects.order_by('id').first()
+        response = self.client.post(
+            reverse('api_mark_messages_read'), {'ids': [first.id]}, content_type='application/json',
+        )
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(response.json()['unread'], {'messages': 2, 'notifications': 1})
+
+        response = self.client.post(reverse('api_mark_notifications_read'))
+        self.assertEqual(response.json()['unread'], {'messages': 2, 'notifications': 0})
+
+    def test_mark_read_requires_login(self):
+        response = self.client.post(reverse('api_mark_messages_read'))
+        self.assertEqual(response.status_code, 401)
+
+
+class MessageThreadTests(SchoolAppTestCase):
+    def setUp(self):
+        self.student = make_student()
+        self.mentor = make_mentor()
+        self.enrollment = models.StudentCourse.objects.create(
+            student=self.student, course=make_course(make_instructor()),
+            enrollment_type='mentored', mentor=self.mentor,
+        )
+        for i in range(7):
+            models.Message.objects.create(
+                sender_student=self.student, receiver_mentor=self.mentor,
+                student_course=self.enrollment, subject=f'Question {i}', body='Help',
+            )
+
+    def test_pages_walk_thread_newest_first(self):
+        seen = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(1):
+                page = threads.get_page(self.enrollment.id, cursor, page_size=3)
+                # Senders come with the page
+                self.assertTrue(all(message.sender_student.first_name for message in page['messages']))
+            seen += [message.subject for message in page['messages']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f'Question {i}' for i in reversed(range(7))])
+
+    def test_api_is_limited_to_participants(self):
+        url = reverse('api_message_thread', args=[self.enrollment.id])
+        log_in(self.client, self.mentor, 'mentor')
+        response = self.client.get(url, {'limit': 5})
+        self.assertEqual(len(response.json()['messages']), 5)
+        self.assertIsNotNone(response.json()['next_cursor'])
+
+        log_in(self.client, make_mentor(email='other@example.com'), 'mentor')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class EventStreamTests(SchoolAppTestCase):
+    def setUp(self):
+        self.mentor = make_mentor()
+        log_in(self.client, self.mentor, 'mentor')
+
+    async def test_stream_pushes_published_events(self):
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get(reverse('event_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertIn(b'event: unread', await anext(stream))
+
+        # Publishers run in sync worker threads
+        await sync_to_async(events.publish, thread_sensitive=False)(
+            'mentor', self.mentor.id, {'type': 'notification', 'id': 1},
+        )
+        frame = await asyncio.wait_for(anext(stream), 1)
+        self.assertTrue(frame.startswith(b'event: notification\n'))
+        await self.disconnect(stream)
+        self.assertEqual(events.subscriber_count(), 0)
+
+    async def test_enrollment_pushes_notification_to_open_stream(self):
+        self.async_client.cookies = self.client.cookies
+        stream = (await self.async_client.get(reverse('event_stream'))).streaming_content
+        await anext(stream)
+        student = await sync_to_async(make_student)()
+        course = await sync_to_async(make_course)(await sync_to_async(make_instructor)())
+
+        def enroll():
+            with self.captureOnCommitCallbacks(execute=True):
+                enrollment.enroll(student.id, course.id, 'mentored', self.mentor.id)
+
+        await sync_to_async(enroll)()
+        frame = await asyncio.wait_for(anext(stream), 1)
+        self.assertTrue(frame.startswith(b'event: notification\n'))
+        self.assertIn(course.title.encode(), frame)
+        await self.disconnect(stream)
+
+    async def disconnect(self, stream):
+        # The ASGI handler cancels the response when the client disconnects
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+    def test_wsgi_falls_back_to_polling(self):
+        response = self.client.get(reverse('event_stream'))
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('retry: ', body)
+        self.assertIn('"messages": 0', body)
+
+    def test_requires_login(self):
+        self.client.session.flush()
+        self.client.cookies.clear()
+        self.assertEqual(self.client.get(reverse('event_stream')).status_code, 401)
+
+    def test_reconnects_do_not_count_as_activity(self):
+        idle_since = (timezone.now() - datetime.timedelta(minutes=20)).isoformat()
+        session = self.client.session
+        session['last_activity'] = idle_since
+        session.save()
+        b''.join(self.client.get(reverse('event_stream')).streaming_content)
+        self.assertEqual(self.client.session['last_activity'], idle_since)
+        self.client.get(reverse('api_unread_counts'))
+        self.assertGreater(self.client.session['last_activity'], idle_since)
+
+
+@override_settings(NEWSLETTER_SEND_RATE=0)
+class NewsletterCampaignTests(SchoolAppTestCase):
+    def setUp(self):
+        for i in range(5):
+            models.Newsletter.objects.create(email=f'reader{i}@example.com', is_active=i != 2)
+        self.campaign = campaigns.create('New courses', 'Check them out')
+
+    def test_sends_to_active_subscribers_in_batches(self):
+        self.assertEqual(campaigns.send(self.campaign.id, batch_size=3), 4)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [
+            'reader0@example.com', 'reader1@example.com', 'reader3@example.com', 'reader4@example.com',
+        ])
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent), ('done', 4))
+
+    def test_resumes_after_last_saved_batch(self):
+        # A previous run got through the first two subscribers before crashing
+        second = models.Newsletter.objects.order_by('id')[1]
+        self.campaign.last_subscriber_id = second.id
+        self.campaign.sent = 2
+        self.campaign.save()
+        self.assertEqual(campaigns.send_pending(batch_size=3), 2)
+        self.assertEqual([m.to[0] for m in mail.outbox], ['reader3@example.com', 'reader4@example.com'])
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.sent, 4)
+
+    def test_refused_address_fails_alone(self):
+        sent = campaigns.send(
+            self.campaign.id, batch_size=3, backend='schoolApp.tests.FlakyEmailBackend',
+            refused=['reader1@example.com'],
+        )
+        self.assertEqual(sent, 3)
+        self.assertEqual([m.to[0] for m in mail.outbox], [
+            'reader0@example.com', 'reader3@example.com', 'reader4@example.com',
+        ])
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.sent, self.campaign.failed), (3, 1))
+
+    def test_lost_connection_resumes_without_duplicates_or_gaps(self):
+        # Every connection drops after one message: the batch gets two, then gives up
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            campaigns.send(self.campaign.id, batch_size=3, backend='schoolApp.tests.FlakyEmailBackend', drop_after=1)
+        self.campaign.refresh_from_db()
+        reader1 = models.Newsletter.objects.get(email='reader1@example.com')
+        self.assertEqual((self.campaign.last_subscriber_id, self.campaign.sent), (reader1.id, 2))
+        campaigns.send_pending(batch_size=3)
+        self.assertEqual([m.to[0] for m in mail.outbox], [
+            'reader0@example.com', 'reader1@example.com', 'reader3@example.com', 'reader4@example.com',
+        ])
+
+
+@override_settings(TASK_RETRY_BACKOFF=0)
+class TaskOutboxTests(SchoolAppTestCase):
+    def test_newsletter_signup_queues_welcome_email(self):
+        response = self.client.post(reverse('newsletter_signup'), {'email': 'reader@example.com'})
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(tasks.run_pending(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+
+    def test_message_notification_is_created_on_commit(self):
+        # Not queued: the worker's saves never reach the web process's streams
+        student = make_student()
+        mentor = make_mentor()
+        enrollment = models.StudentCourse.objects.create(
+            student=student, course=make_course(make_instructor()),
+            enrollment_type='mentored', mentor=mentor,
+        )
+        log_in(self.client, student, 'student')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('send_message', args=[enrollment.id]), {'subject': 'Hi', 'body': 'Question'})
+        self.assertFalse(models.Task.objects.exists())
+        self.assertEqual(models.Notification.objects.get().mentor, mentor)
+
+    def test_notification_handlers_are_safe_to_rerun(self):
+        # A reclaimed lease runs the handler again
+        student = make_student()
+        mentor = make_mentor()
+        enrolled = enrollment.enroll(student.id, make_course(make_instructor()).id, 'mentored', mentor.id)
+        message = models.Message.objects.create(
+            sender_student=student, receiver_mentor=mentor, student_course=enrolled, subject='Hi', body='Question')
+        for _ in range(2):
+            tasks.notify_enrollment(enrolled.id)
+            tasks.notify_message(message.id)
+        self.assertEqual(
+            sorted(models.Notification.objects.values_list('source', flat=True)),
+            [f'enrollment:{enrolled.id}', f'message:{message.id}'],
+        )
+
+    def test_failed_task_is_retried_then_given_up(self):
+        calls = []
+
+        @tasks.handler('flaky')
+        def flaky():
+            calls.append(1)
+            raise RuntimeError('SMTP down')
+
+        try:
+            task = tasks.enqueue('flaky')
+            task.max_attempts = 2
+            task.save()
+            self.assertEqual(tasks.run_pending(), (0, 2))
+        finally:
+            del tasks.HANDLERS['flaky']
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts, len(calls)), ('failed', 2, 2))
+        self.assertEqual(task.last_error, 'RuntimeError: SMTP down')
+
+
+class EnrollmentTests(SchoolAppTestCase):
+    def setUp(self):
+        self.instructor = make_instructor(email='mentor@example.com')
+        self.course = make_course(self.instructor)
+        self.student = make_student()
+        self.mentor = make_mentor()
+
+    def test_enroll_relies_on_unique_constraint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.enroll(self.student.id, self.course.id, 'mentored', self.mentor.id)
+            with self.assertRaises(enrollment.AlreadyEnrolled):
+                enrollment.enroll(self.student.id, self.course.id)
+        self.assertEqual(models.LearningPath.objects.count(), 1)
+        self.assertEqual(models.Notification.objects.filter(mentor=self.mentor).count(), 1)
+
+    def test_enroll_view_reports_double_enrollment(self):
+        log_in(self.client, self.student, 'student')
+        url = reverse('enroll_course', args=[self.course.id])
+        self.assertRedirects(self.client.post(url, {'enrollment_type': 'free'}), reverse('student_dashboard'),
+                             fetch_redirect_response=False)
+        response = self.client.post(url, {'enrollment_type': 'free'})
+        self.assertRedirects(response, reverse('course_detail', args=[self.course.id]), fetch_redirect_response=False)
+        self.assertEqual(models.StudentCourse.objects.count(), 1)
+
+    def test_bulk_enroll_skips_existing(self):
+        students = [make_student(email=f'bulk{i}@example.com') for i in range(5)]
+        enrollment.enroll(students[0].id, self.course.id)
+        ids = [student.id for student in students]
+        self.assertEqual(enrollment.bulk_enroll(self.course.id, ids, batch_size=2), 4)
+        self.assertEqual(models.StudentCourse.objects.filter(course=self.course).count(), 5)
+        self.assertEqual(models.LearningPath.objects.count(), 5)
+
+    def test_bulk_endpoint_accepts_emails_for_own_course(self):
+        make_student(email='bulk@example.com')
+        log_in(self.client, self.mentor, 'mentor')
+        url = reverse('api_bulk_enroll', args=[self.course.id])
+        response = self.client.post(
+            url, {'emails': ['bulk@example.com', 'nobody@example.com'], 'student_ids': [self.student.id]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'success': True, 'enrolled': 2, 'invalid': ['nobody@example.com']})
+
+        # An unknown id no longer fails the whole batch at commit
+        other = make_student(email='other@example.com')
+        response = self.client.post(url, {'student_ids': [other.id, 99999]}, content_type='application/json')
+        self.assertEqual(response.json(), {'success': True, 'enrolled': 1, 'invalid': [99999]})
+        self.assertTrue(models.StudentCourse.objects.filter(student=other, course=self.course).exists())
+
+        other_course = make_course(make_instructor(email='someone@example.com'))
+        response = self.client.post(reverse('api_bulk_enroll', args=[other_course.id]), {},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+class ImporterTests(SchoolAppTestCase):
+    def rows(self, *rows):
+        return list(enumerate(rows, 2))
+
+    def test_import_users_validates_and_skips_existing(self):
+        make_student(email='taken@example.com')
+        errors = []
+        stats = importer.import_users(self.rows(
+            {'first_name': 'A', 'last_name': 'B', 'email': 'new@example.com', 'phone_number': '1', 'password': 'secret1'},
+            {'first_name': 'A', 'last_name': 'B', 'email': 'taken@example.com', 'phone_number': '1', 'password': 'secret1'},
+            {'first_name': 'A', 'last_name': 'B', 'email': 'short@example.com', 'phone_number': '1', 'password': 'abc'},
+            {'first_name': 'M', 'last_name': 'B', 'email': 'm@example.com', 'phone_number': '1', 'password': 'secret1',
+             'role': 'mentor', 'expertise': 'Math'},
+        ), role='student', batch_size=2, on_error=lambda line, message: errors.append((line, message)))
+        self.assertEqual(stats, {'rows': 4, 'created': 2, 'existing': 1, 'invalid': 1})
+        self.assertEqual(errors, [(4, 'Password must be at least 6 characters long')])
+        self.assertTrue(models.Student.objects.get(email='new@example.com').check_password('secret1'))
+        self.assertEqual(models.Mentor.objects.get(email='m@example.com').expertise, 'Math')
+
+    def test_import_users_counts_rows_registered_meanwhile_as_existing(self):
+        class RacingPool:
+            # Someone registers while the hashes are computed
+            def map(self, fn, items, chunksize=1):
+                make_student(email='race@example.com')
+                return map(fn, items)
+
+        stats = importer.import_users(self.rows(
+            {'first_name': 'A', 'last_name': 'B', 'email': 'new@example.com', 'phone_number': '1', 'password': 'secret1'},
+            {'first_name': 'A', 'last_name': 'B', 'email': 'race@example.com', 'phone_number': '1', 'password': 'secret1'},
+        ), role='student', pool=RacingPool())
+        self.assertEqual(stats, {'rows': 2, 'created': 1, 'existing': 1, 'invalid': 0})
+        self.assertEqual(models.Student.objects.get(email='race@example.com').password, '!')
+
+    def test_import_courses_is_idempotent_and_indexed(self):
+        make_mentor(email='teacher@example.com')
+        row = {'title': 'Algebra Basics', 'description': 'Numbers', 'instructor_email': 'teacher@example.com',
+               'start_date': '2025-01-01', 'end_date': '2025-02-01', 'course_type': 'free', 'price': '10'}
+
+        def cached():
+            return querycache.fetch(models.Course.objects.filter(title='Algebra Basics'), 'test-import')
+
+        self.assertEqual(cached(), [])
+        self.assertEqual(importer.import_courses(self.rows(row))['created'], 1)
+        self.assertEqual(importer.import_courses(self.rows(row))['existing'], 1)
+        # bulk_create sent no signal, but the cached empty result is gone
+        self.assertEqual(len(cached()), 1)
+        course = models.Course.objects.get()
+        self.assertEqual((course.instructor.email, course.price), ('teacher@example.com', 0))
+        self.assertEqual(search.search_ids('algebra'), [course.id])
+
+
+class ProgressExportTests(SchoolAppTestCase):
+    def test_streams_mentored_students_in_one_query(self):
+        mentor = make_mentor()
+        instructor = make_instructor()
+        for i in range(3):
+            student = make_student(email=f'export{i}@example.com')
+            enrollment.enroll(student.id, make_course(instructor, title=f'Course {i}').id, 'mentored', mentor.id)
+        models.Student.objects.filter(email='export0@example.com').update(first_name='=cmd()')
+        log_in(self.client, mentor, 'mentor')
+        response = self.client.get(reverse('mentor_progress_export'))
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('First Name,Last Name,Email,Course'))
+        self.assertTrue(lines[1].startswith("'=cmd(),Student,export0@example.com,Course 0,mentored,enrolled,0,"))
+
+
+class LessonProgressTests(SchoolAppTestCase):
+    def setUp(self):
+        self.student = make_student()
+        self.enrollment = enrollment.enroll(self.student.id, make_course(make_instructor()).id)
+
+    def post(self, events):
+        return self.client.post(reverse('api_lesson_progress'), {'events': events}, content_type='application/json')
+
+    def test_running_mean_and_status_transitions(self):
+        log_in(self.client, self.student, 'student')
+        eid = self.enrollment.id
+        response = self.post([
+            {'enrollment_id': eid, 'score': 80},
+            {'enrollment_id': eid, 'score': 90},
+            {'enrollment_id': eid, 'lessons_completed': 2},
+        ])
+        self.assertEqual(response.json()['enrollments'], [{'enrollment_id': eid, 'progress': 40, 'status': 'in_progress'}])
+        self.post([{'enrollment_id': eid, 'lessons_completed': 6, 'score': 100}])
+
+        path = models.LearningPath.objects.get(student_course_id=eid)
+        self.assertEqual((path.completed_lessons, path.scored_lessons), (10, 3))
+        self.assertAlmostEqual(path.average_score, 90.0)
+        self.assertIsNotNone(path.last_accessed)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.status, self.enrollment.progress), ('completed', 100))
+        self.assertIsNotNone(self.enrollment.completed_date)
+
+    def test_equal_totals_share_one_update(self):
+        course = make_course(make_instructor(email='second@example.com'), title='Second')
+        second = enrollment.enroll(self.student.id, course.id)
+        now = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            progress.apply([progress.parse_event({'enrollment_id': eid, 'score': 70}, now)
+                            for eid in (self.enrollment.id, second.id)])
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(sum('"schoolApp_learningpath"' in sql for sql in updates), 1)
+        self.assertEqual(sum('"schoolApp_studentcourse"' in sql for sql in updates), 1)
+        self.assertEqual(list(models.LearningPath.objects.values_list('completed_lessons', 'average_score')),
+                         [(1, 70.0), (1, 70.0)])
+
+    def test_other_students_enrollments_are_rejected(self):
+        log_in(self.client, make_student(email='other@example.com'), 'student')
+        response = self.post([{'enrollment_id': self.enrollment.id, 'score': 50}])
+        self.assertEqual(response.json()['rejected'], [self.enrollment.id])
+        self.assertEqual(models.LearningPath.objects.get().scored_lessons, 0)
+        self.assertEqual(self.post([{'enrollment_id': self.enrollment.id, 'score': 500}]).status_code, 400)
+
+
+class CourseAnalyticsTests(SchoolAppTestCase):
+    def snapshot(self):
+        return (
+            list(models.CourseStats.objects.order_by('course_id').values()),
+            list(models.CourseDailyStats.objects.order_by('course_id', 'date').values(
+                'course_id', 'date', 'enrollments', 'completions',
+            )),
+        )
+
+    def test_incremental_rollups_match_rebuild(self):
+        mentor = make_mentor()
+        course = make_course(make_instructor())
+        students = [make_student(email=f'stats{i}@example.com') for i in range(4)]
+        first = enrollment.enroll(students[0].id, course.id, 'mentored', mentor.id)
+        enrollment.bulk_enroll(course.id, [student.id for student in students[1:]])
+        progress.apply([
+            progress.parse_event({'enrollment_id': first.id, 'lessons_completed': 10}),
+            progress.parse_event({'enrollment_id': first.id + 1, 'lessons_completed': 3}),
+        ])
+        dropped = models.StudentCourse.objects.get(student=students[3])
+        dropped.status = 'dropped'
+        dropped.save()
+        models.StudentCourse.objects.get(student=students[2]).delete()
+
+        stats = models.CourseStats.objects.get(course=course)
+        self.assertEqual(
+            (stats.enrolled, stats.in_progress, stats.completed, stats.dropped, stats.mentored, stats.free),
+            (0, 1, 1, 1, 1, 2),
+        )
+        self.assertEqual(stats.progress_sum, 130)
+        self.assertEqual(models.CourseDailyStats.objects.get(course=course).completions, 1)
+        incremental = self.snapshot()
+        analytics.rebuild()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_partially_loaded_rows_are_diffed_not_recounted(self):
+        course = make_course(make_instructor())
+        enrolled = enrollment.enroll(make_student().id, course.id)
+        loaded = models.StudentCourse.objects.only('id', 'progress').get(pk=enrolled.pk)
+        # Nothing is snapshotted until a save needs it
+        self.assertFalse(hasattr(loaded, '_analytics_state'))
+        loaded.progress = 40
+        with CaptureQueriesContext(connection) as queries:
+            loaded.save(update_fields=['progress'])
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(models.CourseStats.objects.get(course=course).progress_sum, 40)
+        models.StudentCourse.objects.only('id').get(pk=enrolled.pk).delete()
+        stats = models.CourseStats.objects.get(course=course)
+        self.assertEqual((stats.enrolled, stats.free, stats.progress_sum), (0, 0, 0))
+
+    def test_backfill_migration_matches_rebuild(self):
+        course = make_course(make_instructor())
+        enrollment.bulk_enroll(course.id, [make_student(email=f'old{i}@example.com').id for i in range(3)])
+        progress.apply([progress.parse_event({'enrollment_id': models.StudentCourse.objects.first().id,
+                                              'lessons_completed': 10})])
+        analytics.rebuild()
+        expected = self.snapshot()
+        # Enrollments from before 0013 have no rollups at all
+        models.CourseStats.objects.all().delete()
+        models.CourseDailyStats.objects.all().delete()
+        backfill = importlib.import_module('schoolApp.migrations.0017_backfill_course_stats')
+        backfill.recount_course_stats(django_apps, None)
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_view_reads_only_rollups(self):
+        mentor = make_mentor()
+        instructor = make_instructor(email=mentor.email)
+        for i in range(3):
+            course = make_course(instructor, title=f'Course {i}')
+            enrollment.enroll(make_student(email=f'view{i}@example.com').id, course.id)
+        make_course(instructor, title='Empty')
+        log_in(self.client, mentor, 'mentor')
+        self.client.get(reverse('mentor_course_analytics'))
+        # Session, courses joined with their stats, daily totals (the mentor is cached)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('mentor_course_analytics'))
+        self.assertEqual([row['stats'].total() for row in response.context['rows']], [1, 1, 1, 0])
+        self.assertEqual(list(response.context['daily'])[0]['enrollments'], 3)
+
+
+@override_settings(MENTOR_MATCH_COUNT=2, MENTOR_MAX_ACTIVE_STUDENTS=2)
+class MentorMatchingTests(SchoolAppTestCase):
+    def test_loads_follow_enrollment_changes(self):
+        mentor = make_mentor()
+        course = make_course(make_instructor())
+        first = enrollment.enroll(make_student(email='load1@example.com').id, course.id, 'mentored', mentor.id)
+        enrollment.bulk_enroll(course.id, [make_student(email='load2@example.com').id], 'mentored', mentor.id)
+        self.assertEqual(models.MentorLoad.objects.get(mentor=mentor).active_students, 2)
+        progress.apply([progress.parse_event({'enrollment_id': first.id, 'lessons_completed': 10})])
+        self.assertEqual(models.MentorLoad.objects.get(mentor=mentor).active_students, 1)
+        course.delete()
+        self.assertEqual(models.MentorLoad.objects.get(mentor=mentor).active_students, 0)
+
+    def test_ranks_by_expertise_then_load(self):
+        course = make_course(make_instructor(), title='Python for Data Science')
+        busy = make_mentor(email='busy@example.com')
+        idle = make_mentor(email='idle@example.com')
+        models.Mentor.objects.filter(id=idle.id).update(expertise='Data science, Python')
+        full = make_mentor(email='full@example.com')
+        models.Mentor.objects.filter(id=full.id).update(expertise='Data science, Python')
+        other = make_mentor(email='other@example.com')
+        models.Mentor.objects.filter(id=other.id).update(expertise='Pottery')
+        models.MentorLoad.objects.create(mentor=busy, active_students=1)
+        models.MentorLoad.objects.create(mentor=full, active_students=2)
+
+        ranked = list(matching.rank(course))
+        self.assertEqual(ranked, [idle, busy, other, full])
+        self.assertEqual([mentor.expertise_match for mentor in ranked], [3, 1, 0, 3])
+
+        student = make_student()
+        log_in(self.client, student, 'student')
+        response = self.client.get(reverse('enroll_course', args=[course.id]))
+        self.assertEqual(list(response.context['mentors']), [idle, busy])
+
+
+@override_settings(RECOMMENDATION_MIN_COMMON_STUDENTS=1, RECOMMENDATION_COUNT=2)
+class RecommendationTests(SchoolAppTestCase):
+    def setUp(self):
+        cache.clear()
+        instructor = make_instructor()
+        self.python, self.django, self.sql, self.art = [
+            make_course(instructor, title=title) for title in ('Python', 'Django', 'SQL', 'Art')
+        ]
+        # Django is taken with Python more often than SQL is; Art is popular on its own
+        students = [make_student(email=f'rec{i}@example.com') for i in range(6)]
+        for student, courses in zip(students, [
+            [self.python, self.django], [self.python, self.django], [self.python, self.sql],
+            [self.art], [self.art], [self.art],
+        ]):
+            for course in courses:
+                enrollment.enroll(student.id, course.id)
+        self.assertEqual(recommendations.rebuild()[0], 4)
+
+    def test_ranks_co_enrolled_courses_then_popular_ones(self):
+        # Lists are cached per student, so each case uses a new one
+        self.assertEqual(recommendations.for_student(make_student().id, [self.python.id]), [self.django, self.sql])
+        sql_student = make_student(email='sql@example.com')
+        self.assertEqual(recommendations.for_student(sql_student.id, [self.sql.id]), [self.python, self.art])
+        new_student = make_student(email='new@example.com')
+        self.assertEqual(recommendations.for_student(new_student.id, []), [self.art, self.python])
+
+    def test_dashboard_serves_cached_list(self):
+        student = make_student()
+        enrollment.enroll(student.id, self.python.id)
+        log_in(self.client, student, 'student')
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.context['available_courses'], [self.django, self.sql])
+        # Enrolling elsewhere skips that course without recomputing; only the courses are loaded
+        enrollment.enroll(student.id, self.django.id)
+        with self.assertNumQueries(1):
+            ranked = recommendations.for_student(student.id, [self.python.id, self.django.id], count=1)
+        self.assertEqual(ranked, [self.sql])
+
+
+class ViewBudgetTests(SchoolAppTestCase):
+    def test_every_view_within_its_query_budget(self):
+        cache.clear()
+        benchmark.seed(courses=30, students=40, mentors=3, enrollments=300, messages=30, notifications=30)
+        results = benchmark.run(repeat=1, timings=False)
+        self.assertEqual(len(results), len([pattern for pattern in urls.urlpatterns if pattern.name]))
+        self.assertEqual({result['name']: result['violations'] for result in results if result['violations']}, {})
+
+
+class SQLiteTuningTests(SchoolAppTestCase):
+    @override_settings(SQLITE_TUNING=True)
+    def test_new_connections_get_pragmas(self):
+        connection = connections.create_connection('default')
+        try:
+            with connection.cursor() as cursor:
+                pragmas = {}
+                for name in ('synchronous', 'temp_store', 'busy_timeout'):
+                    cursor.execute(f'PRAGMA {name}')
+                    pragmas[name] = cursor.fetchone()[0]
+            # NORMAL and MEMORY
+            self.assertEqual(pragmas, {'synchronous': 1, 'temp_store': 2, 'busy_timeout': 5000})
+            with override_settings(SQLITE_OPTIMIZE_INTERVAL=0):
+                self.assertTrue(sqlite.optimize_if_due(connection))
+            self.assertFalse(sqlite.optimize_if_due(connection))
+        finally:
+            connection.close()
+
+    @override_settings(SQLITE_TUNING=True)
+    def test_first_connection_optimizes(self):
+        connection = connections.create_connection('default')
+        try:
+            with mock.patch.object(sqlite, '_last_optimize', None):
+                self.assertTrue(sqlite.optimize_if_due(connection))
+                self.assertFalse(sqlite.optimize_if_due(connection))
+        finally:
+            connection.close()
+
+    def test_off_by_default(self):
+        connection = connections.create_connection('default')
+        try:
+            self.assertFalse(sqlite.enabled(connection))
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous')
+                # FULL, SQLite's default
+                self.assertEqual(cursor.fetchone()[0], 2)
+        finally:
+            connection.close()
+
+
+@override_settings(DATABASE_REPLICA_URL='sqlite:///replica.sqlite3')
+class ReplicaRoutingTests(SchoolAppTestCase):
+    router = replica.ReplicaRouter()
+
+    def tearDown(self):
+        replica.end()
+
+    def test_reads_views_use_replica_until_they_write(self):
+        replica.begin()
+        self.assertEqual(self.router.db_for_read(models.Course), replica.DEFAULT)
+
+        @replica.reads
+        def view(request):
+            self.assertEqual(self.router.db_for_read(models.Course), replica.REPLICA)
+            self.assertEqual(self.router.db_for_read(Session), replica.DEFAULT)
+            with replica.primary():
+                self.assertEqual(self.router.db_for_read(models.Course), replica.DEFAULT)
+            self.assertEqual(self.router.db_for_read(models.Course), replica.REPLICA)
+            self.assertEqual(self.router.db_for_write(models.StudentCourse), replica.DEFAULT)
+            self.assertEqual(self.router.db_for_read(models.Course), replica.DEFAULT)
+
+        view(None)
+        self.assertTrue(replica.end())
+
+    def test_replica_reads_end_with_the_view(self):
+        replica.begin()
+        view = replica.reads(mock.Mock(side_effect=RuntimeError))
+        with self.assertRaises(RuntimeError):
+            view(None)
+        replica.reads(lambda request: None)(None)
+        # e.g. the middleware after the view
+        self.assertEqual(self.router.db_for_read(models.Course), replica.DEFAULT)
+
+    def test_pinned_requests_read_from_primary(self):
+        replica.begin(pinned=True)
+
+        @replica.reads
+        def view(request):
+            self.assertEqual(self.router.db_for_read(models.Course), replica.DEFAULT)
+
+        view(None)
+        self.assertFalse(replica.end())
+        # Outside a request, e.g. management commands
+        self.assertEqual(self.router.db_for_read(models.Course), replica.DEFAULT)
+
+    def test_write_pins_user_to_primary(self):
+        student = make_student()
+        course = make_course(make_instructor())
+        log_in(self.client, student, 'student')
+        response = self.client.post(reverse('enroll_course', args=[course.id]), {'enrollment_type': 'free'})
+        self.assertEqual(response.cookies[settings.REPLICA_PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+        with override_settings(DATABASE_REPLICA_URL=''):
+            response = self.client.post(reverse('newsletter_signup'), {'email': 'new@example.com'},
+                                        content_type='application/json')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+
+class TieredCacheTests(SchoolAppTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tiered(self, name='a', **options):
+        # L1s are shared per cache name, so a new name stands in for another process
+        return tiered_cache.TieredCache(f'test-{self._testMethodName}-{name}', {'OPTIONS': {'L2': 'shared', **options}})
+
+    def test_reads_fall_through_to_shared_tier(self):
+        tiered, other = self.tiered(), self.tiered('other', L1_TIMEOUT=0)
+        tiered.set('key', 'value')
+        self.assertEqual(tiered.get('key'), 'value')
+        # Another process changes the shared tier; this one's L1 hides it for L1_TIMEOUT
+        caches['shared'].set('key', 'changed')
+        self.assertEqual(tiered.get('key'), 'value')
+        self.assertEqual(other.get('key'), 'changed')
+        self.assertIsNone(other.get('missing'))
+        self.assertEqual(tiered.stats(), {'l1_hits': 2, 'l2_hits': 0, 'misses': 0, 'evictions': 0, 'entries': 1})
+        self.assertEqual((other.stats()['l2_hits'], other.stats()['misses']), (1, 1))
+
+    def test_l1_evicts_least_recently_used(self):
+        tiered = self.tiered(MAX_ENTRIES=2)
+        tiered.set('a', 1)
+        tiered.set('b', 2)
+        tiered.get('a')
+        tiered.set('c', 3)
+        self.assertEqual(tiered.stats()['evictions'], 1)
+        # b was evicted from L1 only
+        self.assertEqual((tiered.get('a'), tiered.get('b')), (1, 2))
+        self.assertEqual(tiered.stats()['l2_hits'], 1)
+
+    def test_default_timeout_is_this_alias(self):
+        tiered = tiered_cache.TieredCache('test-timeout', {'TIMEOUT': 30, 'OPTIONS': {'L2': 'shared'}})
+        with mock.patch.object(caches['shared'], 'set') as l2_set:
+            tiered.set('key', 'value')
+        self.assertEqual(l2_set.call_args.args[2], 30)
+
+    def test_incr_and_delete_reach_both_tiers(self):
+        tiered = self.tiered()
+        tiered.set('count', 1)
+        self.assertEqual(tiered.incr('count'), 2)
+        self.assertEqual((tiered.get('count'), caches['shared'].get('count')), (2, 2))
+        tiered.delete('count')
+        self.assertIsNone(tiered.get('count'))
+
+    def test_tests_never_touch_the_shared_cache(self):
+        self.assertIsInstance(caches['shared'], locmem_cache.LocMemCache)
+
+    def test_stats_endpoint(self):
+        cache.get('missing')
+        url = reverse('api_cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        log_in(self.client, make_mentor(), 'mentor')
+        self.assertGreaterEqual(self.client.get(url).json()['caches']['default']['misses'], 1)
+
+    @override_settings(CACHE_STATS_ALLOWED_IPS=['10.0.0.9'])
+    def test_stats_endpoint_answers_allowed_scraper(self):
+        url = reverse('api_cache_stats')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.9').status_code, 200)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.8').status_code, 401)
+
+
+class ShardedFileCacheTests(SimpleTestCase):
+    def test_each_shard_is_capped_separately(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = file_cache.ShardedFileCache(location, {'OPTIONS': {'MAX_ENTRIES': 40, 'SHARDS': 4}})
+        for i in range(200):
+            shared.set(f'key{i}', i)
+        self.assertEqual(shared.get('key199'), 199)
+        self.assertEqual(len(os.listdir(location)), 4)
+        for shard in os.listdir(location):
+            # A write culls its own shard once it holds MAX_ENTRIES / SHARDS files
+            self.assertLessEqual(len(os.listdir(os.path.join(location, shard))), 10)
+        shared.clear()
+        self.assertIsNone(shared.get('key199'))
+
+    def test_concurrent_incr_loses_no_bump(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        file_cache.ShardedFileCache(location, {}).set('version', 0)
+
+        def bump():
+            # A backend of its own stands in for another worker
+            worker = file_cache.ShardedFileCache(location, {})
+            for _ in range(25):
+                worker.incr('version')
+
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(file_cache.ShardedFileCache(location, {}).get('version'), 100)
+
+
+class QuerysetCacheTests(SchoolAppTestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = make_instructor()
+        self.course = make_course(self.instructor, title='Python')
+
+    def courses(self):
+        queryset = models.Course.objects.select_related('instructor').filter(id=self.course.id)
+        return querycache.fetch(queryset, 'test-course', self.course.id)
+
+    def test_cached_until_a_table_it_reads_changes(self):
+        with self.assertNumQueries(1):
+            self.courses()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.courses()[0].instructor.first_name, 'Ada')
+        make_mentor()
+        with self.assertNumQueries(0):
+            self.courses()
+        self.instructor.first_name = 'Grace'
+        self.instructor.save()
+        self.assertEqual(self.courses()[0].instructor.first_name, 'Grace')
+
+    def test_refuses_other_tables(self):
+        with self.assertRaises(ValueError):
+            querycache.fetch(models.Course.objects.select_related('stats'), 'test-course-stats')
+
+    def test_course_detail_uses_cached_course(self):
+        self.client.get(reverse('course_detail', args=[self.course.id]))
+        with self.assertNumQueries(1):
+            # Only the conditional GET's freshness check
+            self.client.get(reverse('course_detail', args=[self.course.id]))
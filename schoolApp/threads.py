@@ -0,0 +1,66 @@
+"""
+Message threads, one per StudentCourse.
+
+A thread is read newest first in keyset pages on (created_at, id) within
+the enrollment, served by the msg_thread_idx index, so page N of a long
+conversation costs the same single query as page 1. Cursors use the same
+format as the course catalog.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+
+from . import catalog, models
+
+
+def is_participant(request, enrollment):
+    """Only the enrolled student and their assigned mentor can read a thread"""
+    role = request.session.get('user_role')
+    user_id = request.session.get('user_id')
+    if role == 'student':
+        return enrollment.student_id == user_id
+    if role == 'mentor':
+        return enrollment.mentor_id is not None and enrollment.mentor_id == user_id
+    return False
+
+
+def get_page(enrollment_id, cursor=None, page_size=None):
+    """
+    Return {'messages': [...], 'next_cursor': str or None} with the newest
+    messages older than cursor.
+    """
+    page_size = page_size or settings.MESSAGE_THREAD_PAGE_SIZE
+    rows = (
+        models.Message.objects
+        .filter(student_course_id=enrollment_id)
+        .select_related('sender_student', 'sender_mentor', 'receiver_student', 'receiver_mentor')
+        .order_by('-created_at', '-id')
+    )
+    position = catalog.decode_cursor(cursor)
+    if position:
+        created_at, message_id = position
+        rows = rows.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id))
+    rows = list(rows[:page_size + 1])
+    return {
+        'messages': rows[:page_size],
+        'next_cursor': catalog.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None,
+    }
+
+
+def serialize(message):
+    """JSON form of a message for the thread API"""
+    if message.sender_student_id:
+        sender = message.sender_student
+        sender_role = 'student'
+    else:
+        sender = message.sender_mentor
+        sender_role = 'mentor'
+    return {
+        'id': message.id,
+        'subject': message.subject,
+        'body': message.body,
+        'sender_role': sender_role,
+        'sender_name': f'{sender.first_name} {sender.last_name}' if sender else '',
+        'is_read': message.is_read,
+        'created_at': message.created_at.isoformat(),
+    }
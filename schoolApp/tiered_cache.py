@@ -0,0 +1,160 @@
+"""
+Two-tier cache backend.
+
+TieredCache keeps a per-process LRU (L1) in front of a cache every worker
+shares (L2, another CACHES alias: the file-based cache, the database cache
+table or Redis). Reads try L1, then L2, and copy L2 hits into L1; writes
+and deletes go to both. An L1 entry lives at most L1_TIMEOUT seconds,
+which bounds how long a change made by another process can go unseen
+here; changes made in this process are seen at once. L1 holds at most
+MAX_ENTRIES entries and evicts the least recently used. Values are kept
+pickled, as in LocMemCache, so callers never share objects.
+
+Hit, miss and eviction counters are per process; stats() returns them and
+api/cache-stats/ serves them.
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+STATS = ('l1_hits', 'l2_hits', 'misses', 'evictions')
+
+_MISSING = object()
+
+
+class _Store:
+    """One L1, shared by every thread of the process"""
+
+    def __init__(self):
+        self.data = OrderedDict()  # key -> (expires, pickled value)
+        self.lock = threading.Lock()
+        self.stats = dict.fromkeys(STATS, 0)
+
+
+# Backend instances are per thread; their L1s are per process, by cache name
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', 'shared')
+        self._l1_timeout = options.get('L1_TIMEOUT', 5)
+        with _stores_lock:
+            self._store = _stores.setdefault(name, _Store())
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _l1_get(self, key):
+        store = self._store
+        with store.lock:
+            entry = store.data.get(key)
+            if entry is not None:
+                expires, pickled = entry
+                if expires > time.monotonic():
+                    store.data.move_to_end(key)
+                    store.stats['l1_hits'] += 1
+                    return pickled
+                del store.data[key]
+        return None
+
+    def _l1_set(self, key, pickled, timeout=DEFAULT_TIMEOUT):
+        expires = time.monotonic() + self._l1_timeout
+        if timeout is not None:
+            timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+            expires = min(expires, time.monotonic() + timeout)
+        store = self._store
+        with store.lock:
+            store.data[key] = (expires, pickled)
+            store.data.move_to_end(key)
+            while len(store.data) > self._max_entries:
+                store.data.popitem(last=False)
+                store.stats['evictions'] += 1
+
+    def _l1_delete(self, key):
+        with self._store.lock:
+            self._store.data.pop(key, None)
+
+    def _count(self, stat):
+        with self._store.lock:
+            self._store.stats[stat] += 1
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        pickled = self._l1_get(l1_key)
+        if pickled is not None:
+            return pickle.loads(pickled)
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        self._l1_set(l1_key, pickle.dumps(value, self.pickle_protocol))
+        return value
+
+    def _timeout(self, timeout):
+        # Resolve it here, or L2 would apply its own default instead of ours
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        timeout = self._timeout(timeout)
+        self.l2.set(key, value, timeout, version=version)
+        if timeout is not None and timeout <= 0:
+            self._l1_delete(l1_key)
+        else:
+            self._l1_set(l1_key, pickle.dumps(value, self.pickle_protocol), timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        timeout = self._timeout(timeout)
+        if not self.l2.add(key, value, timeout, version=version):
+            # Another process got there first; read its value from L2 next time
+            self._l1_delete(l1_key)
+            return False
+        self._l1_set(l1_key, pickle.dumps(value, self.pickle_protocol), timeout)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, self._timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self._l1_delete(self.make_and_validate_key(key, version=version))
+        return self.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self._l1_get(self.make_and_validate_key(key, version=version)) is not None:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        try:
+            value = self.l2.incr(key, delta, version=version)
+        except ValueError:
+            self._l1_delete(l1_key)
+            raise
+        self._l1_set(l1_key, pickle.dumps(value, self.pickle_protocol))
+        return value
+
+    def clear(self):
+        with self._store.lock:
+            self._store.data.clear()
+        self.l2.clear()
+
+    def stats(self):
+        """This process's counters, plus the number of entries in L1"""
+        with self._store.lock:
+            return dict(self._store.stats, entries=len(self._store.data))
@@ -29,6 +29,8 @@ urlpatterns = [
     path('mentor-dashboard/', views.mentor_dashboard_view, name='mentor_dashboard'),
     path('mentor/create-course/', views.mentor_create_course_view, name='mentor_create_course'),
     path('mentor/courses/', views.mentor_course_list_view, name='mentor_course_list'),
+    path('mentor/analytics/', views.mentor_course_analytics_view, name='mentor_course_analytics'),
+    path('mentor/student-progress/export/', views.mentor_progress_export_view, name='mentor_progress_export'),
     path('mentor/student-progress/<int:enrollment_id>/', views.mentor_student_progress_view, name='mentor_student_progress'),
     
     # Messaging
@@ -41,5 +43,14 @@ urlpatterns = [
     # API endpoints
     path('api/session/', views.api_session_info, name='api_session'),
     path('api/login/', views.api_login, name='api_login'),
+    path('api/courses/search/', views.course_search_view, name='course_search'),
+    path('api/courses/<int:course_id>/enroll/bulk/', views.api_bulk_enroll, name='api_bulk_enroll'),
+    path('api/enrollments/<int:enrollment_id>/messages/', views.api_message_thread, name='api_message_thread'),
+    path('api/events/', views.event_stream_view, name='event_stream'),
+    path('api/progress/', views.api_lesson_progress, name='api_lesson_progress'),
+    path('api/inbox/unread/', views.api_unread_counts, name='api_unread_counts'),
+    path('api/messages/mark-read/', views.api_mark_messages_read, name='api_mark_messages_read'),
+    path('api/notifications/mark-read/', views.api_mark_notifications_read, name='api_mark_notifications_read'),
+    path('api/cache-stats/', views.api_cache_stats, name='api_cache_stats'),
 ]
 
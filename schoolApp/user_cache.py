@@ -0,0 +1,102 @@
+"""
+Per-process cache of logged-in Student and Mentor rows.
+
+Almost every page needs the current user, so EduUserMiddleware resolves it
+through here instead of each view running its own Student/Mentor lookup.
+Rows are kept in a small LRU with a TTL (EDU_USER_CACHE_SIZE entries,
+EDU_USER_CACHE_TTL seconds). post_save/post_delete on Student and Mentor
+drop the entry in this process (see signals.py); other workers pick the
+change up when their entry expires. Queryset .update() calls bypass the
+signals, so call invalidate() after them.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import models, replica
+
+
+ROLE_MODELS = {
+    'student': models.Student,
+    'mentor': models.Mentor,
+}
+
+
+class LRUCache:
+    """Thread-safe size-bounded LRU with a per-entry TTL"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = LRUCache(
+    maxsize=getattr(settings, 'EDU_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'EDU_USER_CACHE_TTL', 300),
+)
+
+
+def get_user(role, user_id):
+    """Return the Student or Mentor with this id, or None"""
+    model = ROLE_MODELS.get(role)
+    if model is None or user_id is None:
+        return None
+
+    key = (role, user_id)
+    user = _cache.get(key)
+    if user is None:
+        with replica.primary():
+            user = model.objects.filter(id=user_id).first()
+        if user is None:
+            return None
+        _cache.set(key, user)
+    # Hand out a copy so a view changing fields can't leak into other requests
+    return copy.copy(user)
+
+
+def get_edu_user(request):
+    """Resolve the user named by the session, or None if logged out"""
+    if 'user_id' not in request.session:
+        return None
+    return get_user(request.session.get('user_role'), request.session.get('user_id'))
+
+
+def invalidate(role, user_id):
+    _cache.delete((role, user_id))
+
+
+def clear():
+    _cache.clear()
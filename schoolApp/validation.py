@@ -0,0 +1,27 @@
+"""
+Sign-up rules shared by register_view and the import_users command.
+"""
+
+import re
+
+
+ROLES = ['student', 'mentor']
+
+EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+MIN_PASSWORD_LENGTH = 6
+
+
+def registration_error(first_name, last_name, email, phone_number, password, confirm_password, role):
+    """Return the first problem with a sign-up as a user-facing message, or None"""
+    if not all([first_name, last_name, email, phone_number, password, confirm_password, role]):
+        return 'Please fill in all required fields'
+    if role not in ROLES:
+        return 'Invalid role selected'
+    if password != confirm_password:
+        return 'Passwords do not match'
+    if len(password) < MIN_PASSWORD_LENGTH:
+        return f'Password must be at least {MIN_PASSWORD_LENGTH} characters long'
+    if not re.match(EMAIL_REGEX, email):
+        return 'Please enter a valid email address'
+    return None
@@ -1,40 +1,77 @@
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth.hashers import make_password, check_password
 from django.contrib import messages
-from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
+from django.views.decorators.http import condition, require_http_methods
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.csrf import csrf_exempt
-from django.core.mail import send_mail
 from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+import asyncio
+import csv
+import datetime
+import functools
+import os
 import re
 import json
+from . import catalog
+from . import conditional
+from . import enrollment as enrollments
+from . import events
+from . import hashing
+from . import inbox
+from . import matching
 from . import models
+from . import page_cache
+from . import progress
+from . import querycache
+from . import recommendations
+from . import replica
+from . import search
+from . import tasks
+from . import threads
+from . import validation
 
+@page_cache.cache_page_by_navbar
 def school(request):
     return render(request, 'schoolApp/home.html')
 
+@page_cache.cache_page_by_navbar
 def about_view(request):
      return render(request, 'schoolApp/about.html')
 
+@page_cache.cache_page_by_navbar
 def readmore(request):
     return render(request, 'schoolApp/readmore.html')
 
+@page_cache.cache_page_by_navbar
 def instructor_view(request):
     return render(request, 'schoolApp/instructor.html')
 
+@page_cache.cache_page_by_navbar
 def certificate_view(request):
     return render(request, 'schoolApp/certification.html')
 
+@page_cache.cache_page_by_navbar
 def contacts_view(request):
     return render(request, 'schoolApp/contact.html')
 
+@page_cache.cache_page_by_navbar
 def books_view(request):
     return render(request, 'schoolApp/books.html')
 
+@replica.reads
+@condition(etag_func=conditional.catalog_etag)
 def class_view(request):
-    courses = models.Course.objects.all()
+    page = catalog.get_page(request.GET.get('cursor'))
     context = {
-        'courses': courses
+        'courses': page['courses'],
+        'next_cursor': page['next_cursor'],
     }
     return render(request, 'schoolApp/class.html', context)
 
@@ -46,6 +83,12 @@ def is_user_logged_in(request):
     return False
 
 
+def _retry_later(response):
+    """Mark a 503 response from a full password hashing queue"""
+    response['Retry-After'] = str(hashing.retry_after())
+    return response
+
+
 def login_view(request):
     """Handle student or mentor login"""
     # If already logged in, redirect to learning center
@@ -83,7 +126,13 @@ def login_view(request):
                 return render(request, 'schoolApp/login.html', {'role': role})
         
         # Check password
-        if not user.check_password(password):
+        try:
+            password_ok = user.check_password(password)
+        except hashing.HashingBusy:
+            messages.error(request, 'We are handling a lot of sign-ins right now. Please try again in a moment.')
+            return _retry_later(render(request, 'schoolApp/login.html', {'role': role}, status=503))
+        
+        if not password_ok:
             messages.error(request, 'Invalid email or password')
             return render(request, 'schoolApp/login.html', {'role': role})
         
@@ -127,28 +176,14 @@ def register_view(request):
         role = request.POST.get('role', '').lower()
         expertise = request.POST.get('expertise', '').strip() if role == 'mentor' else None
         
-        # Validation
-        if not all([first_name, last_name, email, phone_number, password, confirm_password, role]):
-            messages.error(request, 'Please fill in all required fields')
-            return render(request, 'schoolApp/register.html', {'role': role})
-        
-        if role not in ['student', 'mentor']:
-            messages.error(request, 'Invalid role selected')
-            return render(request, 'schoolApp/register.html')
-        
-        if password != confirm_password:
-            messages.error(request, 'Passwords do not match')
-            return render(request, 'schoolApp/register.html', {'role': role})
-        
-        if len(password) < 6:
-            messages.error(request, 'Password must be at least 6 characters long')
-            return render(request, 'schoolApp/register.html', {'role': role})
-        
-        # Validate email format
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_regex, email):
-            messages.error(request, 'Please enter a valid email address')
-            return render(request, 'schoolApp/register.html', {'role': role})
+        # Validation (shared with manage.py import_users)
+        error = validation.registration_error(
+            first_name, last_name, email, phone_number, password, confirm_password, role,
+        )
+        if error:
+            messages.error(request, error)
+            context = {'role': role} if role in validation.ROLES else {}
+            return render(request, 'schoolApp/register.html', context)
         
         # Check if user already exists
         if role == 'student':
@@ -176,7 +211,11 @@ def register_view(request):
             )
         
         # Save user to database
-        user.set_password(password)
+        try:
+            user.set_password(password)
+        except hashing.HashingBusy:
+            messages.error(request, 'We are handling a lot of sign-ups right now. Please try again in a moment.')
+            return _retry_later(render(request, 'schoolApp/register.html', {'role': role}, status=503))
         user.save()
         
         # Set session and redirect to learning center
@@ -209,14 +248,9 @@ def dashboard_view(request):
         return redirect('/schoolApp/login/')
     
     user_role = request.session.get('user_role')
-    user_id = request.session.get('user_id')
+    user = request.edu_user
     
-    try:
-        if user_role == 'student':
-            user = models.Student.objects.get(id=user_id)
-        else:
-            user = models.Mentor.objects.get(id=user_id)
-    except (models.Student.DoesNotExist, models.Mentor.DoesNotExist):
+    if not user:
         request.session.flush()
         messages.error(request, 'User not found. Please log in again')
         return redirect('/schoolApp/login/')
@@ -272,7 +306,12 @@ def api_login(request):
             except models.Mentor.DoesNotExist:
                 return JsonResponse({'success': False, 'error': 'Invalid credentials'}, status=401)
         
-        if not user.check_password(password):
+        try:
+            password_ok = user.check_password(password)
+        except hashing.HashingBusy:
+            return _retry_later(JsonResponse({'success': False, 'error': 'Server busy, please retry'}, status=503))
+        
+        if not password_ok:
             return JsonResponse({'success': False, 'error': 'Invalid credentials'}, status=401)
         
         # Set session
@@ -292,6 +331,8 @@ def api_login(request):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+@replica.reads
+@condition(etag_func=conditional.learning_center_etag)
 def learning_center_view(request):
     """Learning center - accessible only to logged-in users"""
     if 'user_id' not in request.session:
@@ -299,36 +340,34 @@ def learning_center_view(request):
         return redirect('/schoolApp/login/')
     
     user_role = request.session.get('user_role')
-    user_id = request.session.get('user_id')
     user_name = request.session.get('user_name')
+    user = request.edu_user
     
-    try:
-        if user_role == 'student':
-            user = models.Student.objects.get(id=user_id)
-        else:
-            user = models.Mentor.objects.get(id=user_id)
-    except (models.Student.DoesNotExist, models.Mentor.DoesNotExist):
+    if not user:
         request.session.flush()
         messages.error(request, 'User not found. Please log in again')
         return redirect('/schoolApp/login/')
     
-    # Get all courses for display
-    all_courses = models.Course.objects.all()
+    # Get one page of the course catalog for display
+    page = catalog.get_page(request.GET.get('cursor'))
     
     context = {
         'user': user,
         'user_role': user_role,
         'user_name': user_name,
-        'courses': all_courses,
+        'courses': page['courses'],
+        'next_cursor': page['next_cursor'],
+        'total_courses': page['total'],
     }
     return render(request, 'schoolApp/learning_center.html', context)
 
 
+@replica.reads
+@condition(etag_func=conditional.course_detail_etag)
 def course_detail_view(request, course_id):
     """Display course details with enrollment options"""
-    try:
-        course = models.Course.objects.get(id=course_id)
-    except models.Course.DoesNotExist:
+    course = querycache.course(course_id)
+    if course is None:
         messages.error(request, 'Course not found')
         return redirect('learning_center')
     
@@ -339,15 +378,11 @@ def course_detail_view(request, course_id):
     
     if 'user_id' in request.session:
         user_role = request.session.get('user_role')
-        user_id = request.session.get('user_id')
         
-        if user_role == 'student':
-            try:
-                user = models.Student.objects.get(id=user_id)
-                enrollment = models.StudentCourse.objects.filter(student=user, course=course).first()
-                is_enrolled = enrollment is not None
-            except models.Student.DoesNotExist:
-                pass
+        if user_role == 'student' and request.edu_user:
+            user = request.edu_user
+            enrollment = models.StudentCourse.objects.filter(student=user, course=course).first()
+            is_enrolled = enrollment is not None
     
     context = {
         'course': course,
@@ -365,18 +400,12 @@ def enroll_course_view(request, course_id):
         messages.warning(request, 'Please log in as a student to enroll')
         return redirect('login')
     
-    try:
-        course = models.Course.objects.get(id=course_id)
-        student = models.Student.objects.get(id=request.session.get('user_id'))
-    except (models.Course.DoesNotExist, models.Student.DoesNotExist):
+    course = querycache.course(course_id)
+    student = request.edu_user
+    if course is None or not student:
         messages.error(request, 'Course or student not found')
         return redirect('learning_center')
     
-    # Check if already enrolled
-    if models.StudentCourse.objects.filter(student=student, course=course).exists():
-        messages.warning(request, 'You are already enrolled in this course')
-        return redirect('course_detail', course_id=course_id)
-    
     if request.method == 'POST':
         enrollment_type = request.POST.get('enrollment_type', 'free')
         mentor_id = request.POST.get('mentor_id', None)
@@ -385,44 +414,34 @@ def enroll_course_view(request, course_id):
             messages.error(request, 'Invalid enrollment type')
             return redirect('course_detail', course_id=course_id)
         
-        mentor = None
         if enrollment_type == 'mentored' and mentor_id:
-            try:
-                mentor = models.Mentor.objects.get(id=mentor_id)
-            except models.Mentor.DoesNotExist:
+            if not mentor_id.isdigit():
                 messages.error(request, 'Mentor not found')
                 return redirect('course_detail', course_id=course_id)
+            mentor_id = int(mentor_id)
+        else:
+            mentor_id = None
         
-        # Create enrollment
-        enrollment = models.StudentCourse.objects.create(
-            student=student,
-            course=course,
-            enrollment_type=enrollment_type,
-            mentor=mentor,
-            status='enrolled'
-        )
-        
-        # Create learning path
-        models.LearningPath.objects.create(
-            student_course=enrollment,
-            total_lessons=10  # Default value, can be updated
-        )
-        
-        # Create notification for mentor if mentored
-        if mentor:
-            models.Notification.objects.create(
-                mentor=mentor,
-                notification_type='enrollment',
-                title=f'New Student: {student.first_name} {student.last_name}',
-                message=f'{student.first_name} {student.last_name} enrolled in {course.title} with mentoring',
-                related_course=course
-            )
+        # The unique constraint, not a pre-check, catches double enrollment
+        try:
+            enrollments.enroll(student.id, course.id, enrollment_type, mentor_id)
+        except enrollments.AlreadyEnrolled:
+            messages.warning(request, 'You are already enrolled in this course')
+            return redirect('course_detail', course_id=course_id)
+        except enrollments.MentorNotFound:
+            messages.error(request, 'Mentor not found')
+            return redirect('course_detail', course_id=course_id)
         
         messages.success(request, f'Successfully enrolled in {course.title}!')
         return redirect('student_dashboard')
     
-    # GET request - show enrollment options
-    mentors = models.Mentor.objects.all()
+    # Check if already enrolled
+    if models.StudentCourse.objects.filter(student=student, course=course).exists():
+        messages.warning(request, 'You are already enrolled in this course')
+        return redirect('course_detail', course_id=course_id)
+    
+    # GET request - show enrollment options with the best-matched mentors
+    mentors = matching.suggest(course)
     context = {
         'course': course,
         'mentors': mentors,
@@ -430,79 +449,84 @@ def enroll_course_view(request, course_id):
     return render(request, 'schoolApp/enroll_course.html', context)
 
 
+@replica.reads
 def student_dashboard_view(request):
     """Student-specific dashboard with learning journey"""
     if 'user_id' not in request.session or request.session.get('user_role') != 'student':
         messages.warning(request, 'Please log in as a student')
         return redirect('login')
     
-    try:
-        student = models.Student.objects.get(id=request.session.get('user_id'))
-    except models.Student.DoesNotExist:
+    student = request.edu_user
+    if not student:
         request.session.flush()
         messages.error(request, 'Student not found')
         return redirect('login')
     
     # Get enrolled courses with progress
-    enrollments = models.StudentCourse.objects.filter(student=student).select_related('course', 'mentor', 'learning_path')
-    
-    # Get available courses (courses not yet enrolled in)
-    enrolled_course_ids = enrollments.values_list('course_id', flat=True)
-    available_courses = models.Course.objects.exclude(id__in=enrolled_course_ids)
+    student_courses = models.StudentCourse.objects.filter(student=student).select_related(
+        'course__instructor', 'mentor', 'learning_path'
+    )
     
-    # Calculate statistics
-    total_courses = enrollments.count()
-    completed_courses = enrollments.filter(status='completed').count()
-    in_progress = enrollments.filter(status='in_progress').count()
+    # Recommend courses taken by students of the same courses
+    # (iterating fills the queryset's cache, so the template reuses these rows)
+    enrolled_course_ids = [enrollment.course_id for enrollment in student_courses]
+    available_courses = recommendations.for_student(student.id, enrolled_course_ids)
     
-    # Calculate overall progress
-    total_progress = 0
-    if enrollments.exists():
-        total_progress = sum(e.progress for e in enrollments) / enrollments.count()
+    # Calculate statistics and overall progress in a single query
+    stats = models.StudentCourse.objects.filter(student=student).aggregate(
+        total_courses=Count('id'),
+        completed_courses=Count('id', filter=Q(status='completed')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        average_progress=Avg('progress'),
+    )
     
     context = {
         'student': student,
-        'enrollments': enrollments,
+        'enrollments': student_courses,
         'available_courses': available_courses,
-        'total_courses': total_courses,
-        'completed_courses': completed_courses,
-        'in_progress': in_progress,
-        'average_progress': round(total_progress, 1),
+        'total_courses': stats['total_courses'],
+        'completed_courses': stats['completed_courses'],
+        'in_progress': stats['in_progress'],
+        'average_progress': round(stats['average_progress'] or 0, 1),
     }
     return render(request, 'schoolApp/student_dashboard.html', context)
 
 
+@replica.reads
 def mentor_dashboard_view(request):
     """Mentor-specific dashboard with course management and student tracking"""
     if 'user_id' not in request.session or request.session.get('user_role') != 'mentor':
         messages.warning(request, 'Please log in as a mentor')
         return redirect('login')
     
-    try:
-        mentor = models.Mentor.objects.get(id=request.session.get('user_id'))
-    except models.Mentor.DoesNotExist:
+    mentor = request.edu_user
+    if not mentor:
         request.session.flush()
         messages.error(request, 'Mentor not found')
         return redirect('login')
     
     # Get courses taught by this mentor
-    courses = models.Course.objects.filter(instructor__email=mentor.email)
+    courses = models.Course.objects.filter(instructor__email=mentor.email).select_related('stats')
     
     # Get mentored students
     mentored_students = models.StudentCourse.objects.filter(mentor=mentor).select_related('student', 'course')
     
-    # Get unread messages
-    unread_messages = models.Message.objects.filter(receiver_mentor=mentor, is_read=False)
-    
-    # Get notifications
-    notifications = models.Notification.objects.filter(mentor=mentor, is_read=False)
+    # Unread badges come from cached counters; only the newest few messages are loaded
+    unread_counts = inbox.unread_counts('mentor', mentor.id)
+    unread_messages = []
+    if unread_counts['messages']:
+        unread_messages = list(
+            models.Message.objects.filter(receiver_mentor=mentor, is_read=False)
+            .select_related('sender_student')[:5]
+        )
     
     context = {
         'mentor': mentor,
         'courses': courses,
         'mentored_students': mentored_students,
         'unread_messages': unread_messages,
-        'notifications': notifications,
+        'unread_message_count': unread_counts['messages'],
+        'unread_notification_count': unread_counts['notifications'],
         'total_students': mentored_students.count(),
     }
     return render(request, 'schoolApp/mentor_dashboard.html', context)
@@ -514,9 +538,8 @@ def mentor_create_course_view(request):
         messages.warning(request, 'Please log in as a mentor')
         return redirect('login')
     
-    try:
-        mentor = models.Mentor.objects.get(id=request.session.get('user_id'))
-    except models.Mentor.DoesNotExist:
+    mentor = request.edu_user
+    if not mentor:
         request.session.flush()
         messages.error(request, 'Mentor not found')
         return redirect('login')
@@ -571,15 +594,14 @@ def mentor_course_list_view(request):
         messages.warning(request, 'Please log in as a mentor')
         return redirect('login')
     
-    try:
-        mentor = models.Mentor.objects.get(id=request.session.get('user_id'))
-    except models.Mentor.DoesNotExist:
+    mentor = request.edu_user
+    if not mentor:
         request.session.flush()
         messages.error(request, 'Mentor not found')
         return redirect('login')
     
     # Get courses taught by this mentor
-    courses = models.Course.objects.filter(instructor__email=mentor.email)
+    courses = models.Course.objects.filter(instructor__email=mentor.email).select_related('stats')
     
     context = {
         'mentor': mentor,
@@ -595,8 +617,12 @@ def mentor_student_progress_view(request, enrollment_id):
         return redirect('login')
     
     try:
-        mentor = models.Mentor.objects.get(id=request.session.get('user_id'))
-        enrollment = models.StudentCourse.objects.get(id=enrollment_id, mentor=mentor)
+        mentor = request.edu_user
+        if not mentor:
+            raise models.Mentor.DoesNotExist
+        enrollment = models.StudentCourse.objects.select_related(
+            'student', 'course__instructor', 'learning_path'
+        ).get(id=enrollment_id, mentor=mentor)
     except (models.Mentor.DoesNotExist, models.StudentCourse.DoesNotExist):
         messages.error(request, 'Enrollment not found or access denied')
         return redirect('mentor_dashboard')
@@ -611,6 +637,113 @@ def mentor_student_progress_view(request, enrollment_id):
     return render(request, 'schoolApp/mentor_student_progress.html', context)
 
 
+class _Echo:
+    """File-like object whose write() hands the line straight back to csv.writer's caller"""
+    def write(self, value):
+        return value
+
+
+PROGRESS_EXPORT_COLUMNS = [
+    ('student__first_name', 'First Name'),
+    ('student__last_name', 'Last Name'),
+    ('student__email', 'Email'),
+    ('course__title', 'Course'),
+    ('enrollment_type', 'Enrollment Type'),
+    ('status', 'Status'),
+    ('progress', 'Progress (%)'),
+    ('enrollment_date', 'Enrolled'),
+    ('completed_date', 'Completed'),
+    ('learning_path__completed_lessons', 'Completed Lessons'),
+    ('learning_path__total_lessons', 'Total Lessons'),
+    ('learning_path__average_score', 'Average Score'),
+    ('learning_path__last_accessed', 'Last Accessed'),
+]
+
+
+def _csv_cell(value):
+    # Keep spreadsheet apps from running names like "=HYPERLINK(...)" as formulas
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return '' if value is None else value
+
+
+def mentor_progress_export_view(request):
+    """Download every mentored student's progress as CSV, streamed row by row"""
+    if 'user_id' not in request.session or request.session.get('user_role') != 'mentor':
+        messages.warning(request, 'Please log in as a mentor')
+        return redirect('login')
+    
+    mentor = request.edu_user
+    if not mentor:
+        request.session.flush()
+        messages.error(request, 'Mentor not found')
+        return redirect('login')
+    
+    # One query joining student, course and learning path; iterator() keeps
+    # only a chunk of rows in memory at a time
+    fields = [field for field, _ in PROGRESS_EXPORT_COLUMNS]
+    rows = (
+        models.StudentCourse.objects.filter(mentor=mentor)
+        .order_by('id')
+        .values_list(*fields)
+        .iterator(chunk_size=2000)
+    )
+    writer = csv.writer(_Echo())
+    
+    def stream():
+        yield writer.writerow([label for _, label in PROGRESS_EXPORT_COLUMNS])
+        for row in rows:
+            yield writer.writerow([_csv_cell(value) for value in row])
+    
+    response = StreamingHttpResponse(stream(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="student-progress.csv"'
+    return response
+
+
+ANALYTICS_DAYS = 30
+
+
+def mentor_course_analytics_view(request):
+    """Enrollment funnel and daily activity for the mentor's courses, read from the rollups"""
+    if 'user_id' not in request.session or request.session.get('user_role') != 'mentor':
+        messages.warning(request, 'Please log in as a mentor')
+        return redirect('login')
+    
+    mentor = request.edu_user
+    if not mentor:
+        request.session.flush()
+        messages.error(request, 'Mentor not found')
+        return redirect('login')
+    
+    courses = list(
+        models.Course.objects.filter(instructor__email=mentor.email)
+        .select_related('stats')
+        .order_by('title')
+    )
+    rows = []
+    for course in courses:
+        # Courses nobody has enrolled in yet have no stats row
+        stats = getattr(course, 'stats', None) or models.CourseStats(course=course)
+        rows.append({'course': course, 'stats': stats})
+    
+    since = timezone.localdate() - datetime.timedelta(days=ANALYTICS_DAYS - 1)
+    daily = (
+        models.CourseDailyStats.objects
+        .filter(course__in=[course.id for course in courses], date__gte=since)
+        .values('date')
+        .annotate(enrollments=Sum('enrollments'), completions=Sum('completions'))
+        .order_by('-date')
+    )
+    
+    context = {
+        'mentor': mentor,
+        'rows': rows,
+        'daily': daily,
+        'days': ANALYTICS_DAYS,
+    }
+    return render(request, 'schoolApp/course_analytics.html', context)
+
+
 def send_message_view(request, enrollment_id):
     """Send a message to a student (mentor) or mentor (student)"""
     if 'user_id' not in request.session:
@@ -618,10 +751,9 @@ def send_message_view(request, enrollment_id):
         return redirect('login')
     
     user_role = request.session.get('user_role')
-    user_id = request.session.get('user_id')
     
     try:
-        enrollment = models.StudentCourse.objects.get(id=enrollment_id)
+        enrollment = models.StudentCourse.objects.select_related('student', 'mentor', 'course').get(id=enrollment_id)
     except models.StudentCourse.DoesNotExist:
         messages.error(request, 'Enrollment not found')
         return redirect('learning_center')
@@ -636,7 +768,9 @@ def send_message_view(request, enrollment_id):
         
         try:
             if user_role == 'student':
-                student = models.Student.objects.get(id=user_id)
+                student = request.edu_user
+                if not student:
+                    raise models.Student.DoesNotExist('Student not found')
                 message = models.Message.objects.create(
                     sender_student=student,
                     receiver_mentor=enrollment.mentor,
@@ -644,16 +778,10 @@ def send_message_view(request, enrollment_id):
                     subject=subject,
                     body=body,
                 )
-                # Create notification for mentor
-                if enrollment.mentor:
-                    models.Notification.objects.create(
-                        mentor=enrollment.mentor,
-                        notification_type='message',
-                        title=f'Message from {student.first_name}',
-                        message=subject if subject else 'New message',
-                    )
             else:  # mentor
-                mentor = models.Mentor.objects.get(id=user_id)
+                mentor = request.edu_user
+                if not mentor:
+                    raise models.Mentor.DoesNotExist('Mentor not found')
                 message = models.Message.objects.create(
                     sender_mentor=mentor,
                     receiver_student=enrollment.student,
@@ -661,14 +789,9 @@ def send_message_view(request, enrollment_id):
                     subject=subject,
                     body=body,
                 )
-                # Create notification for student
-                models.Notification.objects.create(
-                    student=enrollment.student,
-                    notification_type='message',
-                    title=f'Message from Mentor {mentor.first_name}',
-                    message=subject if subject else 'New message',
-                )
             
+            # Notify the receiver; in this process, so an open event stream gets it pushed
+            transaction.on_commit(functools.partial(tasks.notify_message, message.id), robust=True)
             messages.success(request, 'Message sent successfully!')
             return redirect('student_dashboard' if user_role == 'student' else 'mentor_dashboard')
         except Exception as e:
@@ -678,9 +801,227 @@ def send_message_view(request, enrollment_id):
     context = {
         'enrollment': enrollment,
     }
+    # Show the conversation so far to the two people in it
+    if threads.is_participant(request, enrollment):
+        thread = threads.get_page(enrollment.id, request.GET.get('cursor'))
+        context['thread'] = thread['messages']
+        context['next_cursor'] = thread['next_cursor']
     return render(request, 'schoolApp/send_message.html', context)
 
 
+@require_http_methods(["GET"])
+def api_message_thread(request, enrollment_id):
+    """A page of an enrollment's conversation, newest first; pass next_cursor for older messages"""
+    if 'user_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'Not logged in'}, status=401)
+    
+    enrollment = models.StudentCourse.objects.filter(id=enrollment_id).first()
+    if enrollment is None or not threads.is_participant(request, enrollment):
+        return JsonResponse({'success': False, 'error': 'Enrollment not found'}, status=404)
+    
+    try:
+        page_size = min(int(request.GET.get('limit', settings.MESSAGE_THREAD_PAGE_SIZE)), 100)
+    except ValueError:
+        page_size = settings.MESSAGE_THREAD_PAGE_SIZE
+    thread = threads.get_page(enrollment.id, request.GET.get('cursor'), max(page_size, 1))
+    return JsonResponse({
+        'success': True,
+        'messages': [threads.serialize(message) for message in thread['messages']],
+        'next_cursor': thread['next_cursor'],
+    })
+
+
+def _mark_read(request, kind):
+    """Shared body of the mark-read endpoints"""
+    if 'user_id' not in request.session or request.session.get('user_role') not in inbox.RECEIVER_FIELDS:
+        return JsonResponse({'success': False, 'error': 'Not logged in'}, status=401)
+    
+    ids = None
+    if request.content_type == 'application/json' and request.body:
+        try:
+            data = json.loads(request.body)
+            if data.get('ids') is not None:
+                ids = [int(i) for i in data['ids']]
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'success': False, 'error': 'Expected {"ids": [...]}'}, status=400)
+    
+    role = request.session.get('user_role')
+    user_id = request.session.get('user_id')
+    updated = inbox.mark_read(kind, role, user_id, ids)
+    return JsonResponse({
+        'success': True,
+        'updated': updated,
+        'unread': inbox.unread_counts(role, user_id),
+    })
+
+
+@require_http_methods(["POST"])
+def api_mark_messages_read(request):
+    """Mark all (or the given ids of) the user's unread messages as read"""
+    return _mark_read(request, 'messages')
+
+
+@require_http_methods(["POST"])
+def api_mark_notifications_read(request):
+    """Mark all (or the given ids of) the user's unread notifications as read"""
+    return _mark_read(request, 'notifications')
+
+
+@require_http_methods(["GET"])
+def api_unread_counts(request):
+    """Unread badge counts for the logged-in user"""
+    if 'user_id' not in request.session or request.session.get('user_role') not in inbox.RECEIVER_FIELDS:
+        return JsonResponse({'success': False, 'error': 'Not logged in'}, status=401)
+    counts = inbox.unread_counts(request.session.get('user_role'), request.session.get('user_id'))
+    return JsonResponse({'success': True, 'unread': counts})
+
+
+@require_http_methods(["GET"])
+def api_cache_stats(request):
+    """Hit, miss and eviction counters of this process's tiered caches, for mentors and scrapers"""
+    if (
+        request.META.get('REMOTE_ADDR') not in settings.CACHE_STATS_ALLOWED_IPS
+        and request.session.get('user_role') != 'mentor'
+    ):
+        return JsonResponse({'success': False, 'error': 'Please log in as a mentor'}, status=401)
+    stats = {alias: caches[alias].stats() for alias in settings.CACHES if hasattr(caches[alias], 'stats')}
+    return JsonResponse({'success': True, 'pid': os.getpid(), 'caches': stats})
+
+
+def _session_user(request):
+    return request.session.get('user_role'), request.session.get('user_id')
+
+
+async def _event_stream(role, user_id):
+    """Yield SSE frames: the unread counts, then each new event as it is published"""
+    # Subscribe before reading the counts so nothing falls in between
+    with events.subscribe(role, user_id) as subscription:
+        counts = await sync_to_async(inbox.unread_counts)(role, user_id)
+        yield events.format_event({'type': 'unread', **counts})
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.EVENT_STREAM_MAX_AGE
+        while loop.time() < deadline:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), settings.EVENT_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield events.format_event(event)
+
+
+async def event_stream_view(request):
+    """Server-Sent Events stream of new messages and notifications for the logged-in user"""
+    role, user_id = await sync_to_async(_session_user)(request)
+    if role not in inbox.RECEIVER_FIELDS or user_id is None:
+        return JsonResponse({'success': False, 'error': 'Not logged in'}, status=401)
+    
+    if isinstance(request, ASGIRequest):
+        content = _event_stream(role, user_id)
+    else:
+        # No event loop to push from under WSGI: send a snapshot and let EventSource poll
+        counts = await sync_to_async(inbox.unread_counts)(role, user_id)
+        content = [
+            f'retry: {settings.EVENT_STREAM_POLL_INTERVAL * 1000}\n\n',
+            events.format_event({'type': 'unread', **counts}),
+        ]
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_http_methods(["POST"])
+def api_lesson_progress(request):
+    """Record a batch of lesson events from the course player for the logged-in student"""
+    if 'user_id' not in request.session or request.session.get('user_role') != 'student':
+        return JsonResponse({'success': False, 'error': 'Please log in as a student'}, status=401)
+    
+    try:
+        data = json.loads(request.body)
+        now = timezone.now()
+        lesson_events = [progress.parse_event(event, now) for event in data['events']]
+    except progress.InvalidEvent as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'success': False, 'error': 'Expected {"events": [...]}'}, status=400)
+    if len(lesson_events) > settings.PROGRESS_MAX_EVENTS:
+        return JsonResponse({
+            'success': False, 'error': f'At most {settings.PROGRESS_MAX_EVENTS} events per request',
+        }, status=400)
+    
+    # Students can only report progress on their own enrollments
+    own = set(models.StudentCourse.objects.filter(
+        id__in={event[0] for event in lesson_events}, student_id=request.session.get('user_id'),
+    ).values_list('id', flat=True))
+    rejected = sorted({event[0] for event in lesson_events} - own)
+    updated = progress.apply([event for event in lesson_events if event[0] in own])
+    return JsonResponse({'success': True, 'enrollments': updated, 'rejected': rejected})
+
+
+@require_http_methods(["POST"])
+def api_bulk_enroll(request, course_id):
+    """Enroll many students in one of the logged-in mentor's courses"""
+    if 'user_id' not in request.session or request.session.get('user_role') != 'mentor':
+        return JsonResponse({'success': False, 'error': 'Please log in as a mentor'}, status=401)
+    
+    mentor = request.edu_user
+    course = models.Course.objects.filter(id=course_id, instructor__email=mentor.email if mentor else None).first()
+    if course is None:
+        return JsonResponse({'success': False, 'error': 'Course not found'}, status=404)
+    
+    try:
+        data = json.loads(request.body)
+        students = list(data.get('student_ids', [])) + list(data.get('emails', []))
+        enrollment_type = data.get('enrollment_type', 'free')
+        mentor_id = data.get('mentor_id')
+        if mentor_id is not None:
+            mentor_id = int(mentor_id)
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Expected {"student_ids": [...], "emails": [...]}'}, status=400)
+    
+    if enrollment_type not in ['free', 'mentored']:
+        return JsonResponse({'success': False, 'error': 'Invalid enrollment type'}, status=400)
+    if mentor_id is not None and not models.Mentor.objects.filter(id=mentor_id).exists():
+        return JsonResponse({'success': False, 'error': 'Mentor not found'}, status=400)
+    
+    # Ids and emails with no student are reported rather than failing the batch
+    invalid = []
+    enrolled = enrollments.bulk_enroll(
+        course.id, enrollments.resolve_students(students, invalid=invalid), enrollment_type, mentor_id,
+        invalid=invalid,
+    )
+    return JsonResponse({'success': True, 'enrolled': enrolled, 'invalid': invalid})
+
+
+@require_http_methods(["GET"])
+def course_search_view(request):
+    """API endpoint for ranked full-text course search (?q=...&limit=&offset=)"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid limit or offset'}, status=400)
+    
+    results = search.search(query, limit=limit, offset=offset)
+    return JsonResponse({
+        'success': True,
+        'query': query,
+        'results': [
+            {
+                'id': course.id,
+                'title': course.title,
+                'description': course.description,
+                'instructor': f"{course.instructor.first_name} {course.instructor.last_name}",
+                'course_type': course.course_type,
+                'url': reverse('course_detail', args=[course.id]),
+            }
+            for course in results
+        ],
+    })
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def newsletter_signup(request):
@@ -710,18 +1051,8 @@ def newsletter_signup(request):
             newsletter.is_active = True
             newsletter.save()
         
-        # Send welcome email
-        try:
-            send_mail(
-                subject='Welcome to EduForAll Newsletter',
-                message=f'Thank you for subscribing to our newsletter! You will receive updates about our latest courses and learning opportunities.',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=True
-            )
-        except Exception as e:
-            # Email sending failed but subscription was successful
-            pass
+        # Send the welcome email in the background; the worker retries failures
+        tasks.enqueue('send_welcome_email', email=email)
         
         return JsonResponse({
             'success': True,